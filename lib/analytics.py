@@ -0,0 +1,287 @@
+# lib/analytics.py
+import os
+import threading
+import zipfile
+from datetime import date, datetime, timedelta
+import numpy as np
+from sqlalchemy import Integer, cast, select, func
+from lib.models.__init__ import get_engine, helper_session
+from lib.models.workout import Workout
+from lib.rollups import period_key
+from lib.archive import log_source
+
+# Reports over a columnar snapshot of user_workouts instead of ORM objects. Each log is
+# one slot in five NumPy columns (int32 ids, int64 epoch seconds, int16 minutes), and
+# every report is a vectorized group-by over them:
+#
+#   snapshot = get_snapshot()
+#   snapshot.minutes_per_user('week')
+#   snapshot.rolling_load(user_id=1)
+#
+# The snapshot refreshes incrementally from the highest log id it has seen and is saved
+# to an uncompressed .npz next to the database (FITNESS_TRACKER_ANALYTICS_CACHE to
+# override), whose columns are memory-mapped on the next start.
+SNAPSHOT_CHUNK_SIZE = 100_000
+SECONDS_PER_DAY = 86_400
+COLUMNS = {
+    'log_id': 'int32',
+    'user_id': 'int32',
+    'workout_id': 'int32',
+    'timestamp': 'int64',
+    'duration': 'int16',
+}
+
+def default_cache_path():
+    configured = os.environ.get("FITNESS_TRACKER_ANALYTICS_CACHE")
+    if configured:
+        return configured
+    engine = get_engine()
+    database = engine.url.database
+    if engine.dialect.name != 'sqlite' or not database or database == ':memory:':
+        return None
+    return f"{database}.analytics.npz"
+
+def _epoch_seconds(column):
+    # SQLite stores DateTime as naive text; strftime('%s') reads it as UTC, as _epoch does.
+    return cast(func.strftime('%s', column), Integer)
+
+def _mmap_npz(path):
+    """Memory-maps each array of an uncompressed .npz in place (np.load reads members into memory)."""
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as raw:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path} is compressed and cannot be memory-mapped.")
+            raw.seek(info.header_offset)
+            local_header = raw.read(30)
+            name_length = int.from_bytes(local_header[26:28], 'little')
+            extra_length = int.from_bytes(local_header[28:30], 'little')
+            raw.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(raw)
+            read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+            shape, fortran_order, dtype = read_header(raw)
+            name = info.filename[:-len('.npy')] if info.filename.endswith('.npy') else info.filename
+            if shape == ():
+                arrays[name] = np.fromfile(raw, dtype=dtype, count=1).reshape(())
+            elif 0 in shape:
+                arrays[name] = np.zeros(shape, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=raw.tell(), shape=shape,
+                                         order='F' if fortran_order else 'C')
+    return arrays
+
+class LogSnapshot:
+    """Columnar copy of user_workouts with each log's current workout duration."""
+
+    def __init__(self, columns=None, max_log_id=0):
+        self.columns = columns or {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self.max_log_id = max_log_id
+        self.durations_by_workout = np.zeros(1, dtype='int16')
+        self.activities = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.columns['log_id'])
+
+    @classmethod
+    def load(cls, path):
+        arrays = _mmap_npz(path)
+        max_log_id = int(arrays.pop('max_log_id'))
+        return cls({name: arrays[name] for name in COLUMNS}, max_log_id)
+
+    def save(self, path):
+        # Written uncompressed and swapped in atomically, so it can be memory-mapped later.
+        temporary = f"{path}.tmp.npz"
+        np.savez(temporary, max_log_id=np.int64(self.max_log_id), **self.columns)
+        os.replace(temporary, path)
+
+    def refresh(self, session=None):
+        """
+        Appends logs with ids above max_log_id and re-reads workout durations. Falls back to
+        a full reload when logs at or below the watermark were deleted. Returns the rows added.
+        """
+        with self._lock, helper_session(session) as (session, owned):
+            workouts = session.execute(select(Workout.id, Workout.duration_minutes, Workout.activity)).all()
+            durations = np.zeros(max((row[0] for row in workouts), default=0) + 1, dtype='int16')
+            for workout_id, duration, _ in workouts:
+                durations[workout_id] = duration or 0
+            self.durations_by_workout = durations
+            self.activities = {workout_id: activity for workout_id, _, activity in workouts}
+
+            # Archived logs are part of the history too.
+            logs = log_source(session)
+            kept = session.execute(
+                select(func.count()).select_from(logs)
+                .where(logs.id <= self.max_log_id, logs.completion_date.isnot(None))
+            ).scalar()
+            if kept != len(self):
+                self.columns = {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+                self.max_log_id = 0
+
+            rows = session.execute(
+                select(logs.id, logs.user_id, logs.workout_id, _epoch_seconds(logs.completion_date))
+                .where(logs.id > self.max_log_id, logs.completion_date.isnot(None))
+                .order_by(logs.id)
+                .execution_options(yield_per=SNAPSHOT_CHUNK_SIZE)
+            )
+            chunks = [np.array(chunk, dtype='int64').reshape(-1, 4) for chunk in rows.partitions()]
+            added = sum(len(chunk) for chunk in chunks)
+            if added:
+                new = np.concatenate(chunks)
+                for index, name in enumerate(('log_id', 'user_id', 'workout_id', 'timestamp')):
+                    self.columns[name] = np.concatenate(
+                        [self.columns[name], new[:, index].astype(COLUMNS[name])]
+                    )
+                self.max_log_id = int(new[-1, 0])
+
+            # Durations always follow the workouts table, so update_workout_duration shows up too.
+            workout_ids = np.minimum(self.columns['workout_id'], len(durations) - 1)
+            self.columns['duration'] = durations[workout_ids]
+            return added
+
+    def _mask(self, user_id=None, since=None, until=None):
+        mask = np.ones(len(self), dtype=bool)
+        if user_id is not None:
+            mask &= self.columns['user_id'] == user_id
+        if since is not None:
+            mask &= self.columns['timestamp'] >= _epoch(since)
+        if until is not None:
+            mask &= self.columns['timestamp'] < _epoch(until, end_of_day=True)
+        return mask
+
+    def minutes_per_user(self, period='week', user_id=None, since=None, until=None):
+        """
+        Returns [(user_id, period_key, sessions, minutes), ...] ordered by user and period,
+        with the same period keys as the rollup tables.
+        """
+        mask = self._mask(user_id, since, until)
+        users = self.columns['user_id'][mask]
+        days = self.columns['timestamp'][mask] // SECONDS_PER_DAY
+        minutes = self.columns['duration'][mask]
+        if period == 'day':
+            buckets = days
+        elif period == 'week':
+            buckets = (days + 3) // 7  # 1970-01-01 was a Thursday; weeks start on Monday
+        elif period == 'month':
+            buckets = days.astype('datetime64[D]').astype('datetime64[M]').astype('int64')
+        else:
+            raise ValueError(f"Unknown period '{period}', expected one of day, week, month.")
+        if not len(users):
+            return []
+        # One int64 key per (user, bucket) so the group-by is a single 1-D unique.
+        first_bucket = int(buckets.min())
+        span = int(buckets.max()) - first_bucket + 1
+        keys, inverse = np.unique(users.astype('int64') * span + (buckets - first_bucket), return_inverse=True)
+        sessions = np.bincount(inverse, minlength=len(keys))
+        totals = np.bincount(inverse, weights=minutes, minlength=len(keys)).astype('int64')
+        key_users, key_buckets = keys // span, keys % span + first_bucket
+        labels = {bucket: _bucket_key(period, bucket) for bucket in np.unique(key_buckets).tolist()}
+        return [(u, labels[b], s, m) for u, b, s, m in zip(
+            key_users.tolist(), key_buckets.tolist(), sessions.tolist(), totals.tolist()
+        )]
+
+    def activity_distribution(self, user_id=None, since=None, until=None):
+        """Returns [(activity, sessions, minutes, share_of_minutes), ...], most minutes first."""
+        mask = self._mask(user_id, since, until)
+        workout_ids = self.columns['workout_id'][mask]
+        size = max(len(self.durations_by_workout), int(workout_ids.max(initial=0)) + 1)
+        sessions = np.bincount(workout_ids, minlength=size)
+        minutes = np.bincount(workout_ids, weights=self.columns['duration'][mask], minlength=size)
+        total = minutes.sum() or 1
+        order = np.argsort(-minutes, kind='stable')
+        return [(self.activities.get(int(i), f"Workout {i}"), int(sessions[i]), int(minutes[i]),
+                 float(minutes[i] / total))
+                for i in order if sessions[i]]
+
+    def rolling_load(self, user_id=None, windows=(7, 28), since=None, until=None):
+        """
+        Daily minutes and their trailing sums over each window in days, for one user or
+        everyone. Returns (days, {'daily': minutes, 7: load, 28: load}) with one entry per
+        calendar day from since (default the first log) to until (default the last log).
+        """
+        mask = self._mask(user_id, None, until)
+        days = self.columns['timestamp'][mask] // SECONDS_PER_DAY
+        if not len(days):
+            return [], {'daily': np.zeros(0, dtype='int64'), **{w: np.zeros(0, dtype='int64') for w in windows}}
+        first = int(days.min())
+        last = int(_epoch(until, end_of_day=True) // SECONDS_PER_DAY - 1) if until is not None else int(days.max())
+        daily = np.bincount(days - first, weights=self.columns['duration'][mask],
+                            minlength=last - first + 1).astype('int64')
+        cumulative = np.concatenate([[0], np.cumsum(daily)])
+        index = np.arange(1, len(daily) + 1)
+        loads = {'daily': daily}
+        for window in windows:
+            loads[window] = cumulative[index] - cumulative[np.maximum(index - window, 0)]
+        start = 0 if since is None else max(0, int(_epoch(since) // SECONDS_PER_DAY) - first)
+        day_list = [date(1970, 1, 1) + timedelta(days=first + i) for i in range(start, len(daily))]
+        return day_list, {name: values[start:] for name, values in loads.items()}
+
+    def hour_histogram(self, user_id=None, since=None, until=None):
+        """Sessions per hour of day, 0-23, as a 24-element array."""
+        mask = self._mask(user_id, since, until)
+        hours = (self.columns['timestamp'][mask] % SECONDS_PER_DAY) // 3600
+        return np.bincount(hours, minlength=24)
+
+def _epoch(value, end_of_day=False):
+    if isinstance(value, datetime):
+        return int((value - datetime(1970, 1, 1)).total_seconds())
+    seconds = (value - date(1970, 1, 1)).days * SECONDS_PER_DAY
+    return seconds + SECONDS_PER_DAY if end_of_day else seconds
+
+def _bucket_key(period, bucket):
+    if period == 'day':
+        return date(1970, 1, 1) + timedelta(days=bucket)
+    if period == 'week':
+        return period_key('week', date(1970, 1, 1) + timedelta(days=bucket * 7 - 3))
+    return f"{1970 + bucket // 12}-{bucket % 12 + 1:02d}"
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+def get_snapshot(refresh=True, cache_path=None, session=None):
+    """
+    Returns the process-wide snapshot, loading the cached .npz on first use and bringing
+    it up to date. The cache file is rewritten whenever the refresh added rows.
+    """
+    global _snapshot
+    cache_path = cache_path or default_cache_path()
+    with _snapshot_lock:
+        if _snapshot is None:
+            if cache_path and os.path.exists(cache_path):
+                try:
+                    _snapshot = LogSnapshot.load(cache_path)
+                except Exception as e:
+                    print(f"Ignoring unreadable analytics cache {cache_path}: {e}")
+            if _snapshot is None:
+                _snapshot = LogSnapshot()
+        snapshot = _snapshot
+    if refresh:
+        before = (len(snapshot), snapshot.max_log_id)
+        snapshot.refresh(session)
+        if cache_path and (len(snapshot), snapshot.max_log_id) != before:
+            snapshot.save(cache_path)
+    return snapshot
+
+def reset_snapshot():
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = None
+
+if __name__ == "__main__":
+    import time
+
+    started = time.perf_counter()
+    snapshot = get_snapshot()
+    print(f"Snapshot of {len(snapshot)} logs ready in {time.perf_counter() - started:.3f}s "
+          f"(cache: {default_cache_path()}).")
+    for label, report in (
+        ("minutes per user per week", lambda: snapshot.minutes_per_user('week')),
+        ("activity distribution", snapshot.activity_distribution),
+        ("rolling 7/28-day load", snapshot.rolling_load),
+        ("hour-of-day histogram", snapshot.hour_histogram),
+    ):
+        started = time.perf_counter()
+        report()
+        print(f"{label:<28}{(time.perf_counter() - started) * 1000:8.1f} ms")
+    for activity, sessions, minutes, share in snapshot.activity_distribution()[:5]:
+        print(f"- {activity}: {sessions} sessions, {minutes} minutes ({share:.0%})")
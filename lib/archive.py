@@ -0,0 +1,197 @@
+# lib/archive.py
+import argparse
+import os
+import threading
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import NamedTuple, Optional
+from sqlalchemy import (
+    MetaData, Table, Column, Integer, DateTime, Date, String, ForeignKey, Index,
+    select, insert, delete, func, union_all
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import aliased
+from lib.models.__init__ import helper_session, commit_or_flush
+from lib.models.user import User
+from lib.models.workout import Workout
+from lib.models.user_workout import UserWorkout
+from lib.models.log_archive import LogArchive
+from lib.instrumentation import instrumented
+
+# Hot/cold split of the workout log. Logs older than the horizon move, in batches, out of
+# user_workouts into one table per year (user_workouts_archive_2024, ...) in the same
+# database, so the hot table and its indexes stay the size of recent activity:
+#
+#     python -m lib.archive                      # logs older than ARCHIVE_HORIZON_DAYS
+#     python -m lib.archive --before 2025-01-01
+#     python -m lib.archive --status
+#
+# FITNESS_TRACKER_ARCHIVE_HORIZON_DAYS sets the default horizon (365 days).
+# Archived logs keep their ids (user_workouts ids are AUTOINCREMENT, so never reused) and
+# still count towards rollups, streaks and analytics. Readers go through log_arms or
+# log_source, which add only the archive years a date range reaches into. Notes search
+# is indexed over the hot table only; search_workout_notes(include_archived=True) also
+# scans the archive.
+ARCHIVE_HORIZON_DAYS = int(os.environ.get("FITNESS_TRACKER_ARCHIVE_HORIZON_DAYS", "365"))
+ARCHIVE_BATCH_SIZE = 5000
+ARCHIVE_TABLE_PREFIX = 'user_workouts_archive_'
+LOG_COLUMNS = ('id', 'user_id', 'workout_id', 'completion_date', 'completion_day', 'notes')
+
+# Kept off Base.metadata: create_all and Alembic leave the archive tables to this module.
+archive_metadata = MetaData()
+_archive_entities = {}
+_archive_lock = threading.Lock()
+
+class LogArm(NamedTuple):
+    entity: object  # UserWorkout, or an alias of it over one archive table
+    table: Table
+    floor: Optional[datetime]  # every log in the arms after this one completed before floor
+
+def archive_table(year):
+    """The archive table for one year's logs, laid out like user_workouts with the same indexes."""
+    name = f"{ARCHIVE_TABLE_PREFIX}{year}"
+    with _archive_lock:
+        table = archive_metadata.tables.get(name)
+        if table is None:
+            table = Table(
+                name, archive_metadata,
+                Column('id', Integer, primary_key=True, autoincrement=False),
+                Column('user_id', Integer, ForeignKey(User.__table__.c.id, ondelete='CASCADE')),
+                Column('workout_id', Integer, ForeignKey(Workout.__table__.c.id, ondelete='CASCADE')),
+                Column('completion_date', DateTime),
+                Column('completion_day', Date),
+                Column('notes', String),
+                Index(f'ix_{name}_user_id_completion_date', 'user_id', 'completion_date'),
+                Index(f'uq_{name}_user_id_workout_id_completion_day', 'user_id', 'workout_id', 'completion_day',
+                      unique=True),
+                Index(f'ix_{name}_workout_id_user_id_completion_date', 'workout_id', 'user_id', 'completion_date'),
+                Index(f'ix_{name}_completion_date', 'completion_date'),
+            )
+            # Loads archived rows as ordinary UserWorkout instances.
+            _archive_entities[year] = aliased(UserWorkout, table, adapt_on_names=True)
+        return table
+
+def archive_state(session):
+    """Returns (boundary, years): the hot/cold boundary, None before any archiving, and the archived years."""
+    rows = session.execute(select(LogArchive.year, LogArchive.archived_before)).all()
+    return max((row.archived_before for row in rows), default=None), sorted(row.year for row in rows)
+
+def log_arms(session, since=None, until=None):
+    """
+    The tables holding logs completed in [since, until) (datetimes): user_workouts first,
+    then each archive year the range reaches, newest first. Just user_workouts when the
+    range starts at or after the boundary.
+    """
+    boundary, years = archive_state(session)
+    arms = [LogArm(UserWorkout, UserWorkout.__table__, boundary)]
+    if boundary is None or (since is not None and since >= boundary):
+        return arms
+    for year in reversed(years):
+        if (since is not None and year < since.year) or (until is not None and until <= datetime(year, 1, 1)):
+            continue
+        table = archive_table(year)
+        arms.append(LogArm(_archive_entities[year], table, datetime(year, 1, 1)))
+    return arms
+
+def log_source(session, since=None, until=None):
+    """
+    What to select logs from for filters and aggregates: UserWorkout itself, or an alias of
+    it over a UNION ALL of log_arms when the range reaches the archive. SQLite pushes
+    WHERE clauses down into each arm, so every table still answers from its own indexes.
+    """
+    arms = log_arms(session, since, until)
+    if len(arms) == 1:
+        return UserWorkout
+    logs = union_all(*(
+        select(*(arm.table.c[name] for name in LOG_COLUMNS)) for arm in arms
+    )).subquery('all_user_workouts')
+    return aliased(UserWorkout, logs, adapt_on_names=True)
+
+def _register_year(session, year, before):
+    table = LogArchive.__table__
+    stmt = sqlite_insert(table).values(year=year, archived_before=before)
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.year],
+        set_={'archived_before': func.max(table.c.archived_before, stmt.excluded.archived_before)}
+    ))
+
+@instrumented
+def archive_workout_logs(before=None, batch_size=ARCHIVE_BATCH_SIZE, session=None):
+    """
+    Moves logs completed before `before` (default: midnight ARCHIVE_HORIZON_DAYS ago) from
+    user_workouts into their year's archive table, oldest first and batch_size per
+    transaction, so concurrent writers only ever wait for one batch. Rollups and streaks
+    are untouched, since no log is added or removed. Returns how many logs moved.
+    """
+    before = before or datetime.combine(date.today() - timedelta(days=ARCHIVE_HORIZON_DAYS), time.min)
+    hot = UserWorkout.__table__
+    moved = 0
+    with helper_session(session) as (session, owned):
+        try:
+            while True:
+                batch = session.execute(
+                    select(hot.c.id, hot.c.completion_date)
+                    .where(hot.c.completion_date < before)
+                    .order_by(hot.c.completion_date)
+                    .limit(batch_size)
+                ).all()
+                if not batch:
+                    break
+                ids_by_year = defaultdict(list)
+                for log_id, completion_date in batch:
+                    ids_by_year[completion_date.year].append(log_id)
+                for year, ids in ids_by_year.items():
+                    table = archive_table(year)
+                    table.create(session.connection(), checkfirst=True)
+                    # The boundary moves in the same transaction as the rows, so a reader
+                    # never finds a log in neither place.
+                    _register_year(session, year, before)
+                    session.execute(insert(table).from_select(
+                        LOG_COLUMNS, select(*(hot.c[name] for name in LOG_COLUMNS)).where(hot.c.id.in_(ids))
+                    ))
+                session.execute(delete(hot).where(hot.c.id.in_([log_id for log_id, _ in batch])))
+                commit_or_flush(session, owned)
+                moved += len(batch)
+            print(f"Archived {moved} workout log(s) completed before {before.strftime('%Y-%m-%d %H:%M')}.")
+            return moved
+        except Exception as e:
+            if not owned:
+                raise
+            session.rollback()
+            print(f"Error archiving workout logs: {e}")
+            return None
+
+@instrumented
+def get_archive_summary(session=None):
+    """Returns (boundary, {year: archived logs}); (None, {}) before any archiving."""
+    with helper_session(session) as (session, owned):
+        boundary, years = archive_state(session)
+        counts = {}
+        for year in years:
+            counts[year] = session.execute(select(func.count()).select_from(archive_table(year))).scalar()
+        return boundary, counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move old workout logs into per-year archive tables.")
+    horizon = parser.add_mutually_exclusive_group()
+    horizon.add_argument('--days', type=int, default=ARCHIVE_HORIZON_DAYS,
+                         help=f"archive logs older than this many days (default {ARCHIVE_HORIZON_DAYS})")
+    horizon.add_argument('--before', type=datetime.fromisoformat,
+                         help="archive logs completed before this date (YYYY-MM-DD[THH:MM])")
+    parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE, help="logs moved per transaction")
+    parser.add_argument('--status', action='store_true', help="show the boundary and archived logs per year")
+    args = parser.parse_args(argv)
+
+    if not args.status:
+        before = args.before or datetime.combine(date.today() - timedelta(days=args.days), time.min)
+        archive_workout_logs(before, args.batch_size)
+    boundary, counts = get_archive_summary()
+    if boundary is None:
+        print("Nothing archived yet.")
+        return
+    print(f"Hot/cold boundary: {boundary.strftime('%Y-%m-%d %H:%M')}")
+    for year, logs in counts.items():
+        print(f"  {year}: {logs} log(s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# lib/async_helpers.py
+import asyncio
+import concurrent.futures
+import functools
+import os
+import threading
+from itertools import islice
+
+import lib.helpers as helpers
+
+# Coroutine versions of every public helper in lib.helpers, for use from an event loop:
+#
+#   user = await async_helpers.find_user_by_id(1)
+#   async for log_entry in async_helpers.iter_user_workouts(1):
+#       ...
+#
+# Each call runs the ordinary helper on a worker thread, so it opens, commits and closes
+# its own session there; sessions and ORM state never cross threads. Reads share a
+# bounded pool (FITNESS_TRACKER_ASYNC_WORKERS, default 8); writes go through a single
+# writer thread, so two writes never contend for SQLite's lock and hit SQLITE_BUSY.
+ASYNC_WORKERS = int(os.environ.get("FITNESS_TRACKER_ASYNC_WORKERS", "8"))
+STREAM_QUEUE_BATCHES = 2
+
+# The public helpers mirrored here, by name. Everything else lib.helpers imports (rollup,
+# streak and archive internals that take a caller's session) stays out of the facade.
+READ_HELPERS = {
+    'find_user_by_id', 'find_user_by_name', 'get_all_users', 'iter_all_users', 'get_users_page',
+    'find_workout_by_id', 'get_all_workouts',
+    'get_user_workouts', 'count_user_workouts', 'iter_user_workouts', 'get_user_workouts_page',
+    'get_all_workout_logs', 'iter_all_workout_logs', 'get_workout_logs_page',
+    'get_workout_participants', 'get_workout_participants_page', 'count_workout_participants',
+    'search_users', 'search_workout_notes', 'get_top_users', 'get_top_workouts',
+    'get_user_streak', 'get_archive_summary',
+}
+WRITE_HELPERS = {
+    'create_user', 'update_user_email', 'delete_user',
+    'create_workout', 'update_workout_duration', 'delete_workout',
+    'log_user_workout', 'log_user_workouts_bulk', 'delete_user_workout_log', 'delete_workout_logs',
+    'archive_workout_logs',
+}
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+def _executor(kind):
+    with _executors_lock:
+        executor = _executors.get(kind)
+        if executor is None:
+            workers = 1 if kind == 'write' else ASYNC_WORKERS
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"fitness-tracker-{kind}")
+            _executors[kind] = executor
+        return executor
+
+def shutdown(wait=True):
+    """Stops the worker threads; they are started again on the next call."""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
+
+async def run_helper(fn, *args, write=False, **kwargs):
+    """Runs any blocking helper on the read pool, or on the writer thread if write=True."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _executor('write' if write else 'read'), functools.partial(fn, *args, **kwargs)
+    )
+
+def _mirror(name, fn):
+    write = name in WRITE_HELPERS
+
+    @functools.wraps(fn)
+    async def coroutine(*args, **kwargs):
+        return await run_helper(fn, *args, write=write, **kwargs)
+    return coroutine
+
+def _mirror_iterator(name, fn):
+    @functools.wraps(fn)
+    async def iterate(*args, **kwargs):
+        # The generator and the session it holds open stay on one read thread from start to
+        # finish: a single task drains it and hands whole batches over through a small queue,
+        # which blocks the thread while the consumer is behind.
+        batch_size = kwargs.get('batch_size', helpers.STREAM_BATCH_SIZE)
+        loop = asyncio.get_running_loop()
+        batches = asyncio.Queue(maxsize=STREAM_QUEUE_BATCHES)
+        stop = threading.Event()
+
+        def hand_over(batch):
+            future = asyncio.run_coroutine_threadsafe(batches.put(batch), loop)
+            while True:
+                try:
+                    return future.result(timeout=0.1)
+                except concurrent.futures.TimeoutError:
+                    if stop.is_set() or loop.is_closed():
+                        future.cancel()
+                        return
+
+        def drain():
+            try:
+                iterator = fn(*args, **kwargs)
+                try:
+                    while not stop.is_set():
+                        batch = list(islice(iterator, batch_size))
+                        if batch:
+                            hand_over(batch)
+                        if len(batch) < batch_size:
+                            return
+                finally:
+                    iterator.close()
+            finally:
+                if not stop.is_set():
+                    hand_over(None)
+
+        task = loop.run_in_executor(_executor('read'), drain)
+        try:
+            while True:
+                batch = await batches.get()
+                if batch is None:
+                    await task  # raises the helper's error, if it failed
+                    return
+                for item in batch:
+                    yield item
+        finally:
+            # An early exit stops the thread at its next batch and frees it if it is waiting.
+            stop.set()
+            while not batches.empty():
+                batches.get_nowait()
+    return iterate
+
+def _public_helpers():
+    for name in sorted(READ_HELPERS | WRITE_HELPERS):
+        yield name, getattr(helpers, name)
+
+__all__ = ['run_helper', 'shutdown', 'READ_HELPERS', 'WRITE_HELPERS']
+for _name, _fn in _public_helpers():
+    globals()[_name] = (_mirror_iterator if _name.startswith('iter_') else _mirror)(_name, _fn)
+    __all__.append(_name)
+
+async def _throughput_demo(calls=400, user_ids=50):
+    # Compares blocking helper calls on the loop with the facade, reporting throughput and
+    # the longest event-loop stall seen by a 1 ms heartbeat task running alongside.
+    import time
+
+    async def heartbeat(stop, stalls):
+        last = time.perf_counter()
+        while not stop.is_set():
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            stalls.append(now - last)
+            last = now
+
+    async def timed(label, run):
+        stop, stalls = asyncio.Event(), []
+        beat = asyncio.create_task(heartbeat(stop, stalls))
+        await asyncio.sleep(0)
+        started = time.perf_counter()
+        await run()
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await beat
+        print(f"{label:<34}{calls / elapsed:>10.0f} calls/s   max loop stall {max(stalls) * 1000:8.1f} ms")
+        return elapsed
+
+    async def on_the_loop():
+        for i in range(calls):
+            helpers.get_user_workouts(i % user_ids + 1)
+
+    async def one_at_a_time():
+        for i in range(calls):
+            await get_user_workouts(i % user_ids + 1)
+
+    async def concurrent():
+        await asyncio.gather(*(get_user_workouts(i % user_ids + 1) for i in range(calls)))
+
+    await get_user_workouts(1)  # start the pool
+    print(f"{calls} get_user_workouts reads, {ASYNC_WORKERS} reader threads, {os.cpu_count()} CPUs:")
+    baseline = await timed("blocking calls on the event loop", on_the_loop)
+    await timed("awaited one at a time", one_at_a_time)
+    gathered = await timed("awaited concurrently (gather)", concurrent)
+    print(f"Concurrent readers: {baseline / gathered:.2f}x the blocking throughput.")
+
+if __name__ == "__main__":
+    asyncio.run(_throughput_demo())
+    shutdown()
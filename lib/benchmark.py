@@ -0,0 +1,505 @@
+# lib/benchmark.py
+"""
+Times every public function in lib/helpers.py against synthetic datasets from lib/datagen.py.
+
+    python -m lib.benchmark --scales tiny,small --output bench_results.json
+    python -m lib.benchmark --compare old.json new.json
+    python -m lib.benchmark --row-modes --scales small
+    python -m lib.benchmark --startup --max-import-ms 100
+
+--startup times `import lib.cli` (from -X importtime) and the first query after it, in
+fresh processes. It fails when the CLI import pulls in any of STARTUP_FORBIDDEN_MODULES or
+goes over the given budgets, so it can guard lazy loading in CI.
+
+--row-modes compares each read helper's ORM results with its as_rows=True tuples:
+objects per second, and bytes per returned row still held once the call returns.
+
+Each scale's dataset is generated once into bench_data/ and copied before every run,
+so mutating helpers always start from the same rows. Each helper runs in its own
+process, which keeps its peak RSS separate from the others'.
+"""
+import argparse
+import contextlib
+import inspect
+import io
+import json
+import os
+import platform
+import random
+import resource
+import sqlite3
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable, NamedTuple, Optional
+
+BENCH_DATA_DIR = 'bench_data'
+DEFAULT_ITERATIONS = 200
+DEFAULT_MAX_SECONDS = 10.0
+
+# Modules that `import lib.cli` must leave for the first database access.
+STARTUP_FORBIDDEN_MODULES = ('sqlalchemy', 'lib.models')
+STARTUP_RUNS = 5
+
+class Spec(NamedTuple):
+    make_args: Callable  # (Context) -> tuple of positional arguments, built outside the timer
+    iterations: Optional[int] = None  # cap for calls that scan whole tables
+    consume: bool = False  # drain the returned iterator inside the timer
+
+class Context:
+    """Deterministic argument source for one helper's run."""
+
+    def __init__(self, name, seed):
+        from sqlalchemy import func, select
+        from lib.models.__init__ import get_engine
+        from lib.models.user import User
+        from lib.models.workout import Workout
+        from lib.models.user_workout import UserWorkout
+
+        self.rng = random.Random(f"{seed}:{name}")
+        self.engine = engine = get_engine()
+        with engine.connect() as connection:
+            self.max_user_id = connection.execute(select(func.max(User.id))).scalar() or 0
+            self.max_workout_id = connection.execute(select(func.max(Workout.id))).scalar() or 0
+            self.max_log_id = connection.execute(select(func.max(UserWorkout.id))).scalar() or 0
+        self._counter = 0
+        self._taken = set()
+
+    def user_id(self):
+        return self.rng.randint(1, self.max_user_id)
+
+    def workout_id(self):
+        return self.rng.randint(1, self.max_workout_id)
+
+    def log_id(self):
+        return self.rng.randint(1, self.max_log_id)
+
+    def take(self, kind, max_id):
+        # Like user_id() etc., but never hands out the same id twice, for helpers that delete it.
+        while True:
+            candidate = self.rng.randint(1, max_id)
+            if (kind, candidate) not in self._taken:
+                self._taken.add((kind, candidate))
+                return candidate
+
+    def unique(self, prefix):
+        self._counter += 1
+        return f"{prefix}{self._counter}-{self.rng.random():.12f}"
+
+    def completion_date(self):
+        return datetime(2025, 1, 1) + timedelta(minutes=self.rng.randrange(365 * 24 * 60))
+
+# Ordered reads first, then writes, then deletes, so every helper sees the dataset it was generated with.
+SPECS = {
+    'find_user_by_id': Spec(lambda c: (c.user_id(),)),
+    'find_workout_by_id': Spec(lambda c: (c.workout_id(),)),
+    'find_user_by_name': Spec(lambda c: (c.rng.choice(["Ali", "Smith", "rosa", "Kim"]),), iterations=20),
+    'search_users': Spec(lambda c: (c.rng.choice(["ali", "smith", "rosa", "kim"]),)),
+    'search_workout_notes': Spec(lambda c: (c.rng.choice(["great", "tired", "pers", "knee"]),)),
+    'get_user_streak': Spec(lambda c: (c.user_id(),)),
+    'get_all_users': Spec(lambda c: (), iterations=5),
+    'get_all_workouts': Spec(lambda c: ()),
+    'get_user_workouts': Spec(lambda c: (c.user_id(),)),
+    'count_user_workouts': Spec(lambda c: (c.user_id(),)),
+    'get_workout_participants': Spec(lambda c: (c.workout_id(),), iterations=10),
+    'get_workout_participants_page': Spec(lambda c: (c.workout_id(), 50, None)),
+    'count_workout_participants': Spec(lambda c: (c.workout_id(),)),
+    'get_all_workout_logs': Spec(lambda c: (), iterations=3),
+    'iter_all_users': Spec(lambda c: (), iterations=5, consume=True),
+    'iter_user_workouts': Spec(lambda c: (c.user_id(),), consume=True),
+    'iter_all_workout_logs': Spec(lambda c: (), iterations=3, consume=True),
+    'get_users_page': Spec(lambda c: (50, None)),
+    'get_user_workouts_page': Spec(lambda c: (c.user_id(), 50, None)),
+    'get_workout_logs_page': Spec(lambda c: (50, None)),
+    'get_archive_summary': Spec(lambda c: ()),
+    'get_top_users': Spec(lambda c: (
+        c.rng.choice(['week', 'month']), c.rng.choice(['minutes', 'sessions']), 10, c.completion_date().date()
+    )),
+    'get_top_workouts': Spec(lambda c: (c.rng.choice(['week', 'month']), 10, c.completion_date().date())),
+    'create_user': Spec(lambda c: ("Bench User", c.unique("create-") + "@example.com")),
+    'create_workout': Spec(lambda c: (c.unique("Bench Workout "), 30)),
+    'update_user_email': Spec(lambda c: (c.user_id(), c.unique("update-") + "@example.com")),
+    'update_workout_duration': Spec(lambda c: (c.workout_id(), c.rng.randint(10, 120)), iterations=20),
+    'log_user_workout': Spec(lambda c: (c.user_id(), c.workout_id(), c.completion_date(), None)),
+    'log_user_workouts_bulk': Spec(lambda c: ([
+        (c.user_id(), c.workout_id(), c.completion_date()) for _ in range(1000)
+    ],), iterations=20),
+    'archive_workout_logs': Spec(lambda c: (c.completion_date(),), iterations=5),
+    'delete_user_workout_log': Spec(lambda c: (c.take('log', c.max_log_id),)),
+    'delete_workout_logs': Spec(lambda c: (c.take('user', c.max_user_id), None, c.completion_date()), iterations=20),
+    'delete_user': Spec(lambda c: (c.take('user', c.max_user_id),), iterations=20),
+    'delete_workout': Spec(lambda c: (c.take('workout', c.max_workout_id),), iterations=5),
+}
+
+def public_helpers():
+    """Public functions defined in, or re-exported with a benchmark spec from, lib.helpers."""
+    import lib.helpers as helpers
+    names = []
+    for name, value in vars(helpers).items():
+        if name.startswith('_') or not inspect.isfunction(value):
+            continue
+        if value.__module__ == helpers.__name__ or name in SPECS:
+            names.append(name)
+    return sorted(names, key=lambda n: (list(SPECS).index(n) if n in SPECS else len(SPECS), n))
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def _peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak  # macOS reports bytes, Linux KiB
+
+def run_one(name, seed, iterations, max_seconds):
+    """Times one helper in this process and returns its result record."""
+    import lib.helpers as helpers
+
+    spec = SPECS.get(name)
+    if spec is None:
+        return {'skipped': 'no benchmark spec in lib/benchmark.py'}
+    fn = getattr(helpers, name)
+    context = Context(name, seed)
+    iterations = min(iterations, spec.iterations or iterations)
+
+    timings = []
+    budget_started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) as captured:
+        for _ in range(iterations):
+            args = spec.make_args(context)
+            started = time.perf_counter()
+            result = fn(*args)
+            if spec.consume:
+                for _ in result:
+                    pass
+            timings.append(time.perf_counter() - started)
+            captured.seek(0)
+            captured.truncate()
+            if time.perf_counter() - budget_started > max_seconds:
+                break
+
+    timings.sort()
+    total = sum(timings)
+    return {
+        'iterations': len(timings),
+        'ops_per_sec': len(timings) / total if total else None,
+        'mean_ms': total / len(timings) * 1000,
+        'p50_ms': _percentile(timings, 0.50) * 1000,
+        'p95_ms': _percentile(timings, 0.95) * 1000,
+        'p99_ms': _percentile(timings, 0.99) * 1000,
+        'peak_rss_kb': _peak_rss_kb(),
+    }
+
+def _sqlite_copy(source, destination):
+    for path in (destination, destination + '-wal', destination + '-shm'):
+        if os.path.exists(path):
+            os.remove(path)
+    with contextlib.closing(sqlite3.connect(source)) as src, \
+            contextlib.closing(sqlite3.connect(destination)) as dst:
+        src.backup(dst)
+
+def _env_for(path):
+    env = dict(os.environ)
+    env['FITNESS_TRACKER_DATABASE_URL'] = f"sqlite:///{os.path.abspath(path)}"
+    return env
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _schema_tag():
+    """Short hash of the models' DDL, so cached datasets are regenerated after a schema change."""
+    import hashlib
+    from sqlalchemy.dialects import sqlite
+    from sqlalchemy.schema import CreateIndex, CreateTable
+    import lib.helpers  # registers every model on Base.metadata
+    from lib.models.__init__ import Base
+
+    ddl = []
+    for table in Base.metadata.sorted_tables:
+        ddl.append(str(CreateTable(table).compile(dialect=sqlite.dialect())))
+        ddl.extend(str(CreateIndex(index).compile(dialect=sqlite.dialect()))
+                   for index in sorted(table.indexes, key=lambda index: index.name))
+    return hashlib.sha1('\n'.join(ddl).encode()).hexdigest()[:8]
+
+def _prepare_dataset(scale, seed):
+    """Returns (dataset, working copy path), generating the dataset on first use."""
+    os.makedirs(BENCH_DATA_DIR, exist_ok=True)
+    name = f"{scale}-seed{seed}-{_schema_tag()}"
+    dataset = os.path.join(BENCH_DATA_DIR, f"{name}.db")
+    working = os.path.join(BENCH_DATA_DIR, f"{name}.work.db")
+    if not os.path.exists(dataset):
+        subprocess.run([sys.executable, '-m', 'lib.datagen', '--scale', scale, '--seed', str(seed)],
+                       env=_env_for(dataset), check=True)
+    return dataset, working
+
+def _remove_working(working):
+    for leftover in (working, working + '.json', working + '-wal', working + '-shm'):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+
+def run_scale(scale, seed, names, iterations, max_seconds):
+    from lib.datagen import SCALES
+
+    dataset, working = _prepare_dataset(scale, seed)
+
+    results = {}
+    for name in names:
+        _sqlite_copy(dataset, working)
+        result_file = working + '.json'
+        completed = subprocess.run(
+            [sys.executable, '-m', 'lib.benchmark', '--run-one', name, '--seed', str(seed),
+             '--iterations', str(iterations), '--max-seconds', str(max_seconds),
+             '--result-file', result_file],
+            env=_env_for(working), capture_output=True, text=True
+        )
+        if completed.returncode == 0:
+            with open(result_file) as f:
+                results[name] = json.load(f)
+        else:
+            results[name] = {'error': completed.stderr.strip().splitlines()[-1:]}
+        _print_result(scale, name, results[name])
+    _remove_working(working)
+    return {'dataset': SCALES[scale], 'results': results}
+
+def _print_result(scale, name, result):
+    if 'ops_per_sec' in result:
+        print(f"[{scale}] {name:<26} {result['ops_per_sec']:>10.1f} ops/s  "
+              f"p50 {result['p50_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms  "
+              f"p99 {result['p99_ms']:>9.2f} ms  rss {result['peak_rss_kb'] / 1024:>7.1f} MiB")
+    else:
+        print(f"[{scale}] {name:<26} {result}")
+
+def row_mode_helpers():
+    """Helpers with an as_rows projection mode and a benchmark spec."""
+    import lib.helpers as helpers
+    return [name for name in public_helpers()
+            if name in SPECS and 'as_rows' in inspect.signature(getattr(helpers, name)).parameters]
+
+def _returned_items(result, consume):
+    if consume:
+        return list(result)
+    if isinstance(result, tuple):  # the *_page helpers return (items, next_cursor)
+        return result[0]
+    return result
+
+def run_row_modes(seed, iterations, max_seconds):
+    """Measures every row_mode_helpers() entry in both modes, in this process."""
+    import lib.helpers as helpers
+
+    results = {}
+    for name in row_mode_helpers():
+        spec = SPECS[name]
+        fn = getattr(helpers, name)
+        results[name] = {}
+        for mode, as_rows in (('orm', False), ('rows', True)):
+            context = Context(name, seed)  # same arguments for both modes
+            calls = min(iterations, spec.iterations or iterations)
+            objects = 0
+            elapsed = 0.0
+            retained = 0
+            with contextlib.redirect_stdout(io.StringIO()):
+                for call in range(calls):
+                    args = spec.make_args(context)
+                    # Time untraced; tracemalloc slows allocation-heavy code several times over.
+                    started = time.perf_counter()
+                    items = _returned_items(fn(*args, as_rows=as_rows), spec.consume)
+                    elapsed += time.perf_counter() - started
+                    objects += len(items)
+                    del items
+                    if call == 0:
+                        tracemalloc.start()
+                        items = _returned_items(fn(*args, as_rows=as_rows), spec.consume)
+                        retained = tracemalloc.get_traced_memory()[0]
+                        first_rows = len(items)
+                        tracemalloc.stop()
+                        del items
+                    if elapsed > max_seconds:
+                        break
+            results[name][mode] = {
+                'objects_per_sec': objects / elapsed if elapsed else None,
+                'bytes_per_row': retained / first_rows if first_rows else None,
+            }
+    return results
+
+def print_row_modes(scale, results):
+    print(f"[{scale}] {'helper':<26}{'ORM obj/s':>12}{'rows obj/s':>12}{'speedup':>9}"
+          f"{'ORM B/row':>11}{'rows B/row':>11}")
+    for name, modes in results.items():
+        orm, rows = modes['orm'], modes['rows']
+        speedup = rows['objects_per_sec'] / orm['objects_per_sec'] if orm['objects_per_sec'] else float('nan')
+        print(f"[{scale}] {name:<26}{orm['objects_per_sec'] or 0:>12.0f}{rows['objects_per_sec'] or 0:>12.0f}"
+              f"{speedup:>8.1f}x{orm['bytes_per_row'] or 0:>11.0f}{rows['bytes_per_row'] or 0:>11.0f}")
+
+def compare_row_modes(scale, seed, iterations, max_seconds):
+    dataset, working = _prepare_dataset(scale, seed)
+    _sqlite_copy(dataset, working)
+    result_file = working + '.json'
+    try:
+        subprocess.run(
+            [sys.executable, '-m', 'lib.benchmark', '--run-row-modes', '--seed', str(seed),
+             '--iterations', str(iterations), '--max-seconds', str(max_seconds), '--result-file', result_file],
+            env=_env_for(working), check=True
+        )
+        with open(result_file) as f:
+            results = json.load(f)
+    finally:
+        _remove_working(working)
+    print_row_modes(scale, results)
+    return results
+
+_FIRST_QUERY_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import lib.cli
+imported = time.perf_counter()
+lib.cli.helpers.find_user_by_id(1)
+queried = time.perf_counter()
+json.dump({'import_ms': (imported - started) * 1000, 'first_query_ms': (queried - imported) * 1000}, sys.stdout)
+"""
+
+def _importtime(env):
+    """Runs `import lib.cli` under -X importtime; returns (cumulative ms, imported module names)."""
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import lib.cli'],
+                               env=env, capture_output=True, text=True, check=True)
+    modules = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, _, cumulative, name = (part.strip() for part in line.replace('import time:', '|').split('|'))
+        modules[name] = int(cumulative) / 1000
+    return modules.get('lib.cli'), set(modules)
+
+def measure_startup(scale, seed, runs=STARTUP_RUNS):
+    dataset, working = _prepare_dataset(scale, seed)
+    _sqlite_copy(dataset, working)
+    env = _env_for(working)
+    try:
+        import_ms, first_query_ms, process_import_ms = [], [], []
+        imported = set()
+        for _ in range(runs):
+            cumulative, modules = _importtime(env)
+            import_ms.append(cumulative)
+            imported |= modules
+            completed = subprocess.run([sys.executable, '-c', _FIRST_QUERY_SCRIPT],
+                                       env=env, capture_output=True, text=True, check=True)
+            timings = json.loads(completed.stdout.strip().splitlines()[-1])
+            process_import_ms.append(timings['import_ms'])
+            first_query_ms.append(timings['first_query_ms'])
+    finally:
+        _remove_working(working)
+    return {
+        'import_ms': _percentile(sorted(import_ms), 0.5),
+        'wall_import_ms': _percentile(sorted(process_import_ms), 0.5),
+        'first_query_ms': _percentile(sorted(first_query_ms), 0.5),
+        'forbidden_imports': sorted(
+            name for name in imported
+            if any(name == f or name.startswith(f + '.') for f in STARTUP_FORBIDDEN_MODULES)
+        ),
+    }
+
+def check_startup(result, max_import_ms=None, max_first_query_ms=None):
+    """Prints the startup numbers and returns the list of failed guards."""
+    print(f"import lib.cli: {result['import_ms']:.1f} ms (-X importtime), "
+          f"{result['wall_import_ms']:.1f} ms wall; first query: {result['first_query_ms']:.1f} ms")
+    failures = []
+    if result['forbidden_imports']:
+        failures.append(f"import lib.cli loaded {', '.join(result['forbidden_imports'][:5])}")
+    if max_import_ms is not None and result['import_ms'] > max_import_ms:
+        failures.append(f"import took {result['import_ms']:.1f} ms, budget {max_import_ms} ms")
+    if max_first_query_ms is not None and result['first_query_ms'] > max_first_query_ms:
+        failures.append(f"first query took {result['first_query_ms']:.1f} ms, budget {max_first_query_ms} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return failures
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old['meta'].get('commit')} -> {new['meta'].get('commit')}")
+    for scale, new_scale in new['scales'].items():
+        old_results = old['scales'].get(scale, {}).get('results', {})
+        for name, result in new_scale['results'].items():
+            before = old_results.get(name, {})
+            if 'p50_ms' not in result or 'p50_ms' not in before:
+                continue
+            ratio = result['p50_ms'] / before['p50_ms'] if before['p50_ms'] else float('inf')
+            print(f"[{scale}] {name:<26} p50 {before['p50_ms']:>9.2f} -> {result['p50_ms']:>9.2f} ms "
+                  f"({ratio:.2f}x)")
+
+def main(argv=None):
+    from lib.datagen import SCALES
+
+    parser = argparse.ArgumentParser(description="Benchmark the lib/helpers.py API.")
+    parser.add_argument('--scales', default='tiny,small',
+                        help=f"comma-separated subset of {', '.join(SCALES)}")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', help="comma-separated helper names")
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument('--max-seconds', type=float, default=DEFAULT_MAX_SECONDS,
+                        help="time budget per helper; at least one call always runs")
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    parser.add_argument('--row-modes', action='store_true',
+                        help="compare ORM results with as_rows=True tuples instead of timing every helper")
+    parser.add_argument('--startup', action='store_true',
+                        help="time `import lib.cli` and the first query, and check lazy loading")
+    parser.add_argument('--max-import-ms', type=float, help="--startup budget for importing lib.cli")
+    parser.add_argument('--max-first-query-ms', type=float, help="--startup budget for the first query")
+    parser.add_argument('--run-one', help=argparse.SUPPRESS)
+    parser.add_argument('--run-row-modes', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    if args.run_row_modes:
+        with open(args.result_file, 'w') as f:
+            json.dump(run_row_modes(args.seed, args.iterations, args.max_seconds), f)
+        return
+    if args.startup:
+        result = measure_startup(args.scales.split(',')[0], args.seed)
+        if check_startup(result, args.max_import_ms, args.max_first_query_ms):
+            sys.exit(1)
+        return
+    if args.row_modes:
+        for scale in args.scales.split(','):
+            compare_row_modes(scale, args.seed, args.iterations, args.max_seconds)
+        return
+    if args.run_one:
+        result = run_one(args.run_one, args.seed, args.iterations, args.max_seconds)
+        with open(args.result_file, 'w') as f:
+            json.dump(result, f)
+        return
+
+    names = args.only.split(',') if args.only else public_helpers()
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'iterations': args.iterations,
+            'max_seconds': args.max_seconds,
+        },
+        'scales': {},
+    }
+    for scale in args.scales.split(','):
+        report['scales'][scale] = run_scale(scale, args.seed, names, args.iterations, args.max_seconds)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# lib/cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import NamedTuple, Optional
+from sqlalchemy import event
+from lib.models.__init__ import Session
+from lib.models.user import User
+from lib.models.workout import Workout
+
+# Cache settings come from the environment:
+#   FITNESS_TRACKER_CACHE_SIZE  entries kept per cache (default 1024, 0 disables caching)
+#   FITNESS_TRACKER_CACHE_TTL   seconds before an entry expires (default 30)
+#   FITNESS_TRACKER_LEADERBOARD_TTL  seconds a cached leaderboard is served (default 60)
+CACHE_SIZE = int(os.environ.get("FITNESS_TRACKER_CACHE_SIZE", "1024"))
+# Writes in this process invalidate their entries at once; the TTL bounds how long
+# another process's writes (the CLI, an import, a second service) can go unseen.
+CACHE_TTL = float(os.environ.get("FITNESS_TRACKER_CACHE_TTL", "30"))
+LEADERBOARD_TTL = float(os.environ.get("FITNESS_TRACKER_LEADERBOARD_TTL", "60"))
+
+MISSING = object()
+
+class UserSnapshot(NamedTuple):
+    id: int
+    name: str
+    email: str
+
+    @classmethod
+    def from_model(cls, user):
+        return cls(user.id, user.name, user.email)
+
+    def __repr__(self):
+        return f"<User(id={self.id}, name='{self.name}', email='{self.email}')>"
+
+class WorkoutSnapshot(NamedTuple):
+    id: int
+    activity: str
+    duration_minutes: int
+    timestamp: Optional[datetime]
+
+    @classmethod
+    def from_model(cls, workout):
+        return cls(workout.id, workout.activity, workout.duration_minutes, workout.timestamp)
+
+    def __repr__(self):
+        return (f"<Workout(id={self.id}, activity='{self.activity}', "
+                f"duration_minutes={self.duration_minutes})>")
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded LRU map with an optional per-entry TTL in seconds. Every
+    invalidation bumps a generation counter; put(..., generation=g) stores nothing once it
+    has moved past g, so a value read before a write can't be put back after it.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE, ttl=CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key, MISSING)
+            if entry is MISSING:
+                self.misses += 1
+                return MISSING
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def generation(self):
+        with self._lock:
+            return self._generation
+
+    def put(self, key, value, generation=None):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+user_cache = LRUCache()
+workout_cache = LRUCache()
+leaderboard_cache = LRUCache(ttl=LEADERBOARD_TTL)
+
+def cached_user(session, user_id, cacheable=True):
+    """
+    Returns a UserSnapshot (or None if there is no such user), reading through user_cache.
+    Misses aren't cached, so a user created elsewhere is found on the next lookup.
+    Pass cacheable=False inside a shared session, whose uncommitted state must not be cached.
+    """
+    snapshot = user_cache.get(user_id)
+    if snapshot is not MISSING:
+        return snapshot
+    generation = user_cache.generation()
+    user = session.query(User).filter_by(id=user_id).first()
+    if user is None:
+        return None
+    snapshot = UserSnapshot.from_model(user)
+    if cacheable:
+        user_cache.put(user_id, snapshot, generation)
+    return snapshot
+
+def cached_workout(session, workout_id, cacheable=True):
+    """Returns a WorkoutSnapshot (or None), reading through workout_cache; see cached_user."""
+    snapshot = workout_cache.get(workout_id)
+    if snapshot is not MISSING:
+        return snapshot
+    generation = workout_cache.generation()
+    workout = session.query(Workout).filter_by(id=workout_id).first()
+    if workout is None:
+        return None
+    snapshot = WorkoutSnapshot.from_model(workout)
+    if cacheable:
+        workout_cache.put(workout_id, snapshot, generation)
+    return snapshot
+
+def _invalidate_on_commit(session, cache, key):
+    # Dropping the entry now hides the change from this process right away; dropping it
+    # again once the transaction ends discards anything another thread re-read meanwhile.
+    cache.invalidate(key)
+    session.info.setdefault('cache_invalidations', set()).add((cache, key))
+
+def invalidate_user(session, user_id):
+    _invalidate_on_commit(session, user_cache, user_id)
+
+def invalidate_workout(session, workout_id):
+    _invalidate_on_commit(session, workout_cache, workout_id)
+
+def invalidate_leaderboards(session):
+    # Any log change can reorder any leaderboard, so they are all dropped, now and again
+    # once the transaction ends, as in _invalidate_on_commit.
+    leaderboard_cache.clear()
+    session.info['clear_leaderboards'] = True
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _apply_pending_invalidations(session):
+    for cache, key in session.info.pop('cache_invalidations', ()):
+        cache.invalidate(key)
+    if session.info.pop('clear_leaderboards', False):
+        leaderboard_cache.clear()
+
+def clear_caches():
+    user_cache.clear()
+    workout_cache.clear()
+    leaderboard_cache.clear()
+
+def cache_stats():
+    return {'users': user_cache.stats(), 'workouts': workout_cache.stats(), 'leaderboards': leaderboard_cache.stats()}
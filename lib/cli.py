@@ -1,20 +1,37 @@
+import importlib.util
 import sys
 from datetime import datetime
-from lib.helpers import (
-    create_user, get_all_users, find_user_by_id, find_user_by_name,
-    update_user_email, delete_user,
-    create_workout, get_all_workouts, find_workout_by_id,
-    update_workout_duration, delete_workout,
-    log_user_workout, get_user_workouts, get_workout_participants,
-    get_all_workout_logs, delete_user_workout_log
-)
+
+def lazy_import(name):
+    """
+    Returns the module without executing it; it loads on first attribute access.
+    lib.helpers pulls in SQLAlchemy, the mappers and the engine, none of which the
+    menus need, so they now load on the first action that touches the database.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+helpers = lazy_import('lib.helpers')
+instrumentation = lazy_import('lib.instrumentation')
+
+CLI_PAGE_SIZE = 20
 
 def display_main_menu():
     print("\n--- Fitness Tracker CLI ---")
     print("1. Manage Users")
     print("2. Manage Workouts")
     print("3. Manage Workout Logs")
-    print("4. Exit")
+    print("4. Reports")
+    print("5. Diagnostics")
+    print("6. Exit")
     print("--------------------------")
 
 def display_user_menu():
@@ -48,6 +65,24 @@ def display_log_menu():
     print("6. Back to Main Menu")
     print("------------------------------")
 
+def display_reports_menu():
+    print("\n--- Reports ---")
+    print("1. Most Active Users This Week")
+    print("2. Most Active Users This Month")
+    print("3. Most Popular Workouts This Week")
+    print("4. Most Popular Workouts This Month")
+    print("5. Back to Main Menu")
+    print("---------------")
+
+def display_diagnostics_menu():
+    print("\n--- Diagnostics ---")
+    print(f"SQL profiling is {'ON' if instrumentation.get_profile() else 'OFF'}")
+    print("1. Start SQL Profiling")
+    print("2. Show SQL per Helper Call")
+    print("3. Stop SQL Profiling")
+    print("4. Back to Main Menu")
+    print("-------------------")
+
 def get_user_input(prompt, type_func=str):
     while True:
         try:
@@ -55,6 +90,21 @@ def get_user_input(prompt, type_func=str):
         except ValueError:
             print("Invalid input. Please try again.")
 
+def show_paged(fetch_page, print_item, header, empty_message):
+    items, cursor = fetch_page(CLI_PAGE_SIZE, None)
+    if not items:
+        print(empty_message)
+        return
+    print(header)
+    while True:
+        for item in items:
+            print_item(item)
+        if not cursor:
+            return
+        if get_user_input("-- Press Enter for more, or 'q' to stop: ").lower() == 'q':
+            return
+        items, cursor = fetch_page(CLI_PAGE_SIZE, cursor)
+
 def handle_user_management():
     while True:
         display_user_menu()
@@ -63,25 +113,30 @@ def handle_user_management():
         if choice == 1:
             name = get_user_input("Enter user's name: ")
             email = get_user_input("Enter user's email: ")
-            create_user(name, email)
+            helpers.create_user(name, email)
         elif choice == 2:
-            users = get_all_users()
-            if users:
-                print("\n--- All Users ---")
-                for user in users:
-                    print(user)
-            else:
-                print("No users found.")
+            show_paged(
+                lambda limit, cursor: helpers.get_users_page(limit, cursor, as_rows=True),
+                print,
+                "\n--- All Users ---",
+                "No users found."
+            )
         elif choice == 3:
             user_id = get_user_input("Enter user ID: ", int)
-            user = find_user_by_id(user_id)
+            user = helpers.find_user_by_id(user_id)
             if user:
                 print(f"\nFound user: {user}")
+                current, longest, last_active_day = helpers.get_user_streak(user_id)
+                if last_active_day:
+                    print(f"Streak: {current} day(s) current, {longest} day(s) longest, "
+                          f"last active {last_active_day.strftime('%Y-%m-%d')}")
+                else:
+                    print("Streak: no workouts logged yet")
             else:
                 print(f"User with ID {user_id} not found.")
         elif choice == 4:
-            name = get_user_input("Enter user name (partial match): ")
-            users = find_user_by_name(name)
+            name = get_user_input("Enter user name or email (prefix match): ")
+            users = helpers.search_users(name)
             if users:
                 print(f"\n--- Users matching '{name}' ---")
                 for user in users:
@@ -91,11 +146,11 @@ def handle_user_management():
         elif choice == 5:
             user_id = get_user_input("Enter user ID to update email: ", int)
             new_email = get_user_input("Enter new email: ")
-            update_user_email(user_id, new_email)
+            helpers.update_user_email(user_id, new_email)
         elif choice == 6:
             user_id = get_user_input("Enter user ID to delete: ", int)
             if get_user_input("Are you sure you want to delete this user and all their workout logs? (yes/no): ").lower() == 'yes':
-                delete_user(user_id)
+                helpers.delete_user(user_id)
             else:
                 print("User deletion cancelled.")
         elif choice == 7:
@@ -111,9 +166,9 @@ def handle_workout_management():
         if choice == 1:
             activity = get_user_input("Enter workout activity name: ")
             duration = get_user_input("Enter default duration in minutes: ", int)
-            create_workout(activity, duration)
+            helpers.create_workout(activity, duration)
         elif choice == 2:
-            workouts = get_all_workouts()
+            workouts = helpers.get_all_workouts(as_rows=True)
             if workouts:
                 print("\n--- All Workout Types ---")
                 for workout in workouts:
@@ -122,7 +177,7 @@ def handle_workout_management():
                 print("No workout types found.")
         elif choice == 3:
             workout_id = get_user_input("Enter workout ID: ", int)
-            workout = find_workout_by_id(workout_id)
+            workout = helpers.find_workout_by_id(workout_id)
             if workout:
                 print(f"\nFound workout: {workout}")
             else:
@@ -130,11 +185,11 @@ def handle_workout_management():
         elif choice == 4:
             workout_id = get_user_input("Enter workout ID to update duration: ", int)
             new_duration = get_user_input("Enter new duration in minutes: ", int)
-            update_workout_duration(workout_id, new_duration)
+            helpers.update_workout_duration(workout_id, new_duration)
         elif choice == 5:
             workout_id = get_user_input("Enter workout ID to delete: ", int)
             if get_user_input("Are you sure you want to delete this workout type and all its logs? (yes/no): ").lower() == 'yes':
-                delete_workout(workout_id)
+                helpers.delete_workout(workout_id)
             else:
                 print("Workout deletion cancelled.")
         elif choice == 6:
@@ -160,37 +215,36 @@ def handle_workout_log_management():
                 except ValueError:
                     print("Invalid date format. Using today's date.")
 
-            log_user_workout(user_id, workout_id, completion_date, notes if notes else None)
+            helpers.log_user_workout(user_id, workout_id, completion_date, notes if notes else None)
         elif choice == 2:
-            all_logs = get_all_workout_logs()
-            if all_logs:
-                print("\n--- All Workout Logs ---")
-                for log_entry in all_logs:
-                    print(f"Log ID: {log_entry.id}, User: {log_entry.user.name}, Workout: {log_entry.workout.activity}, Date: {log_entry.completion_date.strftime('%Y-%m-%d %H:%M')}, Notes: {log_entry.notes or 'N/A'}")
-            else:
-                print("No workout logs found.")
+            show_paged(
+                lambda limit, cursor: helpers.get_workout_logs_page(limit, cursor, as_rows=True),
+                lambda log_entry: print(f"Log ID: {log_entry.id}, User: {log_entry.user_name}, Workout: {log_entry.activity}, Date: {log_entry.completion_date.strftime('%Y-%m-%d %H:%M')}, Notes: {log_entry.notes or 'N/A'}"),
+                "\n--- All Workout Logs ---",
+                "No workout logs found."
+            )
         elif choice == 3:
             user_id = get_user_input("Enter user ID to view workouts: ", int)
-            user_workouts = get_user_workouts(user_id)
-            if user_workouts:
-                print(f"\n--- Workouts for User ID {user_id} ---")
-                for uw_log in user_workouts:
-                    print(f"- {uw_log.workout.activity} on {uw_log.completion_date.strftime('%Y-%m-%d %H:%M')}, Notes: {uw_log.notes or 'N/A'}")
-            else:
-                print(f"No workout logs found for user ID {user_id}.")
+            show_paged(
+                lambda limit, cursor: helpers.get_user_workouts_page(user_id, limit, cursor, as_rows=True),
+                lambda uw_log: print(f"- {uw_log.activity} on {uw_log.completion_date.strftime('%Y-%m-%d %H:%M')}, Notes: {uw_log.notes or 'N/A'}"),
+                f"\n--- Workouts for User ID {user_id} ---",
+                f"No workout logs found for user ID {user_id}."
+            )
         elif choice == 4:
             workout_id = get_user_input("Enter workout ID to view participants: ", int)
-            participants = get_workout_participants(workout_id)
-            if participants:
-                print(f"\n--- Participants for Workout ID {workout_id} ---")
-                for p in participants:
-                    print(f"- {p.name}")
-            else:
-                print(f"No participants found for workout ID {workout_id}.")
+            show_paged(
+                lambda limit, cursor: helpers.get_workout_participants_page(workout_id, limit, cursor),
+                lambda p: print(f"- {p.name}: {p.sessions} session(s), last on "
+                                f"{p.last_completed.strftime('%Y-%m-%d') if p.last_completed else 'N/A'}"),
+                f"\n--- Participants for Workout ID {workout_id} "
+                f"({helpers.count_workout_participants(workout_id)} users) ---",
+                f"No participants found for workout ID {workout_id}."
+            )
         elif choice == 5:
             log_id = get_user_input("Enter workout log ID to delete: ", int)
             if get_user_input("Are you sure you want to delete this specific workout log? (yes/no): ").lower() == 'yes':
-                delete_user_workout_log(log_id)
+                helpers.delete_user_workout_log(log_id)
             else:
                 print("Workout log deletion cancelled.")
         elif choice == 6:
@@ -198,6 +252,67 @@ def handle_workout_log_management():
         else:
             print("Invalid choice. Please try again.")
 
+def show_top_users(window):
+    metric = 'sessions' if get_user_input("Rank by (1) minutes or (2) sessions: ") == '2' else 'minutes'
+    ranks = helpers.get_top_users(window, metric)
+    if not ranks:
+        print(f"No workouts logged in the last {window}.")
+        return
+    print(f"\n--- Most Active Users This {window.title()} (by {metric}) ---")
+    for entry in ranks:
+        print(f"{entry.rank}. {entry.name}: {entry.minutes} minute(s) in {entry.sessions} session(s)")
+
+def show_top_workouts(window):
+    ranks = helpers.get_top_workouts(window)
+    if not ranks:
+        print(f"No workouts logged in the last {window}.")
+        return
+    print(f"\n--- Most Popular Workouts This {window.title()} ---")
+    for entry in ranks:
+        print(f"{entry.rank}. {entry.activity}: {entry.participants} participant(s), {entry.sessions} session(s)")
+
+def handle_reports():
+    while True:
+        display_reports_menu()
+        choice = get_user_input("Enter your choice: ", int)
+
+        if choice == 1:
+            show_top_users('week')
+        elif choice == 2:
+            show_top_users('month')
+        elif choice == 3:
+            show_top_workouts('week')
+        elif choice == 4:
+            show_top_workouts('month')
+        elif choice == 5:
+            break
+        else:
+            print("Invalid choice. Please try again.")
+
+def handle_diagnostics():
+    while True:
+        display_diagnostics_menu()
+        choice = get_user_input("Enter your choice: ", int)
+
+        if choice == 1:
+            instrumentation.start_profiling()
+            print("Recording statements, time and rows for every helper call.")
+        elif choice == 2:
+            profile = instrumentation.get_profile()
+            if profile:
+                profile.print_summary()
+            else:
+                print("SQL profiling is off. Start it first, then use the other menus.")
+        elif choice == 3:
+            profile = instrumentation.stop_profiling()
+            if profile:
+                profile.print_summary()
+            print("SQL profiling stopped.")
+        elif choice == 4:
+            break
+        else:
+            print("Invalid choice. Please try again.")
+
 def cli():
     while True:
         display_main_menu()
@@ -210,10 +325,14 @@ def cli():
         elif choice == 3:
             handle_workout_log_management()
         elif choice == 4:
+            handle_reports()
+        elif choice == 5:
+            handle_diagnostics()
+        elif choice == 6:
             print("Exiting Fitness Tracker. Goodbye!")
             sys.exit()
         else:
-            print("Invalid choice. Please enter a number between 1 and 4.")
+            print("Invalid choice. Please enter a number between 1 and 6.")
 
 if __name__ == "__main__":
     cli()
\ No newline at end of file
@@ -0,0 +1,191 @@
+# lib/datagen.py
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from lib.models.__init__ import get_engine, Base, DATABASE_URL
+from lib.models.user import User
+from lib.models.workout import Workout
+from lib.models.user_workout import UserWorkout
+from lib.models.activity_rollup import UserDailyActivity, UserWeeklyActivity, UserMonthlyActivity
+from lib.models.user_streak import UserStreak
+from lib.models.log_archive import LogArchive
+from lib.search import install_search_index, drop_search_triggers
+from lib.rollups import rebuild_rollups
+from lib.streaks import rebuild_streaks
+from lib.cache import clear_caches
+
+# Named dataset sizes for benchmarking. Generate into a scratch database by pointing
+# FITNESS_TRACKER_DATABASE_URL at it, e.g.
+#   FITNESS_TRACKER_DATABASE_URL=sqlite:///bench_small.db python -m lib.datagen --scale small
+SCALES = {
+    'tiny': {'users': 100, 'workouts': 20, 'logs': 2_000},
+    'small': {'users': 1_000, 'workouts': 50, 'logs': 50_000},
+    'medium': {'users': 10_000, 'workouts': 200, 'logs': 1_000_000},
+    'large': {'users': 100_000, 'workouts': 1_000, 'logs': 50_000_000},
+}
+
+INSERT_CHUNK_SIZE = 10_000
+
+FIRST_NAMES = ["Alice", "Bob", "Charlie", "Diana", "Eve", "Frank", "Grace", "Hassan", "Ines", "Jamal",
+               "Kenji", "Lena", "Marta", "Nikhil", "Olga", "Pablo", "Quinn", "Rosa", "Sven", "Tariq"]
+LAST_NAMES = ["Smith", "Garcia", "Nguyen", "Okafor", "Kowalski", "Rossi", "Tanaka", "Haddad",
+              "Johansson", "Silva", "Murphy", "Novak", "Schmidt", "Dubois", "Kim", "Patel"]
+ACTIVITIES = [("Morning Run", 30), ("Weightlifting (Upper)", 60), ("Yoga Flow", 45),
+              ("Cycling (Outdoor)", 90), ("HIIT Training", 25), ("Swimming Laps", 40),
+              ("Weightlifting (Lower)", 75), ("Meditation", 15), ("Rowing", 35), ("Pilates", 50),
+              ("Climbing", 120), ("Spin Class", 45), ("Hiking", 150), ("Boxing", 60)]
+NOTES = ["Felt great!", "A bit tired today.", "Pushed hard!", "New personal best",
+         "Easy recovery session", "Knee felt sore", "Trained with a friend", "Short on time"]
+
+def _workout_rows(rng, count):
+    rows = []
+    for i in range(count):
+        activity, duration = ACTIVITIES[i % len(ACTIVITIES)]
+        variant = i // len(ACTIVITIES)
+        rows.append({
+            'id': i + 1,
+            'activity': activity if variant == 0 else f"{activity} #{variant + 1}",
+            'duration_minutes': max(5, int(rng.gauss(duration, duration * 0.15))),
+        })
+    return rows
+
+def _user_rows(rng, count):
+    return [
+        {
+            'id': i + 1,
+            'name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            'email': f"user{i + 1}@example.com",
+        }
+        for i in range(count)
+    ]
+
+def _logs_per_user(rng, users, logs, max_per_user):
+    # Pareto-distributed appetite: a minority of users produces most of the logs.
+    # Users hitting max_per_user hand their excess back to the others, so the total holds.
+    weights = [rng.paretovariate(1.16) for _ in range(users)]
+    counts = [0] * users
+    remaining = min(logs, users * max_per_user)
+    open_users = set(range(users))
+    while remaining > 0 and open_users:
+        total = sum(weights[i] for i in open_users)
+        handed_out = 0
+        for i in list(open_users):
+            share = min(max_per_user - counts[i], max(1, int(remaining * weights[i] / total)))
+            share = min(share, remaining - handed_out)
+            counts[i] += share
+            handed_out += share
+            if counts[i] >= max_per_user:
+                open_users.discard(i)
+            if handed_out >= remaining:
+                break
+        remaining -= handed_out
+    return counts
+
+def _completion_time(rng, end, days):
+    # Triangular with its mode at `end`: recent days are busier than old ones (a growing
+    # user base), and sessions cluster around a morning and an evening peak.
+    days_ago = int(rng.triangular(0, days, 0))
+    hour = rng.gauss(7, 1.5) if rng.random() < 0.55 else rng.gauss(18.5, 2)
+    minute_of_day = min(max(int(hour * 60), 0), 24 * 60 - 1)
+    day = end - timedelta(days=days_ago)
+    return day.replace(hour=minute_of_day // 60, minute=minute_of_day % 60,
+                       second=rng.randrange(60), microsecond=0)
+
+def _iter_log_rows(rng, users, workouts, logs, days, end):
+    # Zipf-like popularity over a shuffled activity order.
+    workout_ids = list(range(1, workouts + 1))
+    rng.shuffle(workout_ids)
+    workout_weights = [1 / (rank + 1) ** 1.1 for rank in range(workouts)]
+    counts = _logs_per_user(rng, users, logs, max_per_user=days * 3)
+
+    for user_id, count in enumerate(counts, start=1):
+        seen = set()
+        picks = rng.choices(workout_ids, workout_weights, k=count)
+        for workout_id in picks:
+            # One log per user, workout and day, the same rule log_user_workout enforces.
+            for _ in range(20):
+                completion_date = _completion_time(rng, end, days)
+                key = (workout_id, completion_date.date())
+                if key not in seen:
+                    seen.add(key)
+                    yield {
+                        'user_id': user_id,
+                        'workout_id': workout_id,
+                        'completion_date': completion_date,
+                        'notes': rng.choice(NOTES) if rng.random() < 0.15 else None,
+                    }
+                    break
+
+def insert_chunked(connection, table, rows, chunk_size=INSERT_CHUNK_SIZE):
+    """executemany()s rows from any iterable in chunks, so a generator is never materialized."""
+    inserted = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            connection.execute(table.insert(), chunk)
+            inserted += len(chunk)
+            chunk = []
+    if chunk:
+        connection.execute(table.insert(), chunk)
+        inserted += len(chunk)
+    return inserted
+
+def generate_dataset(scale='small', users=None, workouts=None, logs=None, seed=42, days=365, end=None):
+    """
+    Replaces the contents of the configured database with a synthetic dataset.
+    The same scale, seed and end date always produce the same rows.
+    """
+    sizes = dict(SCALES[scale])
+    sizes.update({k: v for k, v in (('users', users), ('workouts', workouts), ('logs', logs)) if v is not None})
+    rng = random.Random(seed)
+    end = end or datetime(2026, 1, 1)
+    started = time.perf_counter()
+
+    engine = get_engine()
+    Base.metadata.create_all(engine)
+    log_table = UserWorkout.__table__
+    with engine.begin() as connection:
+        # Load without secondary indexes or FTS triggers, then build them once at the end.
+        drop_search_triggers(connection)
+        for index in log_table.indexes:
+            index.drop(connection, checkfirst=True)
+        for model in (LogArchive, UserStreak, UserDailyActivity, UserWeeklyActivity, UserMonthlyActivity, UserWorkout, Workout, User):
+            connection.execute(model.__table__.delete())
+
+        connection.execute(Workout.__table__.insert(), _workout_rows(rng, sizes['workouts']))
+        insert_chunked(connection, User.__table__, _user_rows(rng, sizes['users']))
+        inserted = insert_chunked(
+            connection, log_table,
+            _iter_log_rows(rng, sizes['users'], sizes['workouts'], sizes['logs'], days, end)
+        )
+
+        for index in log_table.indexes:
+            index.create(connection)
+        install_search_index(connection)
+        connection.exec_driver_sql("ANALYZE")
+
+    rebuild_rollups()
+    rebuild_streaks()
+    clear_caches()
+    elapsed = time.perf_counter() - started
+    print(f"Generated {sizes['users']} users, {sizes['workouts']} workouts and {inserted} logs "
+          f"(seed {seed}) in {elapsed:.1f}s.")
+    return {'users': sizes['users'], 'workouts': sizes['workouts'], 'logs': inserted}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=f"Fill {DATABASE_URL} with a synthetic dataset (set FITNESS_TRACKER_DATABASE_URL to choose the file)."
+    )
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--users', type=int)
+    parser.add_argument('--workouts', type=int)
+    parser.add_argument('--logs', type=int)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--days', type=int, default=365)
+    args = parser.parse_args(argv)
+    generate_dataset(args.scale, args.users, args.workouts, args.logs, args.seed, args.days)
+
+if __name__ == "__main__":
+    main()
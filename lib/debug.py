@@ -1,4 +1,4 @@
-from lib.models.__init__ import Session, engine
+from lib.models.__init__ import Session, get_engine, get_sqlite_pragmas
 from lib.models.user import User
 from lib.models.workout import Workout
 from lib.models.user_workout import UserWorkout
@@ -10,6 +10,8 @@ from lib.helpers import (
     update_user_email, delete_user, update_workout_duration, delete_workout
 )
 from lib.seed import seed_database
+from lib.cache import cache_stats
+from lib.instrumentation import start_profiling, stop_profiling
 from datetime import datetime
 from sqlalchemy.orm import joinedload
 
@@ -20,6 +22,10 @@ def debug_cli():
 
     session = Session()
 
+    print(f"\n--- Engine: {get_engine().url} ---")
+    for name, value in get_sqlite_pragmas().items():
+        print(f"PRAGMA {name} = {value}")
+
     print("\n--- Debugging Session Started ---")
     print("Session object available as 'session'. Models: User, Workout, UserWorkout.")
     print("Helper functions are also imported directly (e.g., create_user, get_all_users).")
@@ -35,6 +41,8 @@ def debug_cli():
     for workout in workouts:
         print(workout)
 
+    helper_profile = start_profiling()
+
     print("\n--- Creating a test user via helper ---")
     test_user_email = f"debug_user_{datetime.now().strftime('%H%M%S')}@gmail.com"
     new_test_user = create_user("Debug User", test_user_email)
@@ -79,11 +87,19 @@ def debug_cli():
     else:
         print("No participants found for Morning Run.")
 
+    stop_profiling()
+    print("\n--- SQL per helper call ---")
+    helper_profile.print_summary()
+
     print("\n--- Direct Session Query Example: Find first user ---")
     first_user = session.query(User).first()
     if first_user:
         print(f"First user by direct query: {first_user.name}")
 
+    print("\n--- Lookup cache stats ---")
+    for name, stats in cache_stats().items():
+        print(f"{name}: {stats}")
+
     session.close()
     print("\n--- Debugging Session Finished ---")
 
@@ -1,309 +1,792 @@
 # lib/helpers.py
-from sqlalchemy.orm import sessionmaker, joinedload
-from lib.models.__init__ import engine, Session
+from sqlalchemy import select, update, delete, case, func, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import selectinload, contains_eager
+from lib.models.__init__ import session_scope, helper_session, commit_or_flush
 from lib.models.user import User
 from lib.models.workout import Workout
 from lib.models.user_workout import UserWorkout
-from datetime import datetime, timedelta
+from lib.instrumentation import instrumented
+from lib.cache import cached_user, cached_workout, invalidate_user, invalidate_workout
+from lib.search import search_users, search_workout_notes
+from lib.archive import log_arms, log_source, archive_workout_logs, get_archive_summary
+from lib.leaderboards import get_top_users, get_top_workouts
+from lib.rollups import (
+    apply_rollup_deltas, rollup_log_added, rollup_log_removed, rollup_logs_removed,
+    rollup_workout_removed, rollup_workout_duration_changed, rollup_user_removed
+)
+from lib.rows import (
+    UserRow, WorkoutRow, LogRow, ParticipantRow, user_rows_select, workout_rows_select, log_rows_select,
+    participant_rows_select, fetch_rows, iter_rows
+)
+from lib.streaks import (
+    streak_log_added, streak_logs_added, recompute_user_streaks, streak_user_removed, get_user_streak
+)
+from datetime import date, datetime, time, timedelta
+from collections import defaultdict
+from itertools import islice
+import base64
+import heapq
+import json
 import random
 
-def create_user(name, email):
-    session = Session()
-    try:
-        new_user = User(name=name, email=email)
-        session.add(new_user)
-        session.commit()
-        _ = new_user.id
-        _ = new_user.name
-        _ = new_user.email
-        print(f"User created: {new_user}")
-        return new_user
-    except Exception as e:
-        session.rollback()
-        print(f"Error creating user: {e}")
-        return None
-    finally:
-        if session.is_active:
-            session.close()
+BULK_CHUNK_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+# What log_user_workout does when the user already logged the workout that day.
+LOG_CONFLICT_POLICIES = ('skip', 'merge')
+NOTES_SEPARATOR = '; '
+
+LOG_ORDERS = ('desc', 'asc')
+LOG_DAY_KEY = [UserWorkout.user_id, UserWorkout.workout_id, UserWorkout.completion_day]
+
+# Every helper takes an optional session. Without one (and outside session_scope())
+# it runs in its own session and commits, as before; inside a shared session it only
+# flushes and lets errors propagate so the whole unit of work rolls back.
+
+@instrumented
+def create_user(name, email, session=None):
+    with helper_session(session) as (session, owned):
+        try:
+            new_user = User(name=name, email=email)
+            session.add(new_user)
+            commit_or_flush(session, owned)
+            invalidate_user(session, new_user.id)
+            _ = new_user.id
+            _ = new_user.name
+            _ = new_user.email
+            print(f"User created: {new_user}")
+            return new_user
+        except Exception as e:
+            if not owned:
+                raise
+            session.rollback()
+            print(f"Error creating user: {e}")
+            return None
 
-def get_all_users():
-    session = Session()
-    try:
+@instrumented
+def get_all_users(as_rows=False, session=None):
+    with helper_session(session) as (session, owned):
+        if as_rows:
+            return fetch_rows(session, user_rows_select().order_by(User.id), UserRow)
         users = session.query(User).all()
         for user in users:
-            _ = user.id 
-        return users
-    finally:
-        if session.is_active:
-            session.close()
-
-def find_user_by_id(user_id):
-    session = Session()
-    try:
-        user = session.query(User).filter_by(id=user_id).first()
-        if user:
             _ = user.id
-        return user
-    finally:
-        if session.is_active:
-            session.close()
+        return users
 
-def find_user_by_name(name):
-    session = Session()
-    try:
+@instrumented
+def find_user_by_id(user_id, session=None):
+    # Returns an immutable UserSnapshot served from lib.cache when possible.
+    with helper_session(session) as (session, owned):
+        return cached_user(session, user_id, cacheable=owned)
+
+@instrumented
+def find_user_by_name(name, as_rows=False, session=None):
+    with helper_session(session) as (session, owned):
+        if as_rows:
+            return fetch_rows(session, user_rows_select().where(User.name.ilike(f'%{name}%')), UserRow)
         users = session.query(User).filter(User.name.ilike(f'%{name}%')).all()
         for user in users:
             _ = user.id
         return users
-    finally:
-        if session.is_active:
-            session.close()
 
-def update_user_email(user_id, new_email):
-    session = Session()
-    try:
-        user = session.query(User).filter_by(id=user_id).first()
-        if user:
-            user.email = new_email
-            session.commit()
-            _ = user.id
-            _ = user.email
-            print(f"User {user.name} email updated to {new_email}")
-            return user
-        print(f"User with ID {user_id} not found.")
-        return None
-    except Exception as e:
-        session.rollback()
-        print(f"Error updating user email: {e}")
-        return None
-    finally:
-        if session.is_active:
-            session.close()
+@instrumented
+def update_user_email(user_id, new_email, session=None):
+    with helper_session(session) as (session, owned):
+        try:
+            user = session.query(User).filter_by(id=user_id).first()
+            if user:
+                user.email = new_email
+                invalidate_user(session, user_id)
+                commit_or_flush(session, owned)
+                _ = user.id
+                _ = user.email
+                print(f"User {user.name} email updated to {new_email}")
+                return user
+            print(f"User with ID {user_id} not found.")
+            return None
+        except Exception as e:
+            if not owned:
+                raise
+            session.rollback()
+            print(f"Error updating user email: {e}")
+            return None
 
-def delete_user(user_id):
-    session = Session()
-    try:
-        user = session.query(User).filter_by(id=user_id).first()
-        if user:
-            user_name = user.name
-            session.delete(user)
-            session.commit()
-            print(f"User {user_name} (ID: {user_id}) and associated workouts deleted.")
-            return True
-        print(f"User with ID {user_id} not found.")
-        return False
-    except Exception as e:
-        session.rollback()
-        print(f"Error deleting user: {e}")
-        return False
-    finally:
-        if session.is_active:
-            session.close()
-
-def create_workout(activity, duration_minutes):
-    session = Session()
-    try:
-        new_workout = Workout(activity=activity, duration_minutes=duration_minutes)
-        session.add(new_workout)
-        session.commit()
-        _ = new_workout.id
-        _ = new_workout.activity
-        print(f"Workout created: {new_workout}")
-        return new_workout
-    except Exception as e:
-        session.rollback()
-        print(f"Error creating workout: {e}")
-        return None
-    finally:
-        if session.is_active:
-            session.close()
+@instrumented
+def delete_user(user_id, session=None):
+    with helper_session(session) as (session, owned):
+        try:
+            user = session.query(User).filter_by(id=user_id).first()
+            if user:
+                user_name = user.name
+                rollup_user_removed(session, user_id)
+                streak_user_removed(session, user_id)
+                invalidate_user(session, user_id)
+                session.delete(user)
+                commit_or_flush(session, owned)
+                print(f"User {user_name} (ID: {user_id}) and associated workouts deleted.")
+                return True
+            print(f"User with ID {user_id} not found.")
+            return False
+        except Exception as e:
+            if not owned:
+                raise
+            session.rollback()
+            print(f"Error deleting user: {e}")
+            return False
+
+@instrumented
+def create_workout(activity, duration_minutes, session=None):
+    with helper_session(session) as (session, owned):
+        try:
+            new_workout = Workout(activity=activity, duration_minutes=duration_minutes)
+            session.add(new_workout)
+            commit_or_flush(session, owned)
+            invalidate_workout(session, new_workout.id)
+            _ = new_workout.id
+            _ = new_workout.activity
+            print(f"Workout created: {new_workout}")
+            return new_workout
+        except Exception as e:
+            if not owned:
+                raise
+            session.rollback()
+            print(f"Error creating workout: {e}")
+            return None
 
-def get_all_workouts():
-    session = Session()
-    try:
+@instrumented
+def get_all_workouts(as_rows=False, session=None):
+    with helper_session(session) as (session, owned):
+        if as_rows:
+            return fetch_rows(session, workout_rows_select().order_by(Workout.id), WorkoutRow)
         workouts = session.query(Workout).all()
         for workout in workouts:
             _ = workout.id
         return workouts
-    finally:
-        if session.is_active:
-            session.close()
-
-def find_workout_by_id(workout_id):
-    session = Session()
-    try:
-        workout = session.query(Workout).filter_by(id=workout_id).first()
-        if workout:
-            _ = workout.id
-        return workout
-    finally:
-        if session.is_active:
-            session.close()
 
-def update_workout_duration(workout_id, new_duration):
-    session = Session()
-    try:
-        workout = session.query(Workout).filter_by(id=workout_id).first()
-        if workout:
-            workout.duration_minutes = new_duration
-            session.commit()
-            _ = workout.id
-            _ = workout.duration_minutes
-            print(f"Workout '{workout.activity}' duration updated to {new_duration} minutes.")
-            return workout
-        print(f"Workout with ID {workout_id} not found.")
-        return None
-    except Exception as e:
-        session.rollback()
-        print(f"Error updating workout duration: {e}")
-        return None
-    finally:
-        if session.is_active:
-            session.close()
-
-def delete_workout(workout_id):
-    session = Session()
-    try:
-        workout = session.query(Workout).filter_by(id=workout_id).first()
-        if workout:
-            workout_activity = workout.activity
-            session.delete(workout)
-            session.commit()
-            print(f"Workout '{workout_activity}' (ID: {workout_id}) and its associations deleted.")
-            return True
-        print(f"Workout with ID {workout_id} not found.")
-        return False
-    except Exception as e:
-        session.rollback()
-        print(f"Error deleting workout: {e}")
-        return False
-    finally:
-        if session.is_active:
-            session.close()
-
-def log_user_workout(user_id, workout_id, completion_date=None, notes=None):
-    session = Session()
-    return_instance = None
-    try:
-        user = session.query(User).filter_by(id=user_id).first()
-        workout = session.query(Workout).filter_by(id=workout_id).first()
-
-        if not user:
-            print(f"User with ID {user_id} not found.")
-            return None
-        if not workout:
+@instrumented
+def find_workout_by_id(workout_id, session=None):
+    # Returns an immutable WorkoutSnapshot served from lib.cache when possible.
+    with helper_session(session) as (session, owned):
+        return cached_workout(session, workout_id, cacheable=owned)
+
+@instrumented
+def update_workout_duration(workout_id, new_duration, session=None):
+    with helper_session(session) as (session, owned):
+        try:
+            workout = session.query(Workout).filter_by(id=workout_id).first()
+            if workout:
+                rollup_workout_duration_changed(session, workout_id, workout.duration_minutes, new_duration)
+                workout.duration_minutes = new_duration
+                invalidate_workout(session, workout_id)
+                commit_or_flush(session, owned)
+                _ = workout.id
+                _ = workout.duration_minutes
+                print(f"Workout '{workout.activity}' duration updated to {new_duration} minutes.")
+                return workout
             print(f"Workout with ID {workout_id} not found.")
             return None
+        except Exception as e:
+            if not owned:
+                raise
+            session.rollback()
+            print(f"Error updating workout duration: {e}")
+            return None
 
-        date_to_use = completion_date if completion_date else datetime.now()
-        
-        day_start = date_to_use.replace(hour=0, minute=0, second=0, microsecond=0)
-        day_end = date_to_use.replace(hour=23, minute=59, second=59, microsecond=999999)
-
-        existing_log = session.query(UserWorkout).filter(
-            UserWorkout.user_id == user_id,
-            UserWorkout.workout_id == workout_id,
-            UserWorkout.completion_date >= day_start,
-            UserWorkout.completion_date <= day_end
-        ).first()
-
-        if existing_log:
-            print(f"User {user.name} already logged '{workout.activity}' on {date_to_use.strftime('%Y-%m-%d')}.")
+@instrumented
+def delete_workout(workout_id, session=None):
+    with helper_session(session) as (session, owned):
+        try:
+            workout = session.query(Workout).filter_by(id=workout_id).first()
+            if workout:
+                workout_activity = workout.activity
+                rollup_workout_removed(session, workout_id, workout.duration_minutes)
+                logs = log_source(session)
+                affected_users = session.scalars(
+                    select(logs.user_id).where(logs.workout_id == workout_id).distinct()
+                ).all()
+                invalidate_workout(session, workout_id)
+                session.delete(workout)
+                recompute_user_streaks(session, affected_users)
+                commit_or_flush(session, owned)
+                print(f"Workout '{workout_activity}' (ID: {workout_id}) and its associations deleted.")
+                return True
+            print(f"Workout with ID {workout_id} not found.")
+            return False
+        except Exception as e:
+            if not owned:
+                raise
+            session.rollback()
+            print(f"Error deleting workout: {e}")
+            return False
+
+@instrumented
+def log_user_workout(user_id, workout_id, completion_date=None, notes=None, on_conflict='skip', session=None):
+    """
+    Logs a workout with a single INSERT ... ON CONFLICT DO NOTHING RETURNING against the
+    unique (user_id, workout_id, completion_day) index, so two concurrent writers can't
+    both create the day's log. If it already exists, on_conflict='skip' returns it as is
+    and 'merge' appends the new notes to it unless they are already there.
+    """
+    if on_conflict not in LOG_CONFLICT_POLICIES:
+        raise ValueError(f"Unknown on_conflict '{on_conflict}', expected one of {', '.join(LOG_CONFLICT_POLICIES)}.")
+    with helper_session(session) as (session, owned):
+        try:
+            user = cached_user(session, user_id, cacheable=owned)
+            workout = cached_workout(session, workout_id, cacheable=owned)
+
+            if not user:
+                print(f"User with ID {user_id} not found.")
+                return None
+            if not workout:
+                print(f"Workout with ID {workout_id} not found.")
+                return None
+
+            date_to_use = completion_date if completion_date else datetime.now()
+            day_start = datetime.combine(date_to_use.date(), time.min)
+
+            # A day before the hot/cold boundary may already be logged in the archive,
+            # where the unique index on user_workouts can't see it.
+            arms = log_arms(session, day_start, day_start + timedelta(days=1))
+            logged_in = next((
+                arm for arm in arms[1:]
+                if session.query(arm.entity.id).filter(*_same_day(arm.entity, user_id, workout_id, date_to_use)).first()
+            ), None)
+
+            if logged_in is None:
+                new_log_entry = session.scalars(
+                    sqlite_insert(UserWorkout)
+                    .values(user_id=user_id, workout_id=workout_id, completion_date=date_to_use, notes=notes)
+                    .on_conflict_do_nothing(index_elements=LOG_DAY_KEY)
+                    .returning(UserWorkout)
+                ).first()
+
+                if new_log_entry is not None:
+                    rollup_log_added(session, user_id, date_to_use, workout.duration_minutes)
+                    streak_log_added(session, user_id, date_to_use)
+                    commit_or_flush(session, owned)
+                    _ = new_log_entry.id
+                    _ = new_log_entry.completion_date
+                    _ = new_log_entry.notes
+
+                    print(f"Logged workout: User '{user.name}' did '{workout.activity}' on {date_to_use.strftime('%Y-%m-%d')}.")
+                    return new_log_entry
+                logged_in = arms[0]
+
+            same_day = _same_day(logged_in.entity, user_id, workout_id, date_to_use)
+            if on_conflict == 'merge' and notes:
+                current = logged_in.table.c.notes
+                session.execute(update(logged_in.table).where(*same_day).values(notes=case(
+                    (current.is_(None), notes),
+                    (func.instr(NOTES_SEPARATOR + current + NOTES_SEPARATOR,
+                                NOTES_SEPARATOR + notes + NOTES_SEPARATOR) > 0, current),
+                    else_=current + NOTES_SEPARATOR + notes
+                )))
+                existing_log = session.query(logged_in.entity).populate_existing().filter(*same_day).first()
+                if logged_in.entity is not UserWorkout:
+                    _detach_archived(session, [existing_log])
+                commit_or_flush(session, owned)
+                print(f"Merged notes into User {user.name}'s '{workout.activity}' log on {date_to_use.strftime('%Y-%m-%d')}.")
+            else:
+                existing_log = session.query(logged_in.entity).filter(*same_day).first()
+                if logged_in.entity is not UserWorkout:
+                    _detach_archived(session, [existing_log])
+                print(f"User {user.name} already logged '{workout.activity}' on {date_to_use.strftime('%Y-%m-%d')}.")
             _ = existing_log.id
             _ = existing_log.completion_date
             _ = existing_log.notes
-            return_instance = existing_log
-        else:
-            new_log_entry = UserWorkout(
-                user=user, 
-                workout=workout,
-                completion_date=date_to_use,
-                notes=notes
-            )
-            session.add(new_log_entry)
-            session.commit()
-            _ = new_log_entry.id
-            _ = new_log_entry.completion_date
-            _ = new_log_entry.notes
-            
-            print(f"Logged workout: User '{user.name}' did '{workout.activity}' on {date_to_use.strftime('%Y-%m-%d')}.")
-            return_instance = new_log_entry
-        
-        return return_instance
-    except Exception as e:
-        session.rollback()
-        print(f"Error logging user workout: {e}")
-        return None
-    finally:
-        if session.is_active:
-            session.close()
+            return existing_log
+        except Exception as e:
+            if not owned:
+                raise
+            session.rollback()
+            print(f"Error logging user workout: {e}")
+            return None
 
+def _as_datetime(value):
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime.combine(value, time.min)
+    return value
+
+def _log_conditions(user_id=None, workout_id=None, since=None, until=None, logs=UserWorkout):
+    """
+    WHERE clauses on user_workouts, or on logs from lib.archive; since is inclusive and
+    until exclusive. Dates mean midnight.
+    """
+    conditions = []
+    if user_id is not None:
+        conditions.append(logs.user_id == user_id)
+    if workout_id is not None:
+        conditions.append(logs.workout_id == workout_id)
+    if since is not None:
+        conditions.append(logs.completion_date >= _as_datetime(since))
+    if until is not None:
+        conditions.append(logs.completion_date < _as_datetime(until))
+    return conditions
+
+def _same_day(logs, user_id, workout_id, completion_date):
+    return (logs.user_id == user_id, logs.workout_id == workout_id, logs.completion_day == completion_date.date())
+
+def _archived_days(session, candidates):
+    """The (user_id, workout_id, day) keys among bulk candidates already logged in the archive."""
+    if not candidates:
+        return set()
+    arms = log_arms(session, since=min(_as_datetime(c[2]) for c in candidates))
+    if len(arms) == 1:
+        return set()
+    boundary = arms[0].floor
+    keys = {
+        (user_id, workout_id, _as_datetime(completion_date).date())
+        for user_id, workout_id, completion_date, _ in candidates
+        if _as_datetime(completion_date) < boundary
+    }
+    if not keys:
+        return set()
+    found = set()
+    for arm in arms[1:]:
+        table = arm.table
+        found.update(map(tuple, session.execute(
+            select(table.c.user_id, table.c.workout_id, table.c.completion_day)
+            .where(tuple_(table.c.user_id, table.c.workout_id, table.c.completion_day).in_(keys))
+        )))
+    return found
+
+def _normalize_log_record(record):
+    if isinstance(record, dict):
+        return (record.get('user_id'), record.get('workout_id'),
+                record.get('completion_date'), record.get('notes'))
+    user_id, workout_id, *rest = record
+    rest += [None] * (2 - len(rest))
+    return user_id, workout_id, rest[0], rest[1]
+
+@instrumented
+def log_user_workouts_bulk(records, chunk_size=BULK_CHUNK_SIZE, session=None):
+    """
+    Logs many workouts at once. Each record is a dict (or tuple in the same order)
+    with user_id, workout_id and optional completion_date (a date or datetime) and notes.
+
+    Records that repeat a user, workout and day (within the batch or against the
+    database) are skipped by ON CONFLICT DO NOTHING, as in log_user_workout. Records
+    referencing unknown users or workouts are rejected. Each chunk is inserted in one
+    executemany transaction (or flushed into the caller's transaction inside a shared
+    session).
+    """
+    counts = {'inserted': 0, 'skipped': 0, 'rejected': 0}
+    records = iter(records)
+    with helper_session(session) as (session, owned):
+        try:
+            while True:
+                chunk = list(islice(records, chunk_size))
+                if not chunk:
+                    break
+
+                now = datetime.now()
+                candidates = []
+                for record in chunk:
+                    try:
+                        user_id, workout_id, completion_date, notes = _normalize_log_record(record)
+                    except (TypeError, ValueError):
+                        counts['rejected'] += 1
+                        continue
+                    completion_date = _as_datetime(completion_date or now)
+                    # Checked here, so one bad record is rejected on its own instead of
+                    # failing the comparisons and inserts for the whole chunk.
+                    if user_id is None or workout_id is None or not isinstance(completion_date, datetime):
+                        counts['rejected'] += 1
+                        continue
+                    candidates.append((user_id, workout_id, completion_date, notes))
+
+                if not candidates:
+                    continue
+
+                user_ids = {c[0] for c in candidates}
+                workout_ids = {c[1] for c in candidates}
+                known_users = set(session.scalars(select(User.id).where(User.id.in_(user_ids))))
+                known_workouts = dict(session.execute(
+                    select(Workout.id, Workout.duration_minutes).where(Workout.id.in_(workout_ids))
+                ).all())
+
+                valid = []
+                for candidate in candidates:
+                    if candidate[0] in known_users and candidate[1] in known_workouts:
+                        valid.append(candidate)
+                    else:
+                        counts['rejected'] += 1
+
+                if not valid:
+                    continue
+
+                archived = _archived_days(session, valid)
+                if archived:
+                    kept = [c for c in valid if (c[0], c[1], _as_datetime(c[2]).date()) not in archived]
+                    counts['skipped'] += len(valid) - len(kept)
+                    valid = kept
+                    if not valid:
+                        continue
+
+                table = UserWorkout.__table__
+                inserted = session.execute(
+                    sqlite_insert(table)
+                    .on_conflict_do_nothing(index_elements=[table.c[column.key] for column in LOG_DAY_KEY])
+                    .returning(table.c.user_id, table.c.workout_id, table.c.completion_date),
+                    [
+                        {'user_id': user_id, 'workout_id': workout_id, 'completion_date': completion_date, 'notes': notes}
+                        for user_id, workout_id, completion_date, notes in valid
+                    ]
+                ).all()
+                counts['skipped'] += len(valid) - len(inserted)
+
+                if inserted:
+                    apply_rollup_deltas(session, [
+                        (row.user_id, row.completion_date, 1, known_workouts[row.workout_id])
+                        for row in inserted
+                    ])
+                    added_days = defaultdict(list)
+                    for row in inserted:
+                        added_days[row.user_id].append(row.completion_date)
+                    streak_logs_added(session, added_days)
+                    commit_or_flush(session, owned)
+                    counts['inserted'] += len(inserted)
+
+            print(f"Bulk log: {counts['inserted']} inserted, {counts['skipped']} skipped, {counts['rejected']} rejected.")
+            return counts
+        except Exception as e:
+            if not owned:
+                raise
+            session.rollback()
+            print(f"Error bulk logging user workouts: {e}")
+            return counts
+
+
+@instrumented
+def get_user_workouts(user_id, since=None, until=None, workout_id=None, limit=None, order='desc',
+                      as_rows=False, session=None):
+    """
+    Returns the user's logs ordered by completion_date ('desc' newest first, or 'asc'),
+    optionally within [since, until) and for one workout. The filters, order and limit
+    run in SQL on the (user_id[, workout_id], completion_date) indexes, so the last 20
+    workouts cost an index seek plus 20 rows whatever the length of the history.
+    Archived years are read only when the range (or the limit) reaches back into them.
+    """
+    if order not in LOG_ORDERS:
+        raise ValueError(f"Unknown order '{order}', expected one of {', '.join(LOG_ORDERS)}.")
+    since, until = _as_datetime(since), _as_datetime(until)
+    with helper_session(session) as (session, owned):
+        def build_query(logs):
+            query = log_rows_select(logs) if as_rows else _log_query(session, logs, join_user=False)
+            return query.filter(*_log_conditions(user_id, workout_id, since, until, logs)).order_by(
+                *_log_order(logs, order)
+            )
 
-def get_user_workouts(user_id):
-    session = Session()
-    try:
-        logs = session.query(UserWorkout).options(
-            joinedload(UserWorkout.user),
-            joinedload(UserWorkout.workout)
-        ).filter(UserWorkout.user_id == user_id).all()
+        logs = _merged_logs(session, log_arms(session, since, until), build_query, limit,
+                            LogRow if as_rows else None, order)
+        if as_rows:
+            return logs
         for log_entry in logs:
             _ = log_entry.id
             _ = log_entry.completion_date
         return logs
-    finally:
-        if session.is_active:
-            session.close()
 
-def get_workout_participants(workout_id):
-    session = Session()
-    try:
-        workout = session.query(Workout).options(
-            joinedload(Workout.user_workouts).joinedload(UserWorkout.user)
-        ).filter_by(id=workout_id).first()
-        
-        if workout:
-            participants = workout.users
-            for p in participants:
-                _ = p.id
-            return participants
-        return []
-    finally:
-        if session.is_active:
-            session.close()
-
-def get_all_workout_logs():
-    session = Session()
-    try:
-        logs = session.query(UserWorkout).options(
-            joinedload(UserWorkout.user),
-            joinedload(UserWorkout.workout)
-        ).order_by(UserWorkout.completion_date.desc()).all()
+@instrumented
+def count_user_workouts(user_id, since=None, until=None, workout_id=None, session=None):
+    """Counts what get_user_workouts would return, from the index alone."""
+    with helper_session(session) as (session, owned):
+        logs = log_source(session, _as_datetime(since), _as_datetime(until))
+        return session.execute(
+            select(func.count()).select_from(logs).where(*_log_conditions(user_id, workout_id, since, until, logs))
+        ).scalar()
+
+@instrumented
+def get_workout_participants(workout_id, as_rows=False, session=None):
+    """Returns each user who logged the workout once, by id, without loading the workout's logs."""
+    with helper_session(session) as (session, owned):
+        logs = log_source(session)
+        participant_ids = select(logs.user_id).where(logs.workout_id == workout_id)
+        if as_rows:
+            return fetch_rows(session, user_rows_select().where(User.id.in_(participant_ids)).order_by(User.id), UserRow)
+        participants = session.query(User).filter(User.id.in_(participant_ids)).order_by(User.id).all()
+        for p in participants:
+            _ = p.id
+        return participants
+
+@instrumented
+def get_workout_participants_page(workout_id, limit=50, cursor=None, session=None):
+    """
+    Returns (participants, next_cursor): ParticipantRow(user_id, name, email, sessions,
+    last_completed) per distinct user, by user id, from one GROUP BY per page.
+    """
+    def build_query(session, after):
+        logs = log_source(session)
+        query = participant_rows_select(workout_id, logs)
+        if after is not None:
+            query = query.where(logs.user_id > after[0])
+        return query
+
+    return _keyset_page(_fetch_keyset(build_query, ParticipantRow), _participant_key, limit, cursor, session=session)
+
+@instrumented
+def count_workout_participants(workout_id, session=None):
+    """Counts the distinct users who logged the workout, from the index alone."""
+    with helper_session(session) as (session, owned):
+        logs = log_source(session)
+        return session.execute(
+            select(func.count(logs.user_id.distinct())).where(logs.workout_id == workout_id)
+        ).scalar()
+
+@instrumented
+def get_all_workout_logs(as_rows=False, session=None):
+    with helper_session(session) as (session, owned):
+        def build_query(logs):
+            query = log_rows_select(logs) if as_rows else _log_query(session, logs)
+            return query.order_by(*_log_order(logs))
+
+        logs = _merged_logs(session, log_arms(session), build_query, row_type=LogRow if as_rows else None)
+        if as_rows:
+            return logs
         for log_entry in logs:
             _ = log_entry.id
             _ = log_entry.completion_date
         return logs
-    finally:
-        if session.is_active:
-            session.close()
 
-def delete_user_workout_log(log_id):
-    session = Session()
+def _log_query(session, logs, join_user=True):
+    if logs is not UserWorkout:
+        # An archive arm's entity matches columns by name, so a joined users.id or workouts.id
+        # would be read from the archive's own id column; its user and workout are loaded
+        # by id in a second query instead.
+        return session.query(logs).options(selectinload(logs.user), selectinload(logs.workout))
+    query = session.query(logs).outerjoin(Workout, Workout.id == logs.workout_id).options(
+        contains_eager(logs.workout)
+    )
+    if not join_user:
+        # Every row has the same user, so it is loaded once rather than joined onto each row.
+        return query.options(selectinload(logs.user))
+    return query.outerjoin(User, User.id == logs.user_id).options(contains_eager(logs.user))
+
+def _log_order(logs, order='desc'):
+    if order == 'desc':
+        return (logs.completion_date.desc(), logs.id.desc())
+    return (logs.completion_date, logs.id)
+
+def _log_sort_key(log_entry):
+    # Undated logs sort below every date, as SQLite sorts NULL.
+    return (log_entry.completion_date or datetime.min, log_entry.id)
+
+def _detach_archived(session, logs):
+    # Archived rows can't be refreshed or flushed through the UserWorkout mapper, so they
+    # are handed back detached, as read-only snapshots with their attributes loaded.
+    for log_entry in logs:
+        session.expunge(log_entry)
+
+def _merged_logs(session, arms, build_query, limit=None, row_type=None, order='desc'):
+    """
+    Runs build_query(logs) on each of lib.archive's log arms and merges the ordered
+    results. Newest first, reading stops once the limit is met by logs newer than
+    everything in the remaining arms, so a recent page never touches the archive.
+    """
+    merged = []
+    for arm in arms:
+        query = build_query(arm.entity).limit(limit)
+        items = fetch_rows(session, query, row_type) if row_type else query.all()
+        if row_type is None and arm.entity is not UserWorkout:
+            _detach_archived(session, items)
+        merged = list(heapq.merge(merged, items, key=_log_sort_key, reverse=order == 'desc'))[:limit]
+        if (order == 'desc' and limit is not None and len(merged) == limit and arm.floor is not None
+                and merged[-1].completion_date is not None and merged[-1].completion_date >= arm.floor):
+            break
+    return merged
+
+def _encode_cursor(values):
+    payload = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def _decode_cursor(cursor):
     try:
-        log_entry = session.query(UserWorkout).filter_by(id=log_id).first()
-        if log_entry:
-            session.delete(log_entry)
-            session.commit()
-            print(f"Workout log (ID: {log_id}) deleted.")
-            return True
-        print(f"Workout log with ID {log_id} not found.")
-        return False
-    except Exception as e:
-        session.rollback()
-        print(f"Error deleting workout log: {e}")
-        return False
-    finally:
-        if session.is_active:
-            session.close()
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    return values
+
+def _log_keyset_query(session, logs, after=None, user_id=None, as_rows=False):
+    # Newest first, tie-broken by id so the (completion_date, id) key is unique.
+    # as_rows builds a Core select of LogRow columns; .filter() works on both.
+    query = log_rows_select(logs) if as_rows else _log_query(session, logs)
+    if user_id is not None:
+        query = query.filter(logs.user_id == user_id)
+    if after is not None:
+        completion_date, log_id = after
+        query = query.filter(
+            tuple_(logs.completion_date, logs.id) < tuple_(completion_date, log_id)
+        )
+    return query.order_by(*_log_order(logs))
+
+def _log_key(log_entry):
+    return (log_entry.completion_date, log_entry.id)
+
+def _parse_log_key(values):
+    return (datetime.fromisoformat(values[0]), values[1])
+
+def _user_keyset_query(session, after=None, as_rows=False):
+    query = user_rows_select() if as_rows else session.query(User)
+    if after is not None:
+        query = query.filter(User.id > after[0])
+    return query.order_by(User.id)
+
+def _participant_key(participant):
+    return (participant.user_id,)
+
+def _user_key(user):
+    return (user.id,)
+
+# The keyset helpers below take fetch(session, after, limit), which returns the next
+# `limit` items after the key `after` (None for the first page).
+
+def _fetch_keyset(build_query, row_type=None):
+    """fetch over one keyset query, streamed in limit-sized partitions."""
+    def fetch(session, after, limit):
+        query = build_query(session, after).limit(limit)
+        return iter_rows(session, query, row_type, limit) if row_type else query.yield_per(limit)
+    return fetch
+
+def _fetch_logs(user_id=None, as_rows=False):
+    """fetch over the logs, newest first, merged across user_workouts and the archive."""
+    def fetch(session, after, limit):
+        return _merged_logs(
+            session, log_arms(session), lambda logs: _log_keyset_query(session, logs, after, user_id, as_rows),
+            limit, LogRow if as_rows else None
+        )
+    return fetch
+
+def _iter_keyset(fetch, key_of, batch_size, session=None):
+    with helper_session(session) as (session, owned):
+        after = None
+        while True:
+            fetched = 0
+            last = None
+            for item in fetch(session, after, batch_size):
+                fetched += 1
+                last = item
+                yield item
+            if fetched < batch_size:
+                return
+            after = key_of(last)
+            # Already-yielded objects stay readable once detached; this keeps the identity map bounded.
+            # A shared session may hold the caller's pending objects, so it is left alone.
+            if owned:
+                session.expunge_all()
+
+def _keyset_page(fetch, key_of, limit, cursor, parse_key=tuple, session=None):
+    after = parse_key(_decode_cursor(cursor)) if cursor else None
+    with helper_session(session) as (session, owned):
+        items = list(fetch(session, after, limit + 1))
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = _encode_cursor(key_of(items[-1]))
+        return items, next_cursor
+
+@instrumented
+def iter_all_users(batch_size=STREAM_BATCH_SIZE, as_rows=False, session=None):
+    return _iter_keyset(
+        _fetch_keyset(lambda session, after: _user_keyset_query(session, after, as_rows), UserRow if as_rows else None),
+        _user_key, batch_size, session
+    )
+
+@instrumented
+def iter_user_workouts(user_id, batch_size=STREAM_BATCH_SIZE, as_rows=False, session=None):
+    return _iter_keyset(_fetch_logs(user_id, as_rows), _log_key, batch_size, session)
+
+@instrumented
+def iter_all_workout_logs(batch_size=STREAM_BATCH_SIZE, as_rows=False, session=None):
+    return _iter_keyset(_fetch_logs(as_rows=as_rows), _log_key, batch_size, session)
+
+@instrumented
+def get_users_page(limit=50, cursor=None, as_rows=False, session=None):
+    """Returns (users, next_cursor); next_cursor is None on the last page."""
+    return _keyset_page(
+        _fetch_keyset(lambda session, after: _user_keyset_query(session, after, as_rows), UserRow if as_rows else None),
+        _user_key, limit, cursor, session=session
+    )
+
+@instrumented
+def get_user_workouts_page(user_id, limit=50, cursor=None, as_rows=False, session=None):
+    """Returns (logs, next_cursor), newest first; next_cursor is None on the last page."""
+    return _keyset_page(_fetch_logs(user_id, as_rows), _log_key, limit, cursor, _parse_log_key, session)
+
+@instrumented
+def get_workout_logs_page(limit=50, cursor=None, as_rows=False, session=None):
+    """Returns (logs, next_cursor), newest first; next_cursor is None on the last page."""
+    return _keyset_page(_fetch_logs(as_rows=as_rows), _log_key, limit, cursor, _parse_log_key, session)
+
+def _delete_logs(session, arms, conditions_for):
+    """
+    Deletes the logs matching conditions_for(logs) from each of lib.archive's log arms,
+    one DELETE apiece, keeping rollups and streaks in step. Returns how many were removed.
+    """
+    affected_users = set()
+    deleted = 0
+    for arm in arms:
+        conditions = conditions_for(arm.entity)
+        affected_users |= rollup_logs_removed(session, *conditions, logs=arm.entity)
+        # Through the ORM for user_workouts, so matching objects in the session are marked deleted.
+        target = UserWorkout if arm.entity is UserWorkout else arm.table
+        deleted += session.execute(delete(target).where(*conditions)).rowcount
+    recompute_user_streaks(session, affected_users)
+    return deleted
+
+@instrumented
+def delete_user_workout_log(log_id, session=None):
+    with helper_session(session) as (session, owned):
+        try:
+            log_entry = session.query(UserWorkout).filter_by(id=log_id).first()
+            if log_entry:
+                if log_entry.completion_date is not None:
+                    rollup_log_removed(session, log_entry.user_id, log_entry.completion_date,
+                                       log_entry.workout.duration_minutes)
+                session.delete(log_entry)
+                recompute_user_streaks(session, [log_entry.user_id])
+                deleted = True
+            else:
+                # Not in user_workouts; it may have been archived.
+                deleted = _delete_logs(session, log_arms(session)[1:], lambda logs: [logs.id == log_id]) > 0
+            if deleted:
+                commit_or_flush(session, owned)
+                print(f"Workout log (ID: {log_id}) deleted.")
+                return True
+            print(f"Workout log with ID {log_id} not found.")
+            return False
+        except Exception as e:
+            if not owned:
+                raise
+            session.rollback()
+            print(f"Error deleting workout log: {e}")
+            return False
+
+@instrumented
+def delete_workout_logs(user_id=None, workout_id=None, before=None, after=None, session=None):
+    """
+    Deletes every log matching the filters, with a single DELETE per table (user_workouts
+    and each archive year the range reaches), and returns how many were removed. after
+    is inclusive and before exclusive, so consecutive ranges don't overlap. At least one
+    filter is required.
+    """
+    if not _log_conditions(user_id, workout_id, after, before):
+        print("Give at least one of user_id, workout_id, before or after to delete workout logs.")
+        return None
+    with helper_session(session) as (session, owned):
+        try:
+            deleted = _delete_logs(
+                session, log_arms(session, _as_datetime(after), _as_datetime(before)),
+                lambda logs: _log_conditions(user_id, workout_id, after, before, logs)
+            )
+            commit_or_flush(session, owned)
+            print(f"Deleted {deleted} workout log(s).")
+            return deleted
+        except Exception as e:
+            if not owned:
+                raise
+            session.rollback()
+            print(f"Error deleting workout logs: {e}")
+            return None
 
 if __name__ == "__main__":
     from lib.seed import seed_database
@@ -0,0 +1,253 @@
+# lib/instrumentation.py
+import functools
+import inspect
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+
+# Per-call SQL statistics for the helpers: statement count, total and max time, rows
+# returned, and statements repeated within one call (N+1 suspects).
+#
+#   with profile_helpers() as profile:
+#       get_user_workouts(1)
+#   profile.print_summary()
+#
+# Leaf module: lib.models imports it to wire the engine, so it must not import lib.models.
+
+N_PLUS_ONE_THRESHOLD = 3
+
+_active_recorders = ContextVar('active_query_recorders', default=())
+_active_profile = ContextVar('active_helper_profile', default=None)
+_global_profile = None
+
+class CountingCursor(sqlite3.Cursor):
+    """sqlite3 cursor that reports fetched rows to the recorders active when it executed."""
+    recorders = ()
+
+    def _count(self, rows):
+        for recorder in self.recorders:
+            recorder.rows += rows
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None and self.recorders:
+            self._count(1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = super().fetchmany(*args, **kwargs)
+        if self.recorders:
+            self._count(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        if self.recorders:
+            self._count(len(rows))
+        return rows
+
+class CountingConnection(sqlite3.Connection):
+    def cursor(self, factory=CountingCursor):
+        return super().cursor(factory)
+
+class QueryRecorder:
+    """Accumulates the statements executed while it is active."""
+
+    def __init__(self, name=None):
+        self.name = name
+        self.streamed = False
+        self.statements = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.rows = 0
+        self.by_statement = Counter()
+        self.time_by_statement = Counter()
+
+    def add(self, statement, elapsed, rowcount):
+        key = _normalize(statement)
+        self.statements += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.by_statement[key] += 1
+        self.time_by_statement[key] += elapsed
+        if rowcount and rowcount > 0:
+            self.rows += rowcount
+
+    def n_plus_one_suspects(self, threshold=N_PLUS_ONE_THRESHOLD):
+        if self.streamed:
+            # Keyset streaming repeats its page query on purpose.
+            return []
+        return [(statement, count) for statement, count in self.by_statement.most_common()
+                if count >= threshold]
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'statements': self.statements,
+            'total_ms': self.total_time * 1000,
+            'max_ms': self.max_time * 1000,
+            'rows': self.rows,
+            'n_plus_one_suspects': self.n_plus_one_suspects(),
+        }
+
+def _normalize(statement):
+    return re.sub(r'\s+', ' ', statement).strip()
+
+@contextmanager
+def record_queries(name=None):
+    """Records every statement executed in this thread/task while the block runs."""
+    recorder = QueryRecorder(name)
+    token = _active_recorders.set(_active_recorders.get() + (recorder,))
+    try:
+        yield recorder
+    finally:
+        _active_recorders.reset(token)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    recorders = _active_recorders.get()
+    if recorders:
+        conn.info.setdefault('query_start_times', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    recorders = _active_recorders.get()
+    if not recorders:
+        return
+    start_times = conn.info.get('query_start_times')
+    if not start_times:
+        return
+    elapsed = time.perf_counter() - start_times.pop()
+    # SELECT rows are counted as they are fetched; DML reports rowcount up front.
+    is_select = cursor.description is not None
+    for recorder in recorders:
+        recorder.add(statement, elapsed, None if is_select else cursor.rowcount)
+    if is_select and isinstance(cursor, CountingCursor):
+        cursor.recorders = recorders
+
+def instrument_engine(engine):
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+class HelperProfile:
+    """Per-call QueryRecorder results for helper calls made while the profile is active."""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def add(self, recorder):
+        with self._lock:
+            self.calls.append(recorder)
+
+    def clear(self):
+        with self._lock:
+            self.calls.clear()
+
+    def summary(self):
+        """Aggregates calls per helper, slowest total first."""
+        by_helper = {}
+        with self._lock:
+            calls = list(self.calls)
+        for call in calls:
+            entry = by_helper.setdefault(call.name, {
+                'calls': 0, 'statements': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0,
+                'n_plus_one_suspects': Counter(),
+            })
+            entry['calls'] += 1
+            entry['statements'] += call.statements
+            entry['total_ms'] += call.total_time * 1000
+            entry['max_ms'] = max(entry['max_ms'], call.max_time * 1000)
+            entry['rows'] += call.rows
+            for statement, count in call.n_plus_one_suspects():
+                entry['n_plus_one_suspects'][statement] = max(entry['n_plus_one_suspects'][statement], count)
+        return dict(sorted(by_helper.items(), key=lambda item: -item[1]['total_ms']))
+
+    def print_summary(self):
+        summary = self.summary()
+        if not summary:
+            print("No helper calls recorded.")
+            return
+        print(f"{'helper':<28}{'calls':>6}{'stmts':>7}{'stmts/call':>11}{'total ms':>10}{'max ms':>9}{'rows':>8}")
+        for name, entry in summary.items():
+            print(f"{name:<28}{entry['calls']:>6}{entry['statements']:>7}"
+                  f"{entry['statements'] / entry['calls']:>11.1f}{entry['total_ms']:>10.2f}"
+                  f"{entry['max_ms']:>9.2f}{entry['rows']:>8}")
+        for name, entry in summary.items():
+            for statement, count in entry['n_plus_one_suspects'].items():
+                print(f"N+1 suspect in {name}: {count}x {statement[:120]}")
+
+@contextmanager
+def profile_helpers():
+    """Records each instrumented helper call made in this thread/task while the block runs."""
+    profile = HelperProfile()
+    token = _active_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _active_profile.reset(token)
+
+def start_profiling():
+    """Process-wide profiling, for interactive use such as the CLI diagnostics menu."""
+    global _global_profile
+    if _global_profile is None:
+        _global_profile = HelperProfile()
+    return _global_profile
+
+def stop_profiling():
+    global _global_profile
+    profile, _global_profile = _global_profile, None
+    return profile
+
+def get_profile():
+    return _global_profile
+
+def _profiles():
+    return [p for p in (_active_profile.get(), _global_profile) if p is not None]
+
+def _iterate_recorded(name, iterator, profiles):
+    # The recorder is active only while the helper's generator runs, not while the caller
+    # holds a row, so statements the caller runs between rows are credited to the caller.
+    recorder = QueryRecorder(name)
+    recorder.streamed = True
+
+    def advance(step):
+        token = _active_recorders.set(_active_recorders.get() + (recorder,))
+        try:
+            return step()
+        finally:
+            _active_recorders.reset(token)
+
+    try:
+        while True:
+            try:
+                item = advance(lambda: next(iterator))
+            except StopIteration:
+                return
+            yield item
+    finally:
+        # Runs on exhaustion, on an early break (close) and on errors alike.
+        advance(iterator.close)
+        for profile in profiles:
+            profile.add(recorder)
+
+def instrumented(fn):
+    """Records the decorated helper's statements into the active profiles, if any."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        profiles = _profiles()
+        if not profiles:
+            return fn(*args, **kwargs)
+        with record_queries(fn.__name__) as recorder:
+            result = fn(*args, **kwargs)
+        if inspect.isgenerator(result):
+            # Streaming helpers run their queries while being consumed.
+            return _iterate_recorded(fn.__name__, result, profiles)
+        for profile in profiles:
+            profile.add(recorder)
+        return result
+    return wrapper
@@ -0,0 +1,123 @@
+# lib/leaderboards.py
+from datetime import date, datetime, time, timedelta
+from typing import NamedTuple
+from sqlalchemy import select, func
+from lib.models.__init__ import helper_session
+from lib.models.user import User
+from lib.models.workout import Workout
+from lib.models.activity_rollup import UserDailyActivity
+from lib.archive import log_source
+from lib.cache import leaderboard_cache, MISSING
+from lib.instrumentation import instrumented
+
+# Top-N users and workouts over a rolling window of days ending today. Users are ranked
+# from the daily rollups (one row per user and active day, read by the day index from
+# migration 0010), workouts from the completion_date index of the logs. Ties share a
+# rank (SQL RANK()), then come in id order.
+#
+# Results are kept in lib.cache.leaderboard_cache for FITNESS_TRACKER_LEADERBOARD_TTL
+# seconds; every write that changes the rollups clears it (see apply_rollup_deltas).
+LEADERBOARD_WINDOWS = {'week': 7, 'month': 30}
+LEADERBOARD_METRICS = ('minutes', 'sessions')
+LEADERBOARD_SIZE = 10
+
+class UserRank(NamedTuple):
+    rank: int
+    user_id: int
+    name: str
+    sessions: int
+    minutes: int
+
+class WorkoutRank(NamedTuple):
+    rank: int
+    workout_id: int
+    activity: str
+    participants: int
+    sessions: int
+
+def window_days(window):
+    """Days in a window: 'week' (7), 'month' (30) or a positive number of days."""
+    if isinstance(window, int) and not isinstance(window, bool) and window > 0:
+        return window
+    if window in LEADERBOARD_WINDOWS:
+        return LEADERBOARD_WINDOWS[window]
+    raise ValueError(f"Unknown window '{window}', expected one of {', '.join(LEADERBOARD_WINDOWS)} "
+                     f"or a positive number of days.")
+
+def _window_start(window, today):
+    return (today or date.today()) - timedelta(days=window_days(window) - 1)
+
+def _cached(key, session, owned, query):
+    rows = leaderboard_cache.get(key)
+    if rows is MISSING:
+        generation = leaderboard_cache.generation()
+        rows = tuple(query(session))
+        # A shared session may hold uncommitted writes, which must not be cached.
+        if owned:
+            leaderboard_cache.put(key, rows, generation)
+    return list(rows)
+
+def _top_users_select(metric, start, end, limit):
+    daily = UserDailyActivity.__table__
+    totals = (
+        select(daily.c.user_id, func.sum(daily.c.sessions).label('sessions'), func.sum(daily.c.minutes).label('minutes'))
+        .where(daily.c.day >= start, daily.c.day <= end)
+        .group_by(daily.c.user_id)
+        .subquery()
+    )
+    score = totals.c[metric]
+    return (
+        select(func.rank().over(order_by=score.desc()).label('rank'),
+               totals.c.user_id, User.name, totals.c.sessions, totals.c.minutes)
+        .join(User, User.id == totals.c.user_id)
+        .order_by(score.desc(), totals.c.user_id)
+        .limit(limit)
+    )
+
+def _top_workouts_select(logs, since, until, limit):
+    counts = (
+        select(logs.workout_id,
+               func.count(logs.user_id.distinct()).label('participants'),
+               func.count().label('sessions'))
+        .where(logs.completion_date >= since, logs.completion_date < until)
+        .group_by(logs.workout_id)
+        .subquery()
+    )
+    return (
+        select(func.rank().over(order_by=counts.c.participants.desc()).label('rank'),
+               counts.c.workout_id, Workout.activity, counts.c.participants, counts.c.sessions)
+        .join(Workout, Workout.id == counts.c.workout_id)
+        .order_by(counts.c.participants.desc(), counts.c.workout_id)
+        .limit(limit)
+    )
+
+@instrumented
+def get_top_users(window='week', metric='minutes', limit=LEADERBOARD_SIZE, today=None, session=None):
+    """
+    The `limit` users with the most minutes (or sessions) in the last `window` days up to
+    and including `today`, as UserRank tuples.
+    """
+    if metric not in LEADERBOARD_METRICS:
+        raise ValueError(f"Unknown metric '{metric}', expected one of {', '.join(LEADERBOARD_METRICS)}.")
+    today = today or date.today()
+    start = _window_start(window, today)
+    with helper_session(session) as (session, owned):
+        return _cached(
+            ('users', metric, start, today, limit), session, owned,
+            lambda session: (UserRank(*row) for row in session.execute(_top_users_select(metric, start, today, limit)))
+        )
+
+@instrumented
+def get_top_workouts(window='week', limit=LEADERBOARD_SIZE, today=None, session=None):
+    """
+    The `limit` workouts with the most distinct participants in the last `window` days up
+    to and including `today`, as WorkoutRank tuples.
+    """
+    today = today or date.today()
+    since = datetime.combine(_window_start(window, today), time.min)
+    until = datetime.combine(today + timedelta(days=1), time.min)
+    with helper_session(session) as (session, owned):
+        def query(session):
+            logs = log_source(session, since, until)
+            return (WorkoutRank(*row) for row in session.execute(_top_workouts_select(logs, since, until, limit)))
+        return _cached(('workouts', since, until, limit), session, owned, query)
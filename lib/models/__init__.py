@@ -1,11 +1,158 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker, Session as OrmSession
 from sqlalchemy.ext.declarative import declarative_base
 
-DATABASE_URL = "sqlite:///fitness_tracker.db"
+# Engine settings come from the environment:
+#   FITNESS_TRACKER_DATABASE_URL    database URL (default sqlite:///fitness_tracker.db)
+#   FITNESS_TRACKER_DB_POOL_SIZE    connection pool size (default: SQLAlchemy's)
+#   FITNESS_TRACKER_DB_ECHO         1/true to log every statement
+#   FITNESS_TRACKER_SQLITE_PROFILE  "tuned" (default) applies SQLITE_PRAGMAS on connect, "default" leaves SQLite alone
+# Foreign keys are switched on for every SQLite connection whatever the profile: the
+# user_workouts cascades depend on them.
+DATABASE_URL = os.environ.get("FITNESS_TRACKER_DATABASE_URL", "sqlite:///fitness_tracker.db")
+DB_POOL_SIZE = os.environ.get("FITNESS_TRACKER_DB_POOL_SIZE")
+DB_ECHO = os.environ.get("FITNESS_TRACKER_DB_ECHO", "").lower() in ("1", "true", "yes")
+SQLITE_PROFILE = os.environ.get("FITNESS_TRACKER_SQLITE_PROFILE", "tuned")
+
+# WAL lets readers run alongside the writer, and synchronous=NORMAL is durable in WAL
+# mode while fsyncing only at checkpoints. Sizes can be overridden per pragma with
+# FITNESS_TRACKER_SQLITE_<NAME>, e.g. FITNESS_TRACKER_SQLITE_MMAP_SIZE=0.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # negative means KiB, so 64 MiB
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
+for _name in SQLITE_PRAGMAS:
+    _override = os.environ.get(f"FITNESS_TRACKER_SQLITE_{_name.upper()}")
+    if _override is not None:
+        SQLITE_PRAGMAS[_name] = _override
+
+def _engine_options():
+    from lib.instrumentation import CountingConnection
+
+    options = {"echo": DB_ECHO}
+    if DB_POOL_SIZE:
+        options["pool_size"] = int(DB_POOL_SIZE)
+    if DATABASE_URL.startswith("sqlite"):
+        # Lets lib.instrumentation count the rows each SELECT hands back.
+        options["connect_args"] = {"factory": CountingConnection}
+    return options
+
+# The engine is built on first database access rather than at import, so tools that
+# only import the models (the CLI drawing its menus, argparse --help) never pay for it.
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                from lib.instrumentation import instrument_engine
+
+                engine = create_engine(DATABASE_URL, **_engine_options())
+                event.listen(engine, "connect", _apply_sqlite_pragmas)
+                instrument_engine(engine)
+                _engine = engine
+    return _engine
+
+def __getattr__(name):
+    # `from lib.models.__init__ import engine` keeps working; it just builds the engine then.
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    if get_engine().dialect.name != "sqlite":
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA foreign_keys=ON")
+        if SQLITE_PROFILE != "tuned":
+            return
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+def get_sqlite_pragmas():
+    """Returns the pragma values in effect on a pooled connection, keyed by pragma name."""
+    engine = get_engine()
+    if engine.dialect.name != "sqlite":
+        return {}
+    with engine.connect() as connection:
+        return {
+            name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in ("foreign_keys", *SQLITE_PRAGMAS)
+        }
+
+class LazyBindSession(OrmSession):
+    """A Session that binds to get_engine() on first use unless given another bind."""
+
+    def get_bind(self, *args, **kwargs):
+        if self.bind is None:
+            self.bind = get_engine()
+        return super().get_bind(*args, **kwargs)
+
+Session = sessionmaker(class_=LazyBindSession)
+
+Base = declarative_base()
+
+_ambient_session = ContextVar('ambient_session', default=None)
+
+@contextmanager
+def session_scope():
+    """
+    Runs every helper called inside the block on one session, one connection and
+    one transaction. Commits when the block exits cleanly and rolls back if it raises.
+    A nested session_scope joins the outer one.
+    """
+    session = _ambient_session.get()
+    if session is not None:
+        yield session
+        return
+
+    session = Session()
+    token = _ambient_session.set(session)
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        _ambient_session.reset(token)
+        session.close()
 
-engine = create_engine(DATABASE_URL, echo=False)
+@contextmanager
+def helper_session(session=None):
+    """
+    Yields (session, owned) for a helper call. An explicit session or the ambient
+    session_scope is shared and left open; otherwise a private session is created
+    and closed afterwards, and owned is True so the helper commits it itself.
+    """
+    shared = session if session is not None else _ambient_session.get()
+    if shared is not None:
+        yield shared, False
+        return
 
-Session = sessionmaker(bind=engine)
+    session = Session()
+    try:
+        yield session, True
+    finally:
+        session.close()
 
-Base = declarative_base()
\ No newline at end of file
+def commit_or_flush(session, owned):
+    """Commits a helper's own session; inside a shared scope only flushes, leaving the commit to the scope."""
+    if owned:
+        session.commit()
+    else:
+        session.flush()
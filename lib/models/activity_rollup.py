@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Index
+from lib.models.__init__ import Base
+
+# Per-user training totals, kept in step with user_workouts by lib/rollups.py.
+
+class UserDailyActivity(Base):
+    __tablename__ = 'user_daily_activity'
+    __table_args__ = (
+        # every user's days in a date range, for the leaderboards in lib/leaderboards.py
+        Index('ix_user_daily_activity_day', 'day'),
+    )
+
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    day = Column(Date, primary_key=True)
+    sessions = Column(Integer, nullable=False, default=0)
+    minutes = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return (f"<UserDailyActivity(user_id={self.user_id}, day={self.day}, "
+                f"sessions={self.sessions}, minutes={self.minutes})>")
+
+class UserWeeklyActivity(Base):
+    __tablename__ = 'user_weekly_activity'
+
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    week = Column(String, primary_key=True)  # ISO week, e.g. '2025-W22'
+    sessions = Column(Integer, nullable=False, default=0)
+    minutes = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return (f"<UserWeeklyActivity(user_id={self.user_id}, week='{self.week}', "
+                f"sessions={self.sessions}, minutes={self.minutes})>")
+
+class UserMonthlyActivity(Base):
+    __tablename__ = 'user_monthly_activity'
+
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    month = Column(String, primary_key=True)  # e.g. '2025-06'
+    sessions = Column(Integer, nullable=False, default=0)
+    minutes = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return (f"<UserMonthlyActivity(user_id={self.user_id}, month='{self.month}', "
+                f"sessions={self.sessions}, minutes={self.minutes})>")
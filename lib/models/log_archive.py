@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, DateTime
+from lib.models.__init__ import Base
+
+# One row per archive table (user_workouts_archive_<year>) written by lib/archive.py.
+# The hot/cold boundary is the latest archived_before: every log completed before it
+# has been moved out of user_workouts (see lib.archive.archive_workout_logs).
+
+class LogArchive(Base):
+    __tablename__ = 'log_archives'
+
+    year = Column(Integer, primary_key=True)
+    archived_before = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<LogArchive(year={self.year}, archived_before={self.archived_before.strftime('%Y-%m-%d %H:%M')})>"
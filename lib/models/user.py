@@ -1,7 +1,7 @@
 from sqlalchemy import Column, Integer, String
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.associationproxy import association_proxy
-from .__init__ import Base, Session, engine
+from .__init__ import Base, Session, get_engine
 from .user_workout import UserWorkout
 class User(Base):
     __tablename__ = 'users'
@@ -10,7 +10,8 @@ class User(Base):
     name = Column(String, nullable=False)
     email = Column(String, unique=True, nullable=False)
 
-    user_workouts = relationship('UserWorkout', back_populates='user', cascade='all, delete-orphan')
+    user_workouts = relationship('UserWorkout', back_populates='user', cascade='all, delete-orphan',
+                                 passive_deletes=True)
 
     workouts = association_proxy('user_workouts', 'workout')
 
@@ -19,7 +20,7 @@ class User(Base):
 
 if __name__ == "__main__":
     from .workout import Workout
-    Base.metadata.create_all(engine)
+    Base.metadata.create_all(get_engine())
     print("User table created successfully!")
 
     session = Session()
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey
+from lib.models.__init__ import Base
+
+# Consecutive-active-day streaks per user, kept in step with user_workouts by lib/streaks.py.
+# current_streak is the run of days ending at last_active_day; it only counts as current
+# while last_active_day is today or yesterday (see lib.streaks.get_user_streak).
+
+class UserStreak(Base):
+    __tablename__ = 'user_streaks'
+
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    current_streak = Column(Integer, nullable=False, default=0)
+    longest_streak = Column(Integer, nullable=False, default=0)
+    last_active_day = Column(Date, nullable=True)
+
+    def __repr__(self):
+        return (f"<UserStreak(user_id={self.user_id}, current_streak={self.current_streak}, "
+                f"longest_streak={self.longest_streak}, last_active_day={self.last_active_day})>")
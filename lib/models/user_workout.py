@@ -1,14 +1,34 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, String
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Date, String, Index, Computed
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from lib.models.__init__ import Base
 
 class UserWorkout(Base):
     __tablename__ = 'user_workouts'
+    __table_args__ = (
+        # get_user_workouts and per-user date ranges
+        Index('ix_user_workouts_user_id_completion_date', 'user_id', 'completion_date'),
+        # One log per user, workout and day; log_user_workout's ON CONFLICT target
+        Index('uq_user_workouts_user_id_workout_id_completion_day', 'user_id', 'workout_id', 'completion_day',
+              unique=True),
+        # per-user, per-workout date ranges
+        Index('ix_user_workouts_user_id_workout_id_completion_date', 'user_id', 'workout_id', 'completion_date'),
+        # workout participants grouped by user in keyset order, and the workouts.id cascade
+        Index('ix_user_workouts_workout_id_user_id_completion_date', 'workout_id', 'user_id', 'completion_date'),
+        # get_all_workout_logs' ORDER BY completion_date DESC
+        Index('ix_user_workouts_completion_date', 'completion_date'),
+        # Ids are never reused, so a log moved to an archive table (lib/archive.py) keeps a unique id
+        {'sqlite_autoincrement': True},
+    )
+
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey('users.id'))
-    workout_id = Column(Integer, ForeignKey('workouts.id'))
+    # ON DELETE CASCADE: deleting a user or workout removes its logs in the same statement
+    # (SQLite runs the FTS triggers for them too); see passive_deletes on User and Workout.
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'))
+    workout_id = Column(Integer, ForeignKey('workouts.id', ondelete='CASCADE'))
     completion_date = Column(DateTime, default=datetime.now)
+    # Stored generated column, so every insert path (ORM, Core, bulk loads, raw SQL) fills it.
+    completion_day = Column(Date, Computed("date(completion_date)", persisted=True))
     notes = Column(String)
 
     user = relationship("User", back_populates="user_workouts")
@@ -18,11 +38,12 @@ class UserWorkout(Base):
         user_name = "N/A"
         workout_activity = "N/A"
 
-        if hasattr(self, 'user') and self.user is not None and 'user' in self.__dict__:
+        # Check __dict__ first so a detached instance never attempts a lazy load.
+        if 'user' in self.__dict__ and self.user is not None:
             user_name = self.user.name
         
-        if hasattr(self, 'workout') and self.workout is not None and 'workout' in self.__dict__:
+        if 'workout' in self.__dict__ and self.workout is not None:
             workout_activity = self.workout.activity
 
         return (f"<UserWorkout(id={self.id}, User='{user_name}', Workout='{workout_activity}', "
-                f"Date={self.completion_date.strftime('%Y-%m-%d %H:%M')}, Notes='{self.notes or 'N/A'}')>")
\ No newline at end of file
+                f"Date={self.completion_date.strftime('%Y-%m-%d %H:%M')}, Notes='{self.notes or 'N/A'}')>")
@@ -1,8 +1,8 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, DateTime
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy.ext.associationproxy import association_proxy
-from .__init__ import Base, Session, engine
+from .__init__ import Base, Session, get_engine
 from .user_workout import UserWorkout
 
 class Workout(Base):
@@ -13,7 +13,8 @@ class Workout(Base):
     duration_minutes = Column(Integer, nullable=False)
     timestamp = Column(DateTime, default=func.now())
 
-    user_workouts = relationship('UserWorkout', back_populates='workout', cascade='all, delete-orphan')
+    user_workouts = relationship('UserWorkout', back_populates='workout', cascade='all, delete-orphan',
+                                 passive_deletes=True)
 
     users = association_proxy('user_workouts', 'user')
 
@@ -24,7 +25,7 @@ class Workout(Base):
 if __name__ == "__main__":
     from .user import User
 
-    Base.metadata.create_all(engine)
+    Base.metadata.create_all(get_engine())
     print("Workout table created successfully!")
 
     session = Session()
@@ -0,0 +1,190 @@
+# lib/reports.py
+import argparse
+import csv
+import heapq
+import multiprocessing
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from itertools import groupby
+from typing import NamedTuple, Optional
+from sqlalchemy import create_engine, make_url, select
+from lib.models.__init__ import DATABASE_URL, Session
+from lib.models.user import User
+from lib.models.workout import Workout
+from lib.archive import log_arms
+from lib.rollups import month_key
+
+# Per-user monthly summaries for every user, generated in parallel:
+#
+#     python -m lib.reports monthly.csv --workers 4
+#     python -m lib.reports --scaling            # time 1..cpu_count workers
+#
+# The user id space is cut into ranges of about the same number of users, several per
+# worker since activity is heavily skewed. Each worker process opens its own read-only
+# connection to the database file, streams its range's logs in (user_id, completion_date)
+# order straight off the indexes and folds them into summaries. The parent collects the
+# ranges in order, so the output is the same for any number of workers.
+REPORT_CHUNK_SIZE = 5000
+RANGES_PER_WORKER = 4
+
+class MonthlySummary(NamedTuple):
+    user_id: int
+    name: str
+    month: str  # e.g. '2025-06', as in user_monthly_activity
+    sessions: int
+    minutes: int
+    active_days: int
+    longest_streak: int  # consecutive active days within the month
+    top_activity: Optional[str]
+
+def _longest_run(days):
+    longest = run = 1
+    for previous, day in zip(days, days[1:]):
+        run = run + 1 if day == previous + timedelta(days=1) else 1
+        longest = max(longest, run)
+    return longest
+
+def summarize_month(user_id, name, month, logs):
+    """Folds one user's (completion_date, activity, minutes) logs for a month, in date order."""
+    days = sorted({completed.date() for completed, _, _ in logs})
+    activities = Counter(activity for _, activity, _ in logs)
+    return MonthlySummary(
+        user_id, name, month, len(logs), sum(minutes or 0 for _, _, minutes in logs),
+        len(days), _longest_run(days), activities.most_common(1)[0][0] if activities else None
+    )
+
+def _user_logs(session, first_id, last_id):
+    """Streams (user_id, completion_date, activity, minutes) for a user id range, in (user_id, completion_date) order."""
+    streams = []
+    for arm in log_arms(session):
+        logs = arm.entity
+        query = (
+            select(logs.user_id, logs.completion_date, Workout.activity, Workout.duration_minutes)
+            .join(Workout, Workout.id == logs.workout_id)
+            .where(logs.user_id.between(first_id, last_id), logs.completion_date.isnot(None))
+            .order_by(logs.user_id, logs.completion_date)
+            .execution_options(yield_per=REPORT_CHUNK_SIZE)
+        )
+        streams.append(map(tuple, session.execute(query)))
+    return heapq.merge(*streams)
+
+def summarize_users(session, first_id, last_id):
+    """Monthly summaries for users first_id..last_id, in (user_id, month) order."""
+    names = dict(session.execute(select(User.id, User.name).where(User.id.between(first_id, last_id))).all())
+    summaries = []
+    for user_id, user_logs in groupby(_user_logs(session, first_id, last_id), key=lambda log: log[0]):
+        name = names.get(user_id)
+        if name is None:
+            continue
+        for month, month_logs in groupby(user_logs, key=lambda log: month_key(log[1])):
+            summaries.append(summarize_month(user_id, name, month, [log[1:] for log in month_logs]))
+    return summaries
+
+def user_id_ranges(session, count):
+    """Cuts the user ids into up to `count` (first_id, last_id) ranges of about equal size."""
+    ids = session.execute(select(User.id).order_by(User.id)).scalars().all()
+    if not ids:
+        return []
+    size = -(-len(ids) // count)
+    return [(ids[start], ids[min(start + size, len(ids)) - 1]) for start in range(0, len(ids), size)]
+
+def _database_path(url):
+    url = make_url(url)
+    if url.get_backend_name() != 'sqlite' or not url.database or url.database == ':memory:':
+        raise ValueError(f"Parallel reports need an SQLite database file, not '{url}'.")
+    return os.path.abspath(url.database)
+
+def _read_only_engine(path):
+    return create_engine(f"sqlite:///file:{path}?mode=ro&uri=true")
+
+_worker_engine = None
+
+def _init_worker(path):
+    global _worker_engine
+    _worker_engine = _read_only_engine(path)
+
+def _summarize_range(id_range):
+    session = Session(bind=_worker_engine)
+    try:
+        return summarize_users(session, *id_range)
+    finally:
+        session.close()
+
+def monthly_summaries(workers=None, url=DATABASE_URL):
+    """
+    Monthly summaries for every user, in (user_id, month) order, computed by `workers`
+    processes (default: one per CPU) over ranges of user ids.
+    """
+    workers = workers or os.cpu_count() or 1
+    path = _database_path(url)
+    engine = _read_only_engine(path)
+    session = Session(bind=engine)
+    try:
+        ranges = user_id_ranges(session, workers * RANGES_PER_WORKER)
+        if workers == 1:
+            return [summary for id_range in ranges for summary in summarize_users(session, *id_range)]
+    finally:
+        session.close()
+        engine.dispose()
+    # Forked workers would inherit the parent's pooled connections; spawned ones start clean.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker, initargs=(path,)) as pool:
+        return [summary for summaries in pool.map(_summarize_range, ranges) for summary in summaries]
+
+def write_summaries(summaries, path):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(MonthlySummary._fields)
+        writer.writerows(summaries)
+
+def _per_user_baseline():
+    # The way this report used to be produced: get_user_workouts once per user.
+    from lib import helpers
+
+    summaries = []
+    for user in helpers.get_all_users(as_rows=True):
+        logs = [log for log in reversed(helpers.get_user_workouts(user.id)) if log.completion_date is not None]
+        for month, month_logs in groupby(logs, key=lambda log: month_key(log.completion_date)):
+            summaries.append(summarize_month(user.id, user.name, month, [
+                (log.completion_date, log.workout.activity, log.workout.duration_minutes) for log in month_logs
+            ]))
+    return summaries
+
+def _scaling(max_workers):
+    def timed(label, run):
+        started = time.perf_counter()
+        summaries = run()
+        elapsed = time.perf_counter() - started
+        print(f"{label:<34}{elapsed:>8.2f} s   {len(summaries)} summaries")
+        return elapsed, summaries
+
+    print(f"{os.cpu_count()} CPUs:")
+    baseline, expected = timed("get_user_workouts per user", _per_user_baseline)
+    for workers in range(1, max_workers + 1):
+        elapsed, summaries = timed(f"{workers} worker(s)", lambda: monthly_summaries(workers))
+        match = "same output" if summaries == expected else "OUTPUT DIFFERS"
+        print(f"{'':<34}{baseline / elapsed:>8.2f}x the per-user baseline, {match}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write every user's monthly workout summaries.")
+    parser.add_argument('output', nargs='?', help="CSV file to write")
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument('--scaling', action='store_true',
+                        help="time the per-user baseline and 1..--workers processes instead")
+    args = parser.parse_args(argv)
+
+    if args.scaling:
+        _scaling(args.workers or os.cpu_count() or 1)
+        return
+    if not args.output:
+        parser.error("an output file is required unless --scaling is given")
+    started = time.perf_counter()
+    summaries = monthly_summaries(args.workers)
+    write_summaries(summaries, args.output)
+    print(f"Wrote {len(summaries)} monthly summaries to {args.output} in {time.perf_counter() - started:.1f}s.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# lib/rollups.py
+from collections import defaultdict
+from datetime import date, datetime
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from lib.models.__init__ import helper_session, commit_or_flush
+from lib.models.user_workout import UserWorkout
+from lib.models.workout import Workout
+from lib.models.activity_rollup import UserDailyActivity, UserWeeklyActivity, UserMonthlyActivity
+from lib.archive import log_source
+from lib.cache import invalidate_leaderboards
+
+ROLLUP_CHUNK_SIZE = 1000
+
+PERIODS = {
+    'day': (UserDailyActivity, 'day'),
+    'week': (UserWeeklyActivity, 'week'),
+    'month': (UserMonthlyActivity, 'month'),
+}
+
+def week_key(day):
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+def month_key(day):
+    return day.strftime('%Y-%m')
+
+def period_key(period, day):
+    if isinstance(day, datetime):
+        day = day.date()
+    if period == 'day':
+        return day
+    if period == 'week':
+        return week_key(day)
+    if period == 'month':
+        return month_key(day)
+    raise ValueError(f"Unknown period '{period}', expected one of {', '.join(PERIODS)}.")
+
+def apply_rollup_deltas(session, deltas):
+    """
+    Adds (user_id, day, sessions, minutes) changes to the day, week and month rollups
+    with one upsert per table, then drops buckets left with no sessions.
+    Runs in the caller's transaction.
+    """
+    # Every change to the logs passes through here, so the leaderboards built on these
+    # tables are dropped with it.
+    invalidate_leaderboards(session)
+    buckets = {period: defaultdict(lambda: [0, 0]) for period in PERIODS}
+    for user_id, day, sessions, minutes in deltas:
+        for period, period_buckets in buckets.items():
+            bucket = period_buckets[(user_id, period_key(period, day))]
+            bucket[0] += sessions
+            bucket[1] += minutes
+
+    for period, (model, key_name) in PERIODS.items():
+        rows = [
+            {'user_id': user_id, key_name: key, 'sessions': sessions, 'minutes': minutes}
+            for (user_id, key), (sessions, minutes) in buckets[period].items()
+            if sessions or minutes
+        ]
+        if not rows:
+            continue
+        table = model.__table__
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c[key_name]],
+            set_={
+                'sessions': table.c.sessions + stmt.excluded.sessions,
+                'minutes': table.c.minutes + stmt.excluded.minutes,
+            }
+        )
+        session.execute(stmt, rows)
+        session.execute(delete(table).where(
+            table.c.user_id.in_({row['user_id'] for row in rows}),
+            table.c.sessions <= 0
+        ))
+
+def rollup_log_added(session, user_id, completion_date, duration_minutes):
+    apply_rollup_deltas(session, [(user_id, completion_date, 1, duration_minutes)])
+
+def rollup_log_removed(session, user_id, completion_date, duration_minutes):
+    apply_rollup_deltas(session, [(user_id, completion_date, -1, -duration_minutes)])
+
+def _workout_day_counts(session, workout_id):
+    logs = log_source(session)
+    day = func.date(logs.completion_date)
+    return session.execute(
+        select(logs.user_id, day, func.count())
+        .where(logs.workout_id == workout_id, logs.completion_date.isnot(None))
+        .group_by(logs.user_id, day)
+    ).all()
+
+def rollup_workout_removed(session, workout_id, duration_minutes):
+    """Call before the workout's logs are deleted."""
+    apply_rollup_deltas(session, [
+        (user_id, date.fromisoformat(day), -count, -count * duration_minutes)
+        for user_id, day, count in _workout_day_counts(session, workout_id)
+    ])
+
+def rollup_workout_duration_changed(session, workout_id, old_duration, new_duration):
+    if old_duration == new_duration:
+        return
+    apply_rollup_deltas(session, [
+        (user_id, date.fromisoformat(day), 0, count * (new_duration - old_duration))
+        for user_id, day, count in _workout_day_counts(session, workout_id)
+    ])
+
+def rollup_logs_removed(session, *conditions, logs=UserWorkout):
+    """
+    Call before a set-based delete of the logs matching conditions (column expressions on
+    logs, UserWorkout or an archive arm's entity). Subtracts them in one GROUP BY and
+    returns the affected user ids.
+    """
+    day = func.date(logs.completion_date)
+    removed = session.execute(
+        select(logs.user_id, day, func.count(), func.sum(Workout.duration_minutes))
+        .join(Workout, Workout.id == logs.workout_id)
+        .where(logs.completion_date.isnot(None), *conditions)
+        .group_by(logs.user_id, day)
+    ).all()
+    apply_rollup_deltas(session, [
+        (user_id, date.fromisoformat(day_value), -count, -(minutes or 0))
+        for user_id, day_value, count, minutes in removed
+    ])
+    return {user_id for user_id, _, _, _ in removed}
+
+def rollup_user_removed(session, user_id):
+    invalidate_leaderboards(session)
+    for model, _ in PERIODS.values():
+        session.execute(delete(model.__table__).where(model.__table__.c.user_id == user_id))
+
+def rebuild_rollups(session=None):
+    """
+    Recomputes every rollup table from user_workouts and its archive, one day-level
+    GROUP BY streamed in chunks.
+    """
+    with helper_session(session) as (session, owned):
+        try:
+            for model, _ in PERIODS.values():
+                session.execute(delete(model.__table__))
+
+            logs = log_source(session)
+            day = func.date(logs.completion_date)
+            daily = session.execute(
+                select(logs.user_id, day, func.count(), func.sum(Workout.duration_minutes))
+                .join(Workout, Workout.id == logs.workout_id)
+                .where(logs.completion_date.isnot(None))
+                .group_by(logs.user_id, day)
+                .execution_options(yield_per=ROLLUP_CHUNK_SIZE)
+            )
+            day_rows = 0
+            for chunk in daily.partitions():
+                apply_rollup_deltas(session, [
+                    (user_id, date.fromisoformat(day_value), count, minutes or 0)
+                    for user_id, day_value, count, minutes in chunk
+                ])
+                day_rows += len(chunk)
+
+            commit_or_flush(session, owned)
+            print(f"Activity rollups rebuilt from {day_rows} user-days.")
+            return day_rows
+        except Exception as e:
+            if not owned:
+                raise
+            session.rollback()
+            print(f"Error rebuilding activity rollups: {e}")
+            return None
+
+def get_user_activity(user_id, period='week', since=None, until=None, session=None):
+    """
+    Returns [(period_key, sessions, minutes), ...] oldest first. since/until are
+    dates (or datetimes) and select the periods containing them, inclusive.
+    """
+    model, key_name = PERIODS[period]
+    key_column = getattr(model, key_name)
+    with helper_session(session) as (session, owned):
+        query = select(key_column, model.sessions, model.minutes).where(model.user_id == user_id)
+        if since is not None:
+            query = query.where(key_column >= period_key(period, since))
+        if until is not None:
+            query = query.where(key_column <= period_key(period, until))
+        return [tuple(row) for row in session.execute(query.order_by(key_column))]
+
+def get_user_activity_totals(user_id, period='week', when=None, session=None):
+    """Returns (sessions, minutes) for the day, ISO week or month containing `when` (default today)."""
+    model, key_name = PERIODS[period]
+    key = period_key(period, when or date.today())
+    with helper_session(session) as (session, owned):
+        row = session.execute(
+            select(model.sessions, model.minutes)
+            .where(model.user_id == user_id, getattr(model, key_name) == key)
+        ).first()
+        return tuple(row) if row else (0, 0)
+
+if __name__ == "__main__":
+    from lib.models.__init__ import Base, get_engine
+
+    Base.metadata.create_all(get_engine())
+    rebuild_rollups()
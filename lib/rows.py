@@ -0,0 +1,77 @@
+# lib/rows.py
+from datetime import datetime
+from typing import NamedTuple, Optional
+from sqlalchemy import select, func
+from lib.models.user import User
+from lib.models.workout import Workout
+from lib.models.user_workout import UserWorkout
+from lib.cache import UserSnapshot, WorkoutSnapshot
+
+# Plain-tuple results for the read helpers' as_rows=True mode. They are selected column by
+# column through Core, so no ORM instances, identity map or joinedload de-duplication are
+# involved. Users and workouts come back as the same snapshot types find_user_by_id and
+# find_workout_by_id return.
+UserRow = UserSnapshot
+WorkoutRow = WorkoutSnapshot
+
+class LogRow(NamedTuple):
+    id: int
+    user_id: int
+    user_name: Optional[str]
+    workout_id: int
+    activity: Optional[str]
+    duration_minutes: Optional[int]
+    completion_date: Optional[datetime]
+    notes: Optional[str]
+
+    def __repr__(self):
+        date_text = self.completion_date.strftime('%Y-%m-%d %H:%M') if self.completion_date else 'N/A'
+        return (f"<UserWorkout(id={self.id}, User='{self.user_name or 'N/A'}', "
+                f"Workout='{self.activity or 'N/A'}', Date={date_text}, Notes='{self.notes or 'N/A'}')>")
+
+class ParticipantRow(NamedTuple):
+    user_id: int
+    name: str
+    email: str
+    sessions: int
+    last_completed: Optional[datetime]
+
+    def __repr__(self):
+        date_text = self.last_completed.strftime('%Y-%m-%d') if self.last_completed else 'N/A'
+        return (f"<Participant(user_id={self.user_id}, name='{self.name}', "
+                f"sessions={self.sessions}, last_completed={date_text})>")
+
+def user_rows_select():
+    return select(User.id, User.name, User.email)
+
+def workout_rows_select():
+    return select(Workout.id, Workout.activity, Workout.duration_minutes, Workout.timestamp)
+
+# logs is UserWorkout or a stand-in for it from lib.archive (log_arms, log_source).
+def log_rows_select(logs=UserWorkout):
+    return (
+        select(logs.id, logs.user_id, User.name, logs.workout_id,
+               Workout.activity, Workout.duration_minutes, logs.completion_date, logs.notes)
+        .outerjoin(User, User.id == logs.user_id)
+        .outerjoin(Workout, Workout.id == logs.workout_id)
+    )
+
+def participant_rows_select(workout_id, logs=UserWorkout):
+    # Grouped in user_id order straight off ix_user_workouts_workout_id_user_id_completion_date,
+    # so a LIMIT stops the scan after the page's users.
+    return (
+        select(logs.user_id, User.name, User.email,
+               func.count(logs.id), func.max(logs.completion_date))
+        .join(User, User.id == logs.user_id)
+        .where(logs.workout_id == workout_id)
+        .group_by(logs.user_id)
+        .order_by(logs.user_id)
+    )
+
+def fetch_rows(session, statement, row_type):
+    return list(map(row_type._make, session.execute(statement)))
+
+def iter_rows(session, statement, row_type, batch_size):
+    result = session.execute(statement.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        yield from map(row_type._make, partition)
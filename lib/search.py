@@ -0,0 +1,164 @@
+# lib/search.py
+import re
+from sqlalchemy import event, select, text
+from sqlalchemy.orm import joinedload, selectinload
+from lib.models.__init__ import Base, helper_session
+from lib.instrumentation import instrumented
+from lib.models.user import User
+from lib.models.user_workout import UserWorkout
+from lib.archive import log_arms
+
+# External-content FTS5 indexes over users(name, email) and user_workouts(notes).
+# The triggers keep them in step with every INSERT, UPDATE and DELETE, including
+# ones issued outside the helpers. Logs moved to the archive tables (lib/archive.py)
+# leave the notes index; search_workout_notes(include_archived=True) scans them instead.
+SEARCH_INDEX_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5("
+    "name, email, content='users', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS users_fts_ai AFTER INSERT ON users BEGIN "
+    "INSERT INTO users_fts(rowid, name, email) VALUES (new.id, new.name, new.email); END",
+    "CREATE TRIGGER IF NOT EXISTS users_fts_ad AFTER DELETE ON users BEGIN "
+    "INSERT INTO users_fts(users_fts, rowid, name, email) VALUES ('delete', old.id, old.name, old.email); END",
+    "CREATE TRIGGER IF NOT EXISTS users_fts_au AFTER UPDATE ON users BEGIN "
+    "INSERT INTO users_fts(users_fts, rowid, name, email) VALUES ('delete', old.id, old.name, old.email); "
+    "INSERT INTO users_fts(rowid, name, email) VALUES (new.id, new.name, new.email); END",
+
+    "CREATE VIRTUAL TABLE IF NOT EXISTS user_workouts_fts USING fts5("
+    "notes, content='user_workouts', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS user_workouts_fts_ai AFTER INSERT ON user_workouts BEGIN "
+    "INSERT INTO user_workouts_fts(rowid, notes) VALUES (new.id, new.notes); END",
+    "CREATE TRIGGER IF NOT EXISTS user_workouts_fts_ad AFTER DELETE ON user_workouts BEGIN "
+    "INSERT INTO user_workouts_fts(user_workouts_fts, rowid, notes) VALUES ('delete', old.id, old.notes); END",
+    "CREATE TRIGGER IF NOT EXISTS user_workouts_fts_au AFTER UPDATE OF notes ON user_workouts BEGIN "
+    "INSERT INTO user_workouts_fts(user_workouts_fts, rowid, notes) VALUES ('delete', old.id, old.notes); "
+    "INSERT INTO user_workouts_fts(rowid, notes) VALUES (new.id, new.notes); END",
+]
+
+SEARCH_INDEX_TABLES = ('users_fts', 'user_workouts_fts')
+SEARCH_INDEX_TRIGGERS = ('users_fts_ai', 'users_fts_ad', 'users_fts_au',
+                         'user_workouts_fts_ai', 'user_workouts_fts_ad', 'user_workouts_fts_au')
+
+def fts5_available(connection):
+    if connection.dialect.name != 'sqlite':
+        return False
+    try:
+        connection.exec_driver_sql("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+        connection.exec_driver_sql("DROP TABLE temp.fts5_probe")
+        return True
+    except Exception:
+        return False
+
+def install_search_index(connection, rebuild=True):
+    """Creates the FTS5 tables and triggers if this SQLite build has FTS5. Returns whether it did."""
+    if not fts5_available(connection):
+        return False
+    for statement in SEARCH_INDEX_DDL:
+        connection.exec_driver_sql(statement)
+    if rebuild:
+        for table in SEARCH_INDEX_TABLES:
+            connection.exec_driver_sql(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+    return True
+
+def drop_search_triggers(connection):
+    """Stops index maintenance, e.g. for a bulk load; install_search_index restores and rebuilds it."""
+    for trigger in SEARCH_INDEX_TRIGGERS:
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+
+@event.listens_for(Base.metadata, 'after_create')
+def _install_search_index_after_create(target, connection, **kw):
+    install_search_index(connection)
+
+def search_index_ready(session, table='users_fts'):
+    if session.get_bind().dialect.name != 'sqlite':
+        return False
+    return session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': table}
+    ).first() is not None
+
+def _prefix_match(query):
+    # Quote every term so user input can't inject FTS5 syntax, and prefix-match each one.
+    return ' '.join(f'"{term}"*' for term in re.findall(r'\w+', query))
+
+@instrumented
+def search_users(query, limit=20, session=None):
+    """
+    Ranked prefix search over user names and emails ("ali" finds Alice, "gmail" finds
+    every @gmail.com address). Falls back to find_user_by_name's LIKE scan when the
+    FTS5 index is unavailable.
+    """
+    match = _prefix_match(query)
+    if not match:
+        return []
+    with helper_session(session) as (session, owned):
+        if search_index_ready(session, 'users_fts'):
+            users = session.scalars(
+                select(User).from_statement(text(
+                    "SELECT users.* FROM users_fts JOIN users ON users.id = users_fts.rowid "
+                    "WHERE users_fts MATCH :match ORDER BY users_fts.rank LIMIT :limit"
+                )),
+                {'match': match, 'limit': limit}
+            ).all()
+        else:
+            users = session.query(User).filter(User.name.ilike(f'%{query}%')).limit(limit).all()
+        for user in users:
+            _ = user.id
+        return users
+
+def _archived_note_matches(session, terms, limit):
+    # Archive tables have no FTS index: every term must appear in the notes (LIKE), and
+    # matches come newest first. An archive arm's user and workout are loaded by id, as
+    # in lib.helpers._log_query, and the logs are handed back detached and read-only.
+    logs = []
+    for arm in log_arms(session)[1:]:
+        if len(logs) >= limit:
+            break
+        entity = arm.entity
+        logs.extend(
+            session.query(entity)
+            .options(selectinload(entity.user), selectinload(entity.workout))
+            .filter(*(entity.notes.ilike(f"%{term.replace('_', '/_')}%", escape='/') for term in terms))
+            .order_by(entity.completion_date.desc(), entity.id.desc())
+            .limit(limit - len(logs))
+        )
+    for log_entry in logs:
+        session.expunge(log_entry)
+    return logs
+
+@instrumented
+def search_workout_notes(query, limit=20, include_archived=False, session=None):
+    """
+    Ranked prefix search over workout-log notes, returning logs with their user and
+    workout loaded. Falls back to a LIKE scan when the FTS5 index is unavailable.
+
+    Only user_workouts is indexed, so archived logs are left out by default. With
+    include_archived=True, any room left under `limit` is filled from the archive
+    tables, unranked and newest first, by a substring scan.
+    """
+    match = _prefix_match(query)
+    if not match:
+        return []
+    with helper_session(session) as (session, owned):
+        logs_query = session.query(UserWorkout).options(
+            joinedload(UserWorkout.user),
+            joinedload(UserWorkout.workout)
+        )
+        if search_index_ready(session, 'user_workouts_fts'):
+            ranked_ids = session.execute(
+                text(
+                    "SELECT rowid FROM user_workouts_fts WHERE user_workouts_fts MATCH :match "
+                    "ORDER BY rank LIMIT :limit"
+                ),
+                {'match': match, 'limit': limit}
+            ).scalars().all()
+            logs_by_id = {log_entry.id: log_entry
+                          for log_entry in logs_query.filter(UserWorkout.id.in_(ranked_ids))}
+            logs = [logs_by_id[log_id] for log_id in ranked_ids if log_id in logs_by_id]
+        else:
+            logs = logs_query.filter(UserWorkout.notes.ilike(f'%{query}%')).order_by(
+                UserWorkout.completion_date.desc()
+            ).limit(limit).all()
+        for log_entry in logs:
+            _ = log_entry.id
+        if include_archived and len(logs) < limit:
+            logs += _archived_note_matches(session, re.findall(r'\w+', query), limit - len(logs))
+        return logs
@@ -1,89 +1,149 @@
-from sqlalchemy.orm import sessionmaker
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
 import random
 
-from lib.models.__init__ import engine, Session, Base
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.pool import StaticPool
+
+from lib.models.__init__ import get_engine, Session, Base
 from lib.models.user import User
 from lib.models.workout import Workout
 from lib.models.user_workout import UserWorkout
+from lib.models.activity_rollup import UserDailyActivity, UserWeeklyActivity, UserMonthlyActivity
+from lib.models.user_streak import UserStreak
+from lib.models.log_archive import LogArchive
+from lib.rollups import rebuild_rollups
+from lib.streaks import rebuild_streaks
+from lib.cache import clear_caches
+from lib.datagen import insert_chunked
+from lib.search import install_search_index, drop_search_triggers  # also installs the FTS5 index on create_all
 
-def seed_database():
-    """
-    Populates the database with sample users, workouts, and associations.
-    """
-    Base.metadata.create_all(engine)
+USERS_DATA = [
+    {"name": "Alice", "email": "alice@gmail.com"},
+    {"name": "Bob", "email": "bob@gmail.com"},
+    {"name": "Charlie", "email": "charlie@gmail.com"},
+    {"name": "Diana", "email": "diana@gmail.com"},
+    {"name": "Eve", "email": "eve@gmail.com"},
+]
 
-    session = Session()
+WORKOUTS_DATA = [
+    {"activity": "Morning Run", "duration_minutes": 30},
+    {"activity": "Weightlifting (Upper)", "duration_minutes": 60},
+    {"activity": "Yoga Flow", "duration_minutes": 45},
+    {"activity": "Cycling (Outdoor)", "duration_minutes": 90},
+    {"activity": "HIIT Training", "duration_minutes": 25},
+    {"activity": "Swimming Laps", "duration_minutes": 40},
+    {"activity": "Weightlifting (Lower)", "duration_minutes": 75},
+    {"activity": "Meditation", "duration_minutes": 15},
+]
 
-    print("Seeding database...")
+NOTES_OPTIONS = ["Felt great!", "A bit tired today.", "Pushed hard!"]
+
+SEED_DAYS = 30
 
-    session.query(UserWorkout).delete()
-    session.query(Workout).delete()
-    session.query(User).delete()
-    session.commit()
-    print("Existing data cleared.")
-
-    users_data = [
-        {"name": "Alice", "email": "alice@gmail.com"},
-        {"name": "Bob", "email": "bob@gmail.com"},
-        {"name": "Charlie", "email": "charlie@gmail.com"},
-        {"name": "Diana", "email": "diana@gmail.com"},
-        {"name": "Eve", "email": "eve@gmail.com"},
-    ]
-    users = [User(**data) for data in users_data]
-    session.add_all(users)
-    session.commit()
-    print(f"Added {len(users)} users.")
-
-    workouts_data = [
-        {"activity": "Morning Run", "duration_minutes": 30},
-        {"activity": "Weightlifting (Upper)", "duration_minutes": 60},
-        {"activity": "Yoga Flow", "duration_minutes": 45},
-        {"activity": "Cycling (Outdoor)", "duration_minutes": 90},
-        {"activity": "HIIT Training", "duration_minutes": 25},
-        {"activity": "Swimming Laps", "duration_minutes": 40},
-        {"activity": "Weightlifting (Lower)", "duration_minutes": 75},
-        {"activity": "Meditation", "duration_minutes": 15},
-    ]
-    workouts = [Workout(**data) for data in workouts_data]
-    session.add_all(workouts)
-    session.commit()
-    print(f"Added {len(workouts)} workouts.")
-
-    print("Creating user-workout associations...")
-    start_date = datetime.now() - timedelta(days=30)
-
-    for user in users:
-        num_workouts = random.randint(2, 6)
-        selected_workouts = random.sample(workouts, num_workouts)
-
-        for workout in selected_workouts:
-            days_offset = random.randint(0, 29)
-            hours_offset = random.randint(0, 23)
-            minutes_offset = random.randint(0, 59)
-            completion_date = start_date + timedelta(days=days_offset, hours=hours_offset, minutes=minutes_offset)
-
-            notes = None
-            if random.random() < 0.3:
-                notes_options = [
-                    "Felt great!",
-                    "A bit tired today.",
-                    "Pushed hard!",
-                ]
-                notes = random.choice(notes_options)
-
-            association = UserWorkout(
-                user=user,
-                workout=workout,
-                completion_date=completion_date,
-                notes=notes
+# Children before parents, so a plain DELETE never trips a foreign key.
+SEED_TABLES = (LogArchive, UserStreak, UserDailyActivity, UserWeeklyActivity, UserMonthlyActivity, UserWorkout, Workout, User)
+
+# Seeded in-memory databases keyed by (users, logs_per_user); restored with SQLite's backup API.
+_templates = {}
+
+def _user_rows(users):
+    for i in range(users):
+        data = USERS_DATA[i] if i < len(USERS_DATA) else {"name": f"User {i + 1}", "email": f"user{i + 1}@gmail.com"}
+        yield {"id": i + 1, **data}
+
+def _log_rows(users, logs_per_user):
+    # Midnight, so a slot's random time of day never rolls it into the next day's slot.
+    start_date = datetime.combine(date.today() - timedelta(days=SEED_DAYS), time.min)
+    slots = len(WORKOUTS_DATA) * SEED_DAYS
+    low, high = logs_per_user
+    for user_id in range(1, users + 1):
+        # Distinct (workout, day) slots: one log per user, workout and day.
+        for slot in random.sample(range(slots), min(random.randint(low, high), slots)):
+            completion_date = start_date + timedelta(
+                days=slot // len(WORKOUTS_DATA), hours=random.randint(0, 23), minutes=random.randint(0, 59)
             )
-            session.add(association)
-    session.commit()
-    print("User-workout associations created.")
+            yield {
+                "user_id": user_id,
+                "workout_id": slot % len(WORKOUTS_DATA) + 1,
+                "completion_date": completion_date,
+                "notes": random.choice(NOTES_OPTIONS) if random.random() < 0.3 else None,
+            }
+
+def _load_seed_data(bind, users, logs_per_user):
+    """Clears the seed tables with plain DELETEs and refills them with chunked executemany."""
+    with bind.begin() as connection:
+        # Bulk load without the FTS triggers; install_search_index rebuilds the index once.
+        drop_search_triggers(connection)
+        for model in SEED_TABLES:
+            connection.execute(model.__table__.delete())
+        print("Existing data cleared.")
+
+        user_count = insert_chunked(connection, User.__table__, _user_rows(users))
+        print(f"Added {user_count} users.")
+        connection.execute(Workout.__table__.insert(), [
+            {"id": i + 1, **data} for i, data in enumerate(WORKOUTS_DATA)
+        ])
+        print(f"Added {len(WORKOUTS_DATA)} workouts.")
+        log_count = insert_chunked(connection, UserWorkout.__table__, _log_rows(users, logs_per_user))
+        print(f"Created {log_count} user-workout associations.")
 
-    session.close()
+        install_search_index(connection)
+
+    session = Session(bind=bind)
+    try:
+        rebuild_rollups(session)
+        rebuild_streaks(session)
+        session.commit()
+    finally:
+        session.close()
+
+def _seed_template(users, logs_per_user):
+    key = (users, tuple(logs_per_user))
+    template = _templates.get(key)
+    if template is None:
+        template = create_engine("sqlite://", poolclass=StaticPool)
+        Base.metadata.create_all(template)
+        _load_seed_data(template, users, logs_per_user)
+        _templates[key] = template
+    return template
+
+def _restore_template(template):
+    """Overwrites the configured database with the template, keeping its alembic stamp."""
+    engine = get_engine()
+    with engine.connect() as connection:
+        has_stamp = inspect(connection).has_table("alembic_version")
+        stamp = connection.exec_driver_sql("SELECT version_num FROM alembic_version").scalar() if has_stamp else None
+
+    source = template.raw_connection()
+    target = engine.raw_connection()
+    try:
+        source.driver_connection.backup(target.driver_connection)
+    finally:
+        source.close()
+        target.close()
+
+    if stamp is not None:
+        with engine.begin() as connection:
+            connection.exec_driver_sql("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL PRIMARY KEY)")
+            connection.exec_driver_sql("INSERT INTO alembic_version (version_num) VALUES (?)", (stamp,))
+
+def seed_database(users=len(USERS_DATA), logs_per_user=(2, 6), use_template=True):
+    """
+    Replaces the database contents with sample users, workouts, and associations.
+    Raise users (beyond Alice..Eve they are generated) and logs_per_user for volume.
+    On SQLite the data is built once per process in an in-memory template and then
+    copied over with the backup API, so reseeding costs one page copy.
+    """
+    print("Seeding database...")
+    engine = get_engine()
+    if use_template and engine.dialect.name == "sqlite":
+        _restore_template(_seed_template(users, logs_per_user))
+        print("Restored seed data from the in-memory template.")
+    else:
+        Base.metadata.create_all(engine)
+        _load_seed_data(engine, users, logs_per_user)
+    clear_caches()
     print("Database seeding complete!")
 
 if __name__ == "__main__":
-    seed_database()
\ No newline at end of file
+    seed_database()
@@ -0,0 +1,192 @@
+# lib/streaks.py
+import heapq
+from datetime import date, datetime, timedelta
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from lib.models.__init__ import helper_session, commit_or_flush
+from lib.instrumentation import instrumented
+from lib.models.user_streak import UserStreak
+from lib.archive import log_arms
+
+STREAK_CHUNK_SIZE = 1000
+
+def _as_day(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+def _user_days(session, user_ids=None):
+    """Streams (user_id, day) in (user_id, day) order, one row per active day."""
+    streams = []
+    for arm in log_arms(session):
+        logs = arm.entity
+        query = (
+            select(logs.user_id, func.date(logs.completion_date))
+            .where(logs.completion_date.isnot(None))
+            .order_by(logs.user_id, logs.completion_date)
+            .execution_options(yield_per=STREAK_CHUNK_SIZE)
+        )
+        if user_ids is not None:
+            query = query.where(logs.user_id.in_(user_ids))
+        streams.append(map(tuple, session.execute(query)))
+    previous = None
+    # Ordering by completion_date walks each table's (user_id, completion_date) index with
+    # no sort, and the archive years are merged in as they stream; logs on the same day
+    # arrive together and are collapsed here.
+    for user_id, day_value in heapq.merge(*streams):
+        if (user_id, day_value) != previous:
+            previous = (user_id, day_value)
+            yield user_id, date.fromisoformat(day_value)
+
+def _extend_streak(row, day):
+    """Advances a user_streaks row dict to a day on or after its last_active_day."""
+    if day == row['last_active_day']:
+        return
+    if day == row['last_active_day'] + timedelta(days=1):
+        row['current_streak'] += 1
+    else:
+        row['current_streak'] = 1
+    row['longest_streak'] = max(row['longest_streak'], row['current_streak'])
+    row['last_active_day'] = day
+
+def _streak_rows(user_days):
+    """Folds ordered (user_id, day) pairs into one user_streaks row per user."""
+    row = None
+    for user_id, day in user_days:
+        if row is None or row['user_id'] != user_id:
+            if row is not None:
+                yield row
+            row = {'user_id': user_id, 'current_streak': 1, 'longest_streak': 1, 'last_active_day': day}
+            continue
+        _extend_streak(row, day)
+    if row is not None:
+        yield row
+
+def _upsert_streaks(session, rows):
+    table = UserStreak.__table__
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_={name: stmt.excluded[name] for name in ('current_streak', 'longest_streak', 'last_active_day')}
+    )
+    session.execute(stmt, rows)
+
+def recompute_user_streaks(session, user_ids):
+    """
+    Rebuilds the streaks of just these users from their logs, e.g. after logs were deleted.
+    Flushes first so pending deletes are seen. Runs in the caller's transaction.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    session.flush()
+    rows = list(_streak_rows(_user_days(session, user_ids)))
+    if rows:
+        _upsert_streaks(session, rows)
+    emptied = user_ids - {row['user_id'] for row in rows}
+    if emptied:
+        session.execute(delete(UserStreak.__table__).where(UserStreak.__table__.c.user_id.in_(emptied)))
+
+def streak_log_added(session, user_id, completion_date):
+    """
+    O(1) update for a new log: extends, restarts or leaves the streak on the user's latest
+    day. A log dated before last_active_day can join two runs, so that user is recomputed.
+    """
+    day = _as_day(completion_date)
+    # populate_existing: recompute_user_streaks and rebuild_streaks write through Core,
+    # which leaves any copy already in the identity map stale.
+    streak = session.get(UserStreak, user_id, populate_existing=True)
+    if streak is None:
+        session.add(UserStreak(user_id=user_id, current_streak=1, longest_streak=1, last_active_day=day))
+    elif day == streak.last_active_day:
+        return
+    elif day == streak.last_active_day + timedelta(days=1):
+        streak.current_streak += 1
+        streak.longest_streak = max(streak.longest_streak, streak.current_streak)
+        streak.last_active_day = day
+    elif day > streak.last_active_day:
+        streak.current_streak = 1
+        streak.last_active_day = day
+    else:
+        recompute_user_streaks(session, [user_id])
+
+def streak_logs_added(session, user_days):
+    """
+    Batch form of streak_log_added for {user_id: completion dates}. Days on or after a
+    user's last_active_day extend the stored row in O(new days), so bulk loads in date
+    order never rescan history; a user with an earlier day is recomputed.
+    """
+    if not user_days:
+        return
+    table = UserStreak.__table__
+    stored = {
+        row.user_id: dict(row._mapping)
+        for row in session.execute(select(table).where(table.c.user_id.in_(user_days)))
+    }
+    rows = []
+    recompute = []
+    for user_id, dates in user_days.items():
+        days = sorted({_as_day(value) for value in dates})
+        row = stored.get(user_id)
+        if row is None:
+            row = {'user_id': user_id, 'current_streak': 1, 'longest_streak': 1, 'last_active_day': days[0]}
+        elif days[0] < row['last_active_day']:
+            recompute.append(user_id)
+            continue
+        for day in days:
+            _extend_streak(row, day)
+        rows.append(row)
+    if rows:
+        _upsert_streaks(session, rows)
+    recompute_user_streaks(session, recompute)
+
+def streak_user_removed(session, user_id):
+    session.execute(delete(UserStreak.__table__).where(UserStreak.__table__.c.user_id == user_id))
+
+def rebuild_streaks(session=None):
+    """Recomputes every user's streak in one pass over all logs ordered by (user_id, day)."""
+    with helper_session(session) as (session, owned):
+        try:
+            session.execute(delete(UserStreak.__table__))
+            users = 0
+            chunk = []
+            for row in _streak_rows(_user_days(session)):
+                chunk.append(row)
+                if len(chunk) >= STREAK_CHUNK_SIZE:
+                    session.execute(UserStreak.__table__.insert(), chunk)
+                    users += len(chunk)
+                    chunk = []
+            if chunk:
+                session.execute(UserStreak.__table__.insert(), chunk)
+                users += len(chunk)
+            commit_or_flush(session, owned)
+            print(f"Streaks rebuilt for {users} users.")
+            return users
+        except Exception as e:
+            if not owned:
+                raise
+            session.rollback()
+            print(f"Error rebuilding streaks: {e}")
+            return None
+
+@instrumented
+def get_user_streak(user_id, today=None, session=None):
+    """
+    Returns (current_streak, longest_streak, last_active_day). The current streak is 0
+    once a full day has passed without a workout.
+    """
+    today = _as_day(today) or date.today()
+    with helper_session(session) as (session, owned):
+        streak = session.get(UserStreak, user_id, populate_existing=True)
+        if streak is None or streak.last_active_day is None:
+            return (0, 0, None)
+        current = streak.current_streak if streak.last_active_day >= today - timedelta(days=1) else 0
+        return (current, streak.longest_streak, streak.last_active_day)
+
+if __name__ == "__main__":
+    from lib.models.__init__ import Base, get_engine
+
+    Base.metadata.create_all(get_engine())
+    rebuild_streaks()
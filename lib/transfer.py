@@ -0,0 +1,188 @@
+# lib/transfer.py
+import argparse
+import csv
+import gzip
+import json
+import os
+from datetime import datetime
+from itertools import islice
+from sqlalchemy import select
+from lib.models.__init__ import helper_session
+from lib.models.user import User
+from lib.models.workout import Workout
+from lib.models.user_workout import UserWorkout
+from lib.helpers import log_user_workouts_bulk, BULK_CHUNK_SIZE
+from lib.archive import log_source
+
+# Workout logs move in and out as CSV or JSONL, one log per line, with the user and
+# workout given by email and activity rather than by ids local to this database:
+#
+#     python -m lib.transfer export logs.csv.gz --since 2025-06-01
+#     python -m lib.transfer import logs.csv.gz
+#
+# The format comes from the file name (.csv / .jsonl, plus .gz for gzip) unless given.
+# Both directions hold one chunk of rows at a time, whatever the file size.
+EXPORT_CHUNK_SIZE = 1000
+FIELDS = ('user_email', 'workout_activity', 'completion_date', 'notes')
+FORMATS = ('csv', 'jsonl')
+
+def detect_format(path, fmt=None, compress=None):
+    """Returns (format, compress), filling in whatever wasn't given from the file name."""
+    name = path[:-3] if path.endswith('.gz') else path
+    if compress is None:
+        compress = path.endswith('.gz')
+    if fmt is None:
+        fmt = os.path.splitext(name)[1].lstrip('.').lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}' for {path}, expected one of {', '.join(FORMATS)}.")
+    return fmt, compress
+
+def _open_text(path, mode, compress):
+    if compress:
+        return gzip.open(path, mode + 't', encoding='utf-8', newline='')
+    return open(path, mode, encoding='utf-8', newline='')
+
+def _export_select(since=None, logs=UserWorkout):
+    # Ordered by ix_user_workouts_completion_date, so a --since export reads only its range.
+    # logs is lib.archive's log_source when the range reaches archived years.
+    query = (
+        select(User.email, Workout.activity, logs.completion_date, logs.notes)
+        .join(User, User.id == logs.user_id)
+        .join(Workout, Workout.id == logs.workout_id)
+        .order_by(logs.completion_date, logs.id)
+    )
+    if since is not None:
+        query = query.where(logs.completion_date >= since)
+    return query
+
+def _write_csv(stream, partitions):
+    writer = csv.writer(stream)
+    writer.writerow(FIELDS)
+    written = 0
+    for partition in partitions:
+        writer.writerows(
+            (email, activity, completion_date.isoformat() if completion_date else '', notes or '')
+            for email, activity, completion_date, notes in partition
+        )
+        written += len(partition)
+    return written
+
+def _write_jsonl(stream, partitions):
+    written = 0
+    for partition in partitions:
+        stream.writelines(
+            json.dumps(dict(zip(FIELDS, (
+                email, activity, completion_date.isoformat() if completion_date else None, notes
+            )))) + '\n'
+            for email, activity, completion_date, notes in partition
+        )
+        written += len(partition)
+    return written
+
+def export_workout_logs(path, fmt=None, compress=None, since=None, chunk_size=EXPORT_CHUNK_SIZE, session=None):
+    """
+    Streams workout logs (completion_date >= since, if given) to path, oldest first, and
+    returns how many were written. The file is written beside path and renamed into
+    place, so a failed export never leaves a truncated file behind.
+    """
+    fmt, compress = detect_format(path, fmt, compress)
+    partial = path + '.partial'
+    with helper_session(session) as (session, owned):
+        try:
+            query = _export_select(since, log_source(session, since))
+            result = session.execute(query.execution_options(yield_per=chunk_size))
+            with _open_text(partial, 'w', compress) as stream:
+                write = _write_csv if fmt == 'csv' else _write_jsonl
+                written = write(stream, result.partitions())
+            os.replace(partial, path)
+            print(f"Exported {written} workout logs to {path}.")
+            return written
+        except Exception as e:
+            if os.path.exists(partial):
+                os.remove(partial)
+            if not owned:
+                raise
+            print(f"Error exporting workout logs: {e}")
+            return None
+
+def _read_records(stream, fmt):
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield record if isinstance(record, dict) else {}
+
+def _resolve_chunk(chunk, session=None):
+    """Maps one chunk's emails and activities to ids with two IN queries."""
+    emails = {record.get('user_email') for record in chunk}
+    activities = {record.get('workout_activity') for record in chunk}
+    with helper_session(session) as (session, owned):
+        user_ids = dict(session.execute(select(User.email, User.id).where(User.email.in_(emails))).all())
+        # Activity names aren't unique; the oldest workout with the name wins.
+        workout_ids = {}
+        for activity, workout_id in session.execute(
+            select(Workout.activity, Workout.id).where(Workout.activity.in_(activities)).order_by(Workout.id.desc())
+        ):
+            workout_ids[activity] = workout_id
+    for record in chunk:
+        try:
+            completion_date = datetime.fromisoformat(record.get('completion_date'))
+        except (TypeError, ValueError):
+            # Missing or unreadable date; the bulk path counts a record without a user as rejected.
+            yield {'user_id': None}
+            continue
+        yield {
+            'user_id': user_ids.get(record.get('user_email')),
+            'workout_id': workout_ids.get(record.get('workout_activity')),
+            'completion_date': completion_date,
+            'notes': record.get('notes') or None,
+        }
+
+def _resolved_records(records, chunk_size, session=None):
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield from _resolve_chunk(chunk, session)
+
+def import_workout_logs(path, fmt=None, compress=None, chunk_size=BULK_CHUNK_SIZE, session=None):
+    """
+    Streams workout logs from a CSV or JSONL export into log_user_workouts_bulk, chunk by
+    chunk. Logs already present for that user, workout and day are skipped, so
+    re-importing a file is harmless; unknown emails or activities are rejected.
+    Returns log_user_workouts_bulk's counts.
+    """
+    fmt, compress = detect_format(path, fmt, compress)
+    with _open_text(path, 'r', compress) as stream:
+        records = _resolved_records(_read_records(stream, fmt), chunk_size, session)
+        return log_user_workouts_bulk(records, chunk_size, session=session)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or import workout logs as CSV or JSONL.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    export_parser = commands.add_parser('export', help="write workout logs to a file")
+    export_parser.add_argument('--since', type=datetime.fromisoformat,
+                               help="only logs completed on or after this date (YYYY-MM-DD[THH:MM])")
+    import_parser = commands.add_parser('import', help="read workout logs from a file")
+    for command_parser in (export_parser, import_parser):
+        command_parser.add_argument('path', help="file name; .csv or .jsonl, with .gz for gzip")
+        command_parser.add_argument('--format', choices=FORMATS, help="override the format taken from the file name")
+        command_parser.add_argument('--gzip', action='store_true', default=None, help="gzip regardless of the file name")
+    args = parser.parse_args(argv)
+    try:
+        detect_format(args.path, args.format, args.gzip)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.command == 'export':
+        export_workout_logs(args.path, args.format, args.gzip, args.since)
+    else:
+        import_workout_logs(args.path, args.format, args.gzip)
+
+if __name__ == "__main__":
+    main()
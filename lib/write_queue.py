@@ -0,0 +1,247 @@
+# lib/write_queue.py
+import atexit
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import lib.helpers as helpers
+from lib.models.__init__ import Session
+
+# Opt-in group commit for bursts of writes. Instead of each caller running its own
+# transaction (and fsync) and queueing on SQLite's write lock, callers hand the helper
+# call to one writer thread and get a Future back:
+#
+#   future = write_queue.submit('log_user_workout', user_id, workout_id, completed_at)
+#   log_entry = future.result()
+#
+# The writer takes whatever is queued, up to WRITE_BATCH_SIZE calls, waiting at most
+# WRITE_BATCH_WAIT_MS after the first one for more, and runs the batch in one transaction
+# with a savepoint per call: a call that fails resolves its own future with the error and
+# leaves the rest of the batch alone. Futures resolve only once the batch has committed.
+#
+#   FITNESS_TRACKER_WRITE_BATCH_SIZE     calls per transaction (default 200)
+#   FITNESS_TRACKER_WRITE_BATCH_WAIT_MS  longest wait for a batch to fill (default 2)
+#   FITNESS_TRACKER_WRITE_QUEUE_SIZE     queued calls before submit blocks (default 10000)
+WRITE_BATCH_SIZE = int(os.environ.get("FITNESS_TRACKER_WRITE_BATCH_SIZE", "200"))
+WRITE_BATCH_WAIT_MS = float(os.environ.get("FITNESS_TRACKER_WRITE_BATCH_WAIT_MS", "2"))
+WRITE_QUEUE_SIZE = int(os.environ.get("FITNESS_TRACKER_WRITE_QUEUE_SIZE", "10000"))
+LATENCY_SAMPLES = 1024
+
+QUEUED_HELPERS = (
+    'create_user', 'update_user_email', 'delete_user',
+    'create_workout', 'update_workout_duration', 'delete_workout',
+    'log_user_workout', 'log_user_workouts_bulk', 'delete_user_workout_log', 'delete_workout_logs',
+)
+
+_STOP = object()
+
+class WriteQueue:
+    """A single writer thread that commits queued helper calls in batches; see the module comment."""
+
+    def __init__(self, batch_size=WRITE_BATCH_SIZE, max_wait_ms=WRITE_BATCH_WAIT_MS, maxsize=WRITE_QUEUE_SIZE):
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._submitted = self._completed = self._failed = 0
+        self._batches = self._batched_calls = self._max_batch = self._max_depth = 0
+        self._commit_seconds = deque(maxlen=LATENCY_SAMPLES)
+        self._thread = threading.Thread(target=self._run, name="fitness-tracker-write-queue", daemon=True)
+        self._thread.start()
+
+    def submit(self, name, *args, **kwargs):
+        """Queues helpers.<name>(*args, **kwargs) and returns a Future for its result."""
+        if name not in QUEUED_HELPERS:
+            raise ValueError(f"Unknown write helper '{name}', expected one of {', '.join(QUEUED_HELPERS)}.")
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Write queue is closed.")
+            self._submitted += 1
+        self._queue.put((future, getattr(helpers, name), args, kwargs))
+        depth = self._queue.qsize()
+        with self._lock:
+            self._max_depth = max(self._max_depth, depth)
+        return future
+
+    def close(self, wait=True):
+        """Stops taking calls; the ones already queued are still committed."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(_STOP)
+        if wait:
+            self._thread.join()
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._commit_seconds)
+            batches = self._batches
+
+            def percentile(p):
+                return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else 0.0
+
+            return {
+                'depth': self._queue.qsize(),
+                'max_depth': self._max_depth,
+                'submitted': self._submitted,
+                'completed': self._completed,
+                'failed': self._failed,
+                'batches': batches,
+                'mean_batch_size': self._batched_calls / batches if batches else 0.0,
+                'max_batch_size': self._max_batch,
+                'commit_p50_ms': percentile(0.50),
+                'commit_p95_ms': percentile(0.95),
+                'commit_max_ms': latencies[-1] * 1000 if latencies else 0.0,
+            }
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None, True
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        while True:
+            batch, stopping = self._next_batch()
+            if batch:
+                self._commit(batch)
+            if stopping:
+                return
+
+    def _commit(self, batch):
+        calls = [item for item in batch if item[0].set_running_or_notify_cancel()]
+        if not calls:
+            return
+        outcomes = []
+        # Results outlive the session, so they keep the state they were flushed with.
+        session = Session(expire_on_commit=False)
+        try:
+            # Take the write lock up front; a savepoint opening the transaction would
+            # commit it again on release.
+            session.connection().exec_driver_sql("BEGIN IMMEDIATE")
+            for _, fn, args, kwargs in calls:
+                try:
+                    with session.begin_nested():
+                        outcomes.append((True, fn(*args, session=session, **kwargs)))
+                except Exception as e:
+                    outcomes.append((False, e))
+            started = time.perf_counter()
+            session.commit()
+            commit_seconds = time.perf_counter() - started
+        except Exception as e:
+            session.rollback()
+            outcomes = [(False, e)] * len(calls)
+            commit_seconds = None
+        finally:
+            session.close()
+
+        failed = sum(1 for ok, _ in outcomes if not ok)
+        with self._lock:
+            self._batches += 1
+            self._batched_calls += len(calls)
+            self._max_batch = max(self._max_batch, len(calls))
+            self._completed += len(calls) - failed
+            self._failed += failed
+            if commit_seconds is not None:
+                self._commit_seconds.append(commit_seconds)
+        for (future, _, _, _), (ok, value) in zip(calls, outcomes):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def get_write_queue():
+    """The process-wide WriteQueue, started on first use and drained at exit."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = WriteQueue()
+            atexit.register(_shared.close)
+        return _shared
+
+def submit(name, *args, **kwargs):
+    return get_write_queue().submit(name, *args, **kwargs)
+
+def shutdown(wait=True):
+    """Drains and stops the shared queue; a later submit starts a new one."""
+    global _shared
+    with _shared_lock:
+        shared, _shared = _shared, None
+    if shared is not None:
+        shared.close(wait)
+
+def _ingest_demo(producers=16, logs_per_producer=100):
+    # Many threads logging workouts at once: each calling log_user_workout directly, then
+    # all submitting through the queue. Reports throughput, failed calls and queue stats.
+    import contextlib
+    import io
+    import random
+    from concurrent.futures import ThreadPoolExecutor
+    from datetime import datetime, timedelta
+    from sqlalchemy import select, func
+    from lib.models.__init__ import get_engine
+    from lib.models.user import User
+    from lib.models.workout import Workout
+
+    with get_engine().connect() as connection:
+        max_user_id = connection.execute(select(func.max(User.id))).scalar()
+        max_workout_id = connection.execute(select(func.max(Workout.id))).scalar()
+    # Fresh days far from the dataset, so no call is skipped as a same-day duplicate.
+    base = datetime(2030, 1, 1)
+
+    def records(round_index, producer):
+        rng = random.Random(f"{round_index}:{producer}")
+        for i in range(logs_per_producer):
+            yield (rng.randint(1, max_user_id), rng.randint(1, max_workout_id),
+                   base + timedelta(days=round_index * 1000 + producer * logs_per_producer + i))
+
+    def direct(producer):
+        return sum(helpers.log_user_workout(*record) is None for record in records(0, producer))
+
+    def queued(producer):
+        futures = [submit('log_user_workout', *record) for record in records(1, producer)]
+        failed = 0
+        for future in futures:
+            try:
+                failed += future.result() is None
+            except Exception:
+                failed += 1
+        return failed
+
+    total = producers * logs_per_producer
+    print(f"{producers} producer threads x {logs_per_producer} log_user_workout calls:")
+    for label, run in (("own transaction per call", direct), ("group commit (write queue)", queued)):
+        started = time.perf_counter()
+        # The helpers print a line per log; keep them out of the report.
+        with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=producers) as pool:
+            failed = sum(pool.map(run, range(producers)))
+        elapsed = time.perf_counter() - started
+        print(f"{label:<30}{total / elapsed:>10.0f} logs/s   {failed} failed")
+    shared = get_write_queue()
+    shutdown()
+    stats = shared.stats()
+    print(f"batches {stats['batches']}, mean size {stats['mean_batch_size']:.1f}, max size {stats['max_batch_size']}, "
+          f"max depth {stats['max_depth']}, commit p50 {stats['commit_p50_ms']:.2f} ms, "
+          f"p95 {stats['commit_p95_ms']:.2f} ms")
+
+if __name__ == "__main__":
+    _ingest_demo()
@@ -0,0 +1,74 @@
+from logging.config import fileConfig
+
+from sqlalchemy import create_engine, pool
+
+from alembic import context
+
+from lib.models.__init__ import Base, DATABASE_URL
+# Every model module, so autogenerate and `alembic check` see all of the mapped tables.
+from lib.models.user import User
+from lib.models.workout import Workout
+from lib.models.user_workout import UserWorkout
+from lib.models.activity_rollup import UserDailyActivity, UserWeeklyActivity, UserMonthlyActivity
+from lib.models.user_streak import UserStreak
+from lib.models.log_archive import LogArchive
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# Tables created outside the models: the FTS5 search index with its shadow tables
+# (lib/search.py) and the per-year archives of user_workouts (lib/archive.py).
+UNMANAGED_TABLE_PREFIXES = ("users_fts", "user_workouts_fts", "user_workouts_archive_")
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    table = object if type_ == "table" else getattr(object, "table", None)
+    if table is not None and table.name.startswith(UNMANAGED_TABLE_PREFIXES):
+        return False
+    return True
+
+
+def get_url():
+    return (context.get_x_argument(as_dictionary=True).get("url")
+            or config.get_main_option("sqlalchemy.url")
+            or DATABASE_URL)
+
+
+def run_migrations_offline():
+    context.configure(
+        url=get_url(),
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        render_as_batch=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connectable = create_engine(get_url(), poolclass=pool.NullPool)
+
+    with connectable.connect() as connection:
+        # SQLite can't ALTER most constraints in place; batch mode rebuilds the table instead.
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+            render_as_batch=True,
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
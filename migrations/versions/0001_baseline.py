@@ -0,0 +1,61 @@
+"""baseline schema
+
+Existing fitness_tracker.db files were created by Base.metadata.create_all and
+carry no alembic_version, so every table here is only created when missing.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'users' not in existing:
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(), nullable=False),
+            sa.Column('email', sa.String(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('email'),
+        )
+
+    if 'workouts' not in existing:
+        op.create_table(
+            'workouts',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('activity', sa.String(), nullable=False),
+            sa.Column('duration_minutes', sa.Integer(), nullable=False),
+            sa.Column('timestamp', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    if 'user_workouts' not in existing:
+        op.create_table(
+            'user_workouts',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('workout_id', sa.Integer(), nullable=True),
+            sa.Column('completion_date', sa.DateTime(), nullable=True),
+            sa.Column('notes', sa.String(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.ForeignKeyConstraint(['workout_id'], ['workouts.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+
+def downgrade():
+    op.drop_table('user_workouts')
+    op.drop_table('workouts')
+    op.drop_table('users')
@@ -0,0 +1,34 @@
+"""composite indexes on user_workouts
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:10:00
+
+"""
+from alembic import op
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_user_workouts_user_id_completion_date', ['user_id', 'completion_date']),
+    ('ix_user_workouts_user_id_workout_id_completion_date', ['user_id', 'workout_id', 'completion_date']),
+    ('ix_user_workouts_workout_id_completion_date', ['workout_id', 'completion_date']),
+    ('ix_user_workouts_completion_date', ['completion_date']),
+]
+
+
+def upgrade():
+    # if_not_exists: databases built by seed_database's create_all already have them.
+    for name, columns in INDEXES:
+        op.create_index(name, 'user_workouts', columns, if_not_exists=True)
+    op.execute('ANALYZE user_workouts')
+
+
+def downgrade():
+    for name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name='user_workouts', if_exists=True)
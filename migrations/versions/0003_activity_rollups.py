@@ -0,0 +1,83 @@
+"""per-user activity rollup tables
+
+Creates the day, ISO week and month rollups and backfills them from
+user_workouts joined to workouts.duration_minutes.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 10:00:00
+
+"""
+from collections import defaultdict
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def _create(name, key_column):
+    op.create_table(
+        name,
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        key_column,
+        sa.Column('sessions', sa.Integer(), nullable=False),
+        sa.Column('minutes', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id', key_column.name),
+    )
+
+
+def upgrade():
+    bind = op.get_bind()
+    existing = set(sa.inspect(bind).get_table_names())
+    if 'user_daily_activity' not in existing:
+        _create('user_daily_activity', sa.Column('day', sa.Date(), nullable=False))
+    if 'user_weekly_activity' not in existing:
+        _create('user_weekly_activity', sa.Column('week', sa.String(), nullable=False))
+    if 'user_monthly_activity' not in existing:
+        _create('user_monthly_activity', sa.Column('month', sa.String(), nullable=False))
+
+    for table in ('user_daily_activity', 'user_weekly_activity', 'user_monthly_activity'):
+        op.execute(f'DELETE FROM {table}')
+
+    daily = bind.execute(sa.text(
+        "SELECT uw.user_id, date(uw.completion_date) AS day, count(*), sum(w.duration_minutes) "
+        "FROM user_workouts uw JOIN workouts w ON w.id = uw.workout_id "
+        "WHERE uw.completion_date IS NOT NULL GROUP BY uw.user_id, day"
+    )).all()
+
+    weekly = defaultdict(lambda: [0, 0])
+    monthly = defaultdict(lambda: [0, 0])
+    day_rows = []
+    for user_id, day, sessions, minutes in daily:
+        minutes = minutes or 0
+        day_rows.append({'user_id': user_id, 'key': day, 'sessions': sessions, 'minutes': minutes})
+        year, week, _ = date.fromisoformat(day).isocalendar()
+        for bucket in (weekly[(user_id, f"{year}-W{week:02d}")], monthly[(user_id, day[:7])]):
+            bucket[0] += sessions
+            bucket[1] += minutes
+
+    for table, key_name, rows in (
+        ('user_daily_activity', 'day', day_rows),
+        ('user_weekly_activity', 'week',
+         [{'user_id': u, 'key': k, 'sessions': s, 'minutes': m} for (u, k), (s, m) in weekly.items()]),
+        ('user_monthly_activity', 'month',
+         [{'user_id': u, 'key': k, 'sessions': s, 'minutes': m} for (u, k), (s, m) in monthly.items()]),
+    ):
+        if rows:
+            bind.execute(sa.text(
+                f"INSERT INTO {table} (user_id, {key_name}, sessions, minutes) "
+                f"VALUES (:user_id, :key, :sessions, :minutes)"
+            ), rows)
+
+
+def downgrade():
+    op.drop_table('user_monthly_activity')
+    op.drop_table('user_weekly_activity')
+    op.drop_table('user_daily_activity')
@@ -0,0 +1,65 @@
+"""FTS5 search index for user names/emails and workout-log notes
+
+Skipped when the SQLite build lacks FTS5; search then falls back to LIKE.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 11:00:00
+
+"""
+from alembic import op
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5("
+    "name, email, content='users', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS users_fts_ai AFTER INSERT ON users BEGIN "
+    "INSERT INTO users_fts(rowid, name, email) VALUES (new.id, new.name, new.email); END",
+    "CREATE TRIGGER IF NOT EXISTS users_fts_ad AFTER DELETE ON users BEGIN "
+    "INSERT INTO users_fts(users_fts, rowid, name, email) VALUES ('delete', old.id, old.name, old.email); END",
+    "CREATE TRIGGER IF NOT EXISTS users_fts_au AFTER UPDATE ON users BEGIN "
+    "INSERT INTO users_fts(users_fts, rowid, name, email) VALUES ('delete', old.id, old.name, old.email); "
+    "INSERT INTO users_fts(rowid, name, email) VALUES (new.id, new.name, new.email); END",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS user_workouts_fts USING fts5("
+    "notes, content='user_workouts', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS user_workouts_fts_ai AFTER INSERT ON user_workouts BEGIN "
+    "INSERT INTO user_workouts_fts(rowid, notes) VALUES (new.id, new.notes); END",
+    "CREATE TRIGGER IF NOT EXISTS user_workouts_fts_ad AFTER DELETE ON user_workouts BEGIN "
+    "INSERT INTO user_workouts_fts(user_workouts_fts, rowid, notes) VALUES ('delete', old.id, old.notes); END",
+    "CREATE TRIGGER IF NOT EXISTS user_workouts_fts_au AFTER UPDATE OF notes ON user_workouts BEGIN "
+    "INSERT INTO user_workouts_fts(user_workouts_fts, rowid, notes) VALUES ('delete', old.id, old.notes); "
+    "INSERT INTO user_workouts_fts(rowid, notes) VALUES (new.id, new.notes); END",
+]
+
+
+def _fts5_available(bind):
+    try:
+        bind.exec_driver_sql("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+        bind.exec_driver_sql("DROP TABLE temp.fts5_probe")
+        return True
+    except Exception:
+        return False
+
+
+def upgrade():
+    bind = op.get_bind()
+    if not _fts5_available(bind):
+        return
+    for statement in DDL:
+        op.execute(statement)
+    op.execute("INSERT INTO users_fts(users_fts) VALUES ('rebuild')")
+    op.execute("INSERT INTO user_workouts_fts(user_workouts_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    for trigger in ('users_fts_ai', 'users_fts_ad', 'users_fts_au',
+                    'user_workouts_fts_ai', 'user_workouts_fts_ad', 'user_workouts_fts_au'):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS users_fts")
+    op.execute("DROP TABLE IF EXISTS user_workouts_fts")
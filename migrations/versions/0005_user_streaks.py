@@ -0,0 +1,59 @@
+"""per-user workout streaks
+
+Creates user_streaks and backfills it from user_workouts in (user_id, day) order.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 14:00:00
+
+"""
+from datetime import date, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if 'user_streaks' not in sa.inspect(bind).get_table_names():
+        op.create_table(
+            'user_streaks',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('current_streak', sa.Integer(), nullable=False),
+            sa.Column('longest_streak', sa.Integer(), nullable=False),
+            sa.Column('last_active_day', sa.Date(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('user_id'),
+        )
+    op.execute('DELETE FROM user_streaks')
+
+    days = bind.execute(sa.text(
+        "SELECT DISTINCT user_id, date(completion_date) AS day FROM user_workouts "
+        "WHERE completion_date IS NOT NULL ORDER BY user_id, day"
+    ))
+    rows = []
+    for user_id, day in days:
+        day = date.fromisoformat(day)
+        row = rows[-1] if rows and rows[-1]['user_id'] == user_id else None
+        if row is None:
+            rows.append({'user_id': user_id, 'current': 1, 'longest': 1, 'last': day})
+            continue
+        row['current'] = row['current'] + 1 if day == row['last'] + timedelta(days=1) else 1
+        row['longest'] = max(row['longest'], row['current'])
+        row['last'] = day
+
+    if rows:
+        bind.execute(sa.text(
+            "INSERT INTO user_streaks (user_id, current_streak, longest_streak, last_active_day) "
+            "VALUES (:user_id, :current, :longest, :last)"
+        ), [{**row, 'last': row['last'].isoformat()} for row in rows])
+
+
+def downgrade():
+    op.drop_table('user_streaks')
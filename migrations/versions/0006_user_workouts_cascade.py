@@ -0,0 +1,71 @@
+"""ON DELETE CASCADE on user_workouts' foreign keys
+
+SQLite can't alter a foreign key in place, so user_workouts is rebuilt: copied into a
+new table with the cascading keys, then renamed back. Ids are kept, so the FTS5 index
+(keyed on rowid) stays valid. The table's indexes and triggers are dropped along with
+the old table and replayed from sqlite_master.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 16:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = 'id, user_id, workout_id, completion_date, notes'
+
+
+def _table_ddl(ondelete):
+    return (
+        "CREATE TABLE user_workouts_rebuild ("
+        "id INTEGER NOT NULL, "
+        "user_id INTEGER, "
+        "workout_id INTEGER, "
+        "completion_date DATETIME, "
+        "notes VARCHAR, "
+        "PRIMARY KEY (id), "
+        f"FOREIGN KEY(user_id) REFERENCES users (id){ondelete}, "
+        f"FOREIGN KEY(workout_id) REFERENCES workouts (id){ondelete})"
+    )
+
+
+def _cascades(bind):
+    foreign_keys = sa.inspect(bind).get_foreign_keys('user_workouts')
+    return bool(foreign_keys) and all(
+        (fk.get('options') or {}).get('ondelete', '').upper() == 'CASCADE' for fk in foreign_keys
+    )
+
+
+def _rebuild(bind, ondelete):
+    # Indexes and triggers go with DROP TABLE; keep their DDL to replay on the new table.
+    dependents = [row[0] for row in bind.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = 'user_workouts' "
+        "AND type IN ('index', 'trigger') AND sql IS NOT NULL ORDER BY type"
+    )]
+    op.execute(_table_ddl(ondelete))
+    op.execute(f"INSERT INTO user_workouts_rebuild ({COLUMNS}) SELECT {COLUMNS} FROM user_workouts")
+    op.execute("DROP TABLE user_workouts")
+    op.execute("ALTER TABLE user_workouts_rebuild RENAME TO user_workouts")
+    for statement in dependents:
+        op.execute(statement)
+
+
+def upgrade():
+    bind = op.get_bind()
+    # Databases created by create_all after this change already cascade.
+    if not _cascades(bind):
+        _rebuild(bind, ' ON DELETE CASCADE')
+
+
+def downgrade():
+    bind = op.get_bind()
+    if _cascades(bind):
+        _rebuild(bind, '')
@@ -0,0 +1,118 @@
+"""completion_day and one log per user, workout and day
+
+Adds user_workouts.completion_day, a stored column generated from date(completion_date),
+and a unique index on (user_id, workout_id, completion_day). SQLite can only add
+virtual generated columns in place, so the table is rebuilt as in 0006, which also
+backfills the column.
+
+Duplicates that slipped past the old check-then-insert are merged first: the oldest
+log is kept, it takes the other logs' notes, and the rollups drop the removed sessions.
+Streaks don't change, since every day keeps a log.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 17:00:00
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = 'id, user_id, workout_id, completion_date, notes'
+UNIQUE_INDEX = 'uq_user_workouts_user_id_workout_id_completion_day'
+NOTES_SEPARATOR = '; '
+
+
+def _table_ddl(with_day):
+    day = "completion_day DATE GENERATED ALWAYS AS (date(completion_date)) STORED, " if with_day else ""
+    return (
+        "CREATE TABLE user_workouts_rebuild ("
+        "id INTEGER NOT NULL, "
+        "user_id INTEGER, "
+        "workout_id INTEGER, "
+        "completion_date DATETIME, "
+        f"{day}"
+        "notes VARCHAR, "
+        "PRIMARY KEY (id), "
+        "FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE, "
+        "FOREIGN KEY(workout_id) REFERENCES workouts (id) ON DELETE CASCADE)"
+    )
+
+
+def _rebuild(bind, with_day):
+    dependents = [row[0] for row in bind.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = 'user_workouts' "
+        "AND type IN ('index', 'trigger') AND sql IS NOT NULL ORDER BY type"
+    ) if with_day or 'completion_day' not in row[0]]
+    op.execute(_table_ddl(with_day))
+    op.execute(f"INSERT INTO user_workouts_rebuild ({COLUMNS}) SELECT {COLUMNS} FROM user_workouts")
+    op.execute("DROP TABLE user_workouts")
+    op.execute("ALTER TABLE user_workouts_rebuild RENAME TO user_workouts")
+    for statement in dependents:
+        op.execute(statement)
+
+
+def _rollup_keys(completion_date):
+    day = datetime.fromisoformat(completion_date).date()
+    year, week, _ = day.isocalendar()
+    return {
+        'user_daily_activity': ('day', day.isoformat()),
+        'user_weekly_activity': ('week', f"{year}-W{week:02d}"),
+        'user_monthly_activity': ('month', day.strftime('%Y-%m')),
+    }
+
+
+def _merge_duplicates(bind):
+    groups = bind.execute(sa.text(
+        "SELECT group_concat(id) FROM user_workouts WHERE completion_date IS NOT NULL "
+        "GROUP BY user_id, workout_id, date(completion_date) HAVING count(*) > 1"
+    )).scalars().all()
+    tables = set(sa.inspect(bind).get_table_names())
+    for id_list in groups:
+        ids = sorted(int(log_id) for log_id in id_list.split(','))
+        logs = bind.execute(sa.text(
+            "SELECT user_workouts.id, user_id, completion_date, notes, workouts.duration_minutes "
+            "FROM user_workouts LEFT JOIN workouts ON workouts.id = user_workouts.workout_id "
+            f"WHERE user_workouts.id IN ({','.join(map(str, ids))}) ORDER BY user_workouts.id"
+        )).all()
+        notes = []
+        for log in logs:
+            if log.notes and log.notes not in notes:
+                notes.append(log.notes)
+        bind.execute(sa.text("UPDATE user_workouts SET notes = :notes WHERE id = :id"),
+                     {'notes': NOTES_SEPARATOR.join(notes) or None, 'id': ids[0]})
+        bind.execute(sa.text(f"DELETE FROM user_workouts WHERE id IN ({','.join(map(str, ids[1:]))})"))
+        for log in logs[1:]:
+            if log.duration_minutes is None:
+                continue
+            for table, (column, key) in _rollup_keys(log.completion_date).items():
+                if table in tables:
+                    bind.execute(sa.text(
+                        f"UPDATE {table} SET sessions = sessions - 1, minutes = minutes - :minutes "
+                        f"WHERE user_id = :user_id AND {column} = :key"
+                    ), {'minutes': log.duration_minutes, 'user_id': log.user_id, 'key': key})
+
+
+def upgrade():
+    bind = op.get_bind()
+    columns = {column['name'] for column in sa.inspect(bind).get_columns('user_workouts')}
+    if 'completion_day' not in columns:
+        _merge_duplicates(bind)
+        _rebuild(bind, with_day=True)
+    op.create_index(UNIQUE_INDEX, 'user_workouts', ['user_id', 'workout_id', 'completion_day'],
+                    unique=True, if_not_exists=True)
+
+
+def downgrade():
+    bind = op.get_bind()
+    columns = {column['name'] for column in sa.inspect(bind).get_columns('user_workouts')}
+    if 'completion_day' in columns:
+        _rebuild(bind, with_day=False)
@@ -0,0 +1,31 @@
+"""index user_workouts by (workout_id, user_id, completion_date)
+
+Workout participants group a workout's logs by user and page through them by user_id;
+this index hands them over already in that order. It also serves everything the
+(workout_id, completion_date) index did, which is dropped.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 18:00:00
+
+"""
+from alembic import op
+
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_user_workouts_workout_id_user_id_completion_date', 'user_workouts',
+                    ['workout_id', 'user_id', 'completion_date'], if_not_exists=True)
+    op.drop_index('ix_user_workouts_workout_id_completion_date', table_name='user_workouts', if_exists=True)
+    op.execute('ANALYZE user_workouts')
+
+
+def downgrade():
+    op.create_index('ix_user_workouts_workout_id_completion_date', 'user_workouts',
+                    ['workout_id', 'completion_date'], if_not_exists=True)
+    op.drop_index('ix_user_workouts_workout_id_user_id_completion_date', table_name='user_workouts', if_exists=True)
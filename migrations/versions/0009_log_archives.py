@@ -0,0 +1,88 @@
+"""log archives and AUTOINCREMENT log ids
+
+Creates log_archives, the registry of per-year archive tables written by lib/archive.py,
+and rebuilds user_workouts (as in 0006) with AUTOINCREMENT ids: without it SQLite can
+hand a new log the id of one that was moved to an archive table.
+
+Downgrading moves every archived log back into user_workouts first, then drops the
+archive tables.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 19:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = 'id, user_id, workout_id, completion_date, notes'
+ARCHIVE_TABLE_PREFIX = 'user_workouts_archive_'
+
+
+def _table_ddl(autoincrement):
+    id_column = "id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT, " if autoincrement else "id INTEGER NOT NULL, "
+    primary_key = "" if autoincrement else "PRIMARY KEY (id), "
+    return (
+        "CREATE TABLE user_workouts_rebuild ("
+        f"{id_column}"
+        "user_id INTEGER, "
+        "workout_id INTEGER, "
+        "completion_date DATETIME, "
+        "completion_day DATE GENERATED ALWAYS AS (date(completion_date)) STORED, "
+        "notes VARCHAR, "
+        f"{primary_key}"
+        "FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE, "
+        "FOREIGN KEY(workout_id) REFERENCES workouts (id) ON DELETE CASCADE)"
+    )
+
+
+def _autoincrement(bind):
+    ddl = bind.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'user_workouts'"
+    ).scalar()
+    return 'AUTOINCREMENT' in ddl.upper()
+
+
+def _rebuild(bind, autoincrement):
+    dependents = [row[0] for row in bind.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = 'user_workouts' "
+        "AND type IN ('index', 'trigger') AND sql IS NOT NULL ORDER BY type"
+    )]
+    op.execute(_table_ddl(autoincrement))
+    op.execute(f"INSERT INTO user_workouts_rebuild ({COLUMNS}) SELECT {COLUMNS} FROM user_workouts")
+    op.execute("DROP TABLE user_workouts")
+    op.execute("ALTER TABLE user_workouts_rebuild RENAME TO user_workouts")
+    for statement in dependents:
+        op.execute(statement)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if not _autoincrement(bind):
+        _rebuild(bind, autoincrement=True)
+    if 'log_archives' not in sa.inspect(bind).get_table_names():
+        op.create_table(
+            'log_archives',
+            sa.Column('year', sa.Integer(), nullable=False),
+            sa.Column('archived_before', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('year'),
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    archives = [name for name in sa.inspect(bind).get_table_names() if name.startswith(ARCHIVE_TABLE_PREFIX)]
+    for name in archives:
+        # Through the FTS triggers, so the moved-back notes are searchable again.
+        op.execute(f"INSERT INTO user_workouts ({COLUMNS}) SELECT {COLUMNS} FROM {name}")
+        op.drop_table(name)
+    op.drop_table('log_archives', if_exists=True)
+    if _autoincrement(bind):
+        _rebuild(bind, autoincrement=False)
@@ -0,0 +1,27 @@
+"""index user_daily_activity by day
+
+The leaderboards in lib/leaderboards.py sum every user's daily rollups over the last
+week or month. The primary key leads with user_id, so without this index each one
+scans the whole table.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 20:00:00
+
+"""
+from alembic import op
+
+
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_user_daily_activity_day', 'user_daily_activity', ['day'], if_not_exists=True)
+    op.execute('ANALYZE user_daily_activity')
+
+
+def downgrade():
+    op.drop_index('ix_user_daily_activity_day', table_name='user_daily_activity', if_exists=True)
@@ -0,0 +1,16 @@
+import os
+import tempfile
+
+import pytest
+
+# lib.models reads the database URL at import, so point it at a scratch file before any
+# test imports lib; the tests never touch fitness_tracker.db.
+_DATABASE_DIR = tempfile.mkdtemp(prefix="fitness-tracker-tests-")
+os.environ["FITNESS_TRACKER_DATABASE_URL"] = f"sqlite:///{os.path.join(_DATABASE_DIR, 'fitness_tracker.db')}"
+
+@pytest.fixture(scope="session")
+def dataset():
+    """A tiny synthetic dataset (100 users, 20 workouts, 2000 logs), generated once."""
+    from lib.datagen import generate_dataset
+
+    return generate_dataset('tiny')
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+from datetime import datetime
+
+from lib import async_helpers, helpers
+
+USER_IDS = range(1, 41)
+
+def _run(coroutine):
+    try:
+        return asyncio.run(coroutine)
+    finally:
+        async_helpers.shutdown()
+
+def test_concurrent_reads_match_blocking_calls(dataset):
+    expected = {
+        user_id: (
+            helpers.find_user_by_id(user_id),
+            helpers.get_user_workouts(user_id, as_rows=True),
+            helpers.count_user_workouts(user_id),
+        )
+        for user_id in USER_IDS
+    }
+
+    async def read(user_id):
+        return await asyncio.gather(
+            async_helpers.find_user_by_id(user_id),
+            async_helpers.get_user_workouts(user_id, as_rows=True),
+            async_helpers.count_user_workouts(user_id),
+        )
+
+    async def read_all():
+        # Every user read several times over, all in flight at once on the read pool.
+        return await asyncio.gather(*(read(user_id) for user_id in list(USER_IDS) * 3))
+
+    results = _run(read_all())
+    for user_id, result in zip(list(USER_IDS) * 3, results):
+        assert tuple(result) == expected[user_id]
+        assert len(result[1]) == result[2]
+
+def test_concurrent_streams_match_blocking_iteration(dataset):
+    expected = {user_id: [log.id for log in helpers.iter_user_workouts(user_id, as_rows=True)] for user_id in USER_IDS}
+
+    async def stream(user_id):
+        return [log.id async for log in async_helpers.iter_user_workouts(user_id, batch_size=7, as_rows=True)]
+
+    async def stream_all():
+        return await asyncio.gather(*(stream(user_id) for user_id in USER_IDS))
+
+    assert dict(zip(USER_IDS, _run(stream_all()))) == expected
+
+def test_stream_stays_on_one_thread_and_frees_it_on_break(dataset):
+    threads = set()
+
+    def numbers(batch_size=2):
+        for number in range(50):
+            threads.add(threading.get_ident())
+            yield number
+
+    iterate = async_helpers._mirror_iterator('iter_numbers', numbers)
+
+    async def consume():
+        assert [number async for number in iterate(batch_size=2)] == list(range(50))
+        async for number in iterate(batch_size=2):
+            if number == 5:
+                break
+        # Answered only if the abandoned stream gave its thread back.
+        return await asyncio.wait_for(async_helpers.find_user_by_id(1), timeout=10)
+
+    assert _run(consume()) is not None
+    assert len(threads) == 1
+
+def test_reads_alongside_writes(dataset):
+    user_id, workout_id = 1, 1
+    before = helpers.count_user_workouts(user_id)
+    days = [datetime(2031, 1, day, 9) for day in range(1, 21)]
+
+    async def mixed():
+        writes = [async_helpers.log_user_workout(user_id, workout_id, day) for day in days]
+        reads = [async_helpers.count_user_workouts(user_id) for _ in days]
+        results = await asyncio.gather(*writes, *reads)
+        return results[:len(days)], results[len(days):], await async_helpers.count_user_workouts(user_id)
+
+    logged, counts, after = _run(mixed())
+    assert all(log_entry is not None for log_entry in logged)
+    assert all(before <= count <= before + len(days) for count in counts)
+    assert after == before + len(days)
+
+def test_only_public_helpers_are_mirrored():
+    for name in ('log_arms', 'log_source', 'streak_log_added', 'streak_logs_added',
+                 'recompute_user_streaks', 'streak_user_removed'):
+        assert not hasattr(async_helpers, name)
+    for name in async_helpers.READ_HELPERS | async_helpers.WRITE_HELPERS:
+        assert asyncio.iscoroutinefunction(getattr(async_helpers, name)) or name.startswith('iter_')
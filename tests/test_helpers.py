@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from lib import helpers
+
+def test_bulk_log_counts_a_fully_rejected_chunk_and_keeps_going(dataset):
+    records = [
+        {'user_id': 999999, 'workout_id': 1, 'completion_date': datetime(2032, 3, 1, 9)},
+        {'user_id': 1, 'workout_id': 999999, 'completion_date': datetime(2032, 3, 2, 9)},
+        {'user_id': 1, 'workout_id': 1, 'completion_date': datetime(2032, 3, 3, 9)},
+    ]
+    # One record per chunk, so the first two chunks have no valid record at all.
+    counts = helpers.log_user_workouts_bulk(records, chunk_size=1)
+
+    assert counts == {'inserted': 1, 'skipped': 0, 'rejected': 2}
+    logs = helpers.get_user_workouts(1, since=datetime(2032, 3, 1), as_rows=True)
+    assert [log.completion_date for log in logs] == [datetime(2032, 3, 3, 9)]
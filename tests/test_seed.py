@@ -0,0 +1,10 @@
+import random
+
+from lib.seed import _log_rows
+
+def test_seed_logs_keep_one_log_per_user_workout_and_day():
+    random.seed(0)
+    for _ in range(50):
+        rows = list(_log_rows(users=20, logs_per_user=(20, 40)))
+        keys = {(row['user_id'], row['workout_id'], row['completion_date'].date()) for row in rows}
+        assert len(keys) == len(rows)